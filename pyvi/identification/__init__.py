@@ -1,3 +1,82 @@
-from .methods import __doc__
+# -*- coding: utf-8 -*-
+"""
+Module for Volterra kernels identification.
+
+This module creates identification methods for Volterra kernels. It relies
+on a matrix representation of the input-to-output relation of a Volterra
+series, and uses linear algebra tools to estimate the kernels coefficients.
+
+Identification methods (see :mod:`pyvi.identification.methods`)
+----------------------------------------------------------------
+direct_method :
+    Direct kernel identification on the output signal.
+order_method :
+    Separate kernel identification on each nonlinear homogeneous order.
+term_method :
+    Separate kernel identification on each nonlinear interconjugate term.
+iter_method :
+    Recursive kernel identification on homophase signals.
+phase_method :
+    Separate kernel identification on odd and even homophase signals.
+
+Low-rank identification (see :mod:`pyvi.identification.low_rank`)
+------------------------------------------------------------------
+cp_method :
+    Kernel identification in low-rank (CP) format.
+
+Identification diagnostics (see :mod:`pyvi.identification.diagnostics`)
+-----------------------------------------------------------------------
+IdentificationDiagnostics :
+    Diagnostics of a kernel identification.
+
+Streamed identification (see :mod:`pyvi.identification.streaming`)
+------------------------------------------------------------------
+stream_identification :
+    Kernel identification from signals streamed by chunks.
+multi_record_identification :
+    Kernel identification from several independent recordings.
+progressive_identification :
+    Kernel identification stopped as soon as the estimation has converged.
+
+Regularization and model selection (see :mod:`pyvi.identification.selection`)
+------------------------------------------------------------------------------
+regularization_path :
+    Ridge kernel identification for a whole vector of parameters.
+cross_validation :
+    K-fold cross-validation of the kernel identification.
+model_order_selection :
+    Compare all nested models up to a truncation order and memory length.
+
+Kernel tracking (see :mod:`pyvi.identification.tracking`)
+---------------------------------------------------------
+SlidingWindowEstimator :
+    Kernel estimation on a sliding window by QR updating and downdating.
+KalmanTracker :
+    Kalman-filter tracking of kernels following a random walk.
+
+Monte Carlo studies (see :mod:`pyvi.identification.studies`)
+------------------------------------------------------------
+monte_carlo :
+    Runs randomized trials for all points of a grid of parameters.
+separation_trial :
+    Trial of order separation followed by kernel identification.
+
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
 from .methods import *
-__all__ = methods.__all__
+from .diagnostics import *
+from .streaming import *
+from .selection import *
+from .tracking import *
+from .low_rank import *
+from .studies import *
+
+__all__ = list(methods.__all__)
+__all__ += diagnostics.__all__
+__all__ += streaming.__all__
+__all__ += selection.__all__
+__all__ += tracking.__all__
+__all__ += low_rank.__all__
+__all__ += studies.__all__
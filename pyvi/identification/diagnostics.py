@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Module for diagnostics of the kernel identification.
+
+Diagnostics are computed from quantities already available at the end of
+the identification (combinatorial basis and decompositions used by the
+solvers), so that no re-simulation of the estimated model is needed.
+
+Class
+-----
+IdentificationDiagnostics :
+    Diagnostics of a kernel identification.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['IdentificationDiagnostics']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import numpy as np
+from ..utilities.mathbox import binomial, safe_db
+
+
+#==============================================================================
+# Class
+#==============================================================================
+
+class IdentificationDiagnostics:
+    """
+    Diagnostics of a kernel identification.
+
+    Each linear system solved during the identification is indexed by the
+    tuple of orders it estimates, i.e. ``(1, ..., N)`` for `direct_method`,
+    ``(n,)`` for `order_method`, `term_method` and `iter_method`, and
+    ``(1, 3, ...)`` and ``(2, 4, ...)`` for `phase_method`.
+
+    Parameters
+    ----------
+    fitted_output : numpy.ndarray or dict
+        Output data fitted by the estimated kernels, in the same form as the
+        output data used for identification; for `iter_method` and
+        `phase_method`, only the null-and-positive phases are given.
+    residual_energy : dict(tuple: float)
+        Energy of the residual of each linear system.
+    output_energy : dict(tuple: float)
+        Energy of the right-hand side of each linear system; for
+        `iter_method`, it is that of the phase signals deflated by the
+        contributions of the higher orders, as actually solved.
+    solver_info : dict(tuple: dict)
+        Metadata of the solver of each linear system; if the solver is
+        'auto', it gives the chosen solver ('solver'), the condition estimate
+        ('condition') and the regularization used ('regularization').
+
+    Attributes
+    ----------
+    fitted_output : numpy.ndarray or dict
+    residual_energy : dict(tuple: float)
+    output_energy : dict(tuple: float)
+    solver_info : dict(tuple: dict)
+    rank : dict(tuple: int)
+        Effective rank of the matrix of each linear system.
+    condition : dict(tuple: float)
+        Condition number (or its estimate) of the matrix of each linear
+        system.
+
+    Methods
+    -------
+    relative_error(db=True)
+        Returns the relative residual error of each linear system.
+    """
+
+    def __init__(self, fitted_output, residual_energy, output_energy,
+                 solver_info):
+        self.fitted_output = fitted_output
+        self.residual_energy = residual_energy
+        self.output_energy = output_energy
+        self.solver_info = solver_info
+        self.rank = {key: info.get('rank')
+                     for key, info in solver_info.items()}
+        self.condition = {key: info.get('condition')
+                          for key, info in solver_info.items()}
+
+    def relative_error(self, db=True):
+        """
+        Returns the relative residual error of each linear system.
+
+        This error is the RMS value of the residual divided by the RMS value
+        of the output data, as given by
+        :func:`pyvi.utilities.measures.evaluation_error` between the output
+        data and the fitted output.
+
+        Parameters
+        ----------
+        db : boolean, optional (default=True)
+            If True, errors are given in decibels.
+
+        Returns
+        -------
+        dict(tuple: float)
+            Normalized-RMS error value of each linear system.
+        """
+
+        errors = dict()
+        for key, energy in self.residual_energy.items():
+            rms_error = np.sqrt(energy)
+            rms_ref = np.sqrt(self.output_energy[key]) or 1.
+            if db:
+                errors[key] = float(safe_db(rms_error, rms_ref))
+            else:
+                errors[key] = float(rms_error / rms_ref)
+        return errors
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def _fitted_by_term(phi_by_term, kernels_vec):
+    """Compute the nonlinear interconjugate terms fitted by the kernels."""
+
+    return {(n, k): (2**n) * np.dot(phi, kernels_vec[n])
+            for (n, k), phi in phi_by_term.items()}
+
+
+def _fitted_by_phase(phi_by_term, kernels_vec, N):
+    """Compute the null-and-positive phase signals fitted by the kernels."""
+
+    L = phi_by_term[(1, 0)].shape[0]
+    fitted = np.zeros((N+1, L), dtype=complex)
+    for (n, k), phi in phi_by_term.items():
+        fitted[n-2*k] += binomial(n, k) * np.dot(phi, kernels_vec[n])
+    fitted[0] = np.real(fitted[0])
+    return fitted
+
+
+def _energy(val, cast_mode='cplx', is_real=False):
+    """Compute the energy of a signal casted following `cast_mode`."""
+
+    if is_real or cast_mode == 'real':
+        return float(np.sum(np.real(val)**2))
+    elif cast_mode == 'imag':
+        return float(np.sum(np.imag(val)**2))
+    else:
+        return float(np.sum(np.abs(val)**2))
+
+
+def _diagnostics_by_term(phi_by_term, out_by_term, kernels_vec, cast_mode):
+    """Compute fitted terms and energies of the systems of term_method."""
+
+    fitted = _fitted_by_term(phi_by_term, kernels_vec)
+    residual_energy = dict()
+    output_energy = dict()
+    for (n, k), val in fitted.items():
+        is_real = (not n % 2) and (k == n//2)
+        residual_energy[(n,)] = residual_energy.get((n,), 0.) + \
+            _energy(out_by_term[(n, k)] - val, cast_mode, is_real)
+        output_energy[(n,)] = output_energy.get((n,), 0.) + \
+            _energy(out_by_term[(n, k)], cast_mode, is_real)
+    return fitted, residual_energy, output_energy
+
+
+def _diagnostics_by_phase(phi_by_term, out_by_phase, kernels_vec, N,
+                          cast_mode, phases_by_system):
+    """Compute fitted phases and energies of the systems of phase methods."""
+
+    fitted = _fitted_by_phase(phi_by_term, kernels_vec, N)
+    residual_energy = dict()
+    output_energy = dict()
+    for key, phases in phases_by_system.items():
+        residual_energy[key] = sum(_energy(out_by_phase[p] - fitted[p],
+                                           cast_mode, p == 0)
+                                   for p in phases)
+        output_energy[key] = sum(_energy(out_by_phase[p], cast_mode, p == 0)
+                                 for p in phases)
+    return fitted, residual_energy, output_energy
+
+
+def _diagnostics_by_iteration(phi_by_term, out_by_phase, kernels_vec, N,
+                              cast_mode):
+    """
+    Compute fitted phases and energies of the systems of iter_method.
+
+    The right-hand side of the system of order n is made of phase n (and of
+    phase 0 for n=2) deflated by the contributions of higher orders, i.e.
+    of the residual plus the contribution of order n to these phases.
+    """
+
+    fitted = _fitted_by_phase(phi_by_term, kernels_vec, N)
+    residual_energy = dict()
+    output_energy = dict()
+    for n in range(1, N+1):
+        terms = [(n, 0)] + [(2, 1)]*(n == 2)
+        residual_energy[(n,)] = 0.
+        output_energy[(n,)] = 0.
+        for (m, k) in terms:
+            p = m - 2*k
+            residual = out_by_phase[p] - fitted[p]
+            contribution = binomial(m, k) * np.dot(phi_by_term[(m, k)],
+                                                   kernels_vec[m])
+            residual_energy[(n,)] += _energy(residual, cast_mode, p == 0)
+            output_energy[(n,)] += _energy(residual + contribution,
+                                           cast_mode, p == 0)
+    return fitted, residual_energy, output_energy
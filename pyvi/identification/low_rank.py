@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Module for low-rank kernel identification.
+
+Each kernel of order n is parametrized by a (non-symmetric) CP
+decomposition ``h(t1, ..., tn) = sum_r w_r1(t1) ... w_rn(tn)``, i.e. as a
+parallel cascade of R branches, each being the product of n FIR filters of
+the input. Filters are estimated by alternating least-squares; as each
+sub-problem is linear in the filters of one mode, it is solved by LSQR using
+only filtering and correlation of the input signal (made by FFT). Neither
+the combinatorial basis nor the delay matrix of the input is ever formed, so
+that memory and time grow linearly (instead of as M^n) with the memory
+length.
+
+Functions
+---------
+cp_method :
+    Kernel identification in low-rank (CP) format.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['cp_method']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import numpy as np
+import scipy.sparse.linalg as sc_sparse_lin
+from .methods import _format_kernels
+from ..volterra.decomposition import cp2kernel
+from ..utilities.tools import _as_list
+
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+_STRING_OPT_CP = {'cp', 'CP'}
+
+
+#==============================================================================
+# Class
+#==============================================================================
+
+class _FFTFilter():
+    """
+    Filtering and correlation of a signal by FFT.
+
+    Parameters
+    ----------
+    signal : numpy.ndarray
+        Real-valued signal.
+    max_memory : int
+        Maximum length of the filters.
+    """
+
+    def __init__(self, signal, max_memory):
+        self.L = signal.shape[0]
+        self.nfft = 2**int(np.ceil(np.log2(self.L + max_memory)))
+        self._spectrum = np.fft.rfft(signal, n=self.nfft)
+
+    def filtering(self, taps):
+        """Returns the signal filtered by FIR filter `taps`."""
+
+        return np.fft.irfft(self._spectrum * np.fft.rfft(taps, n=self.nfft),
+                            n=self.nfft)[:self.L]
+
+    def correlation(self, sig, m):
+        """Returns ``sum_t sig[t] signal[t-j]`` for ``0 <= j < m``."""
+
+        return np.fft.irfft(np.conj(self._spectrum) *
+                            np.fft.rfft(sig, n=self.nfft), n=self.nfft)[:m]
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def cp_method(input_sig, output_sig, N, M, rank=1, max_iter=500, tol=1e-8,
+              seed=None, out_form='cp', return_error=False):
+    """
+    Kernel identification in low-rank (CP) format.
+
+    Parameters
+    ----------
+    input_sig : numpy.ndarray
+        Input signal; must be real-valued.
+    output_sig : numpy.ndarray
+        Output signal; should have the same shape as `input_sig`.
+    N : int
+        Truncation order.
+    M : int or list(int)
+        Memory length for each kernels (in samples).
+    rank : int or dict(int: int), optional (default=1)
+        Number of branches for each kernel (of order strictly greater than 1;
+        the first-order kernel is always a single FIR filter).
+    max_iter : int, optional (default=500)
+        Maximum number of alternating least-squares sweeps.
+    tol : float, optional (default=1e-8)
+        Iterations are stopped when the relative variation of the residual
+        during a sweep is lower than `tol`.
+    seed : int, optional (default=None)
+        Seed of the random initialization of the filters.
+    out_form : {'cp', 'vec', 'tri', 'sym'}, optional (default='cp')
+        Form of the returned kernels; if 'cp', kernels are returned as
+        decompositions ``(weights, filters)`` usable by
+        :func:`pyvi.volterra.simulation.compute_cp_output`; other forms
+        create the full kernels, and should thus only be used for small
+        memory lengths. See module :mod:`pyvi.volterra.tools` for more
+        precisions.
+    return_error : boolean, optional (default=False)
+        If True, the relative residual error (ratio of the RMS values of the
+        residual and of the output) is also returned.
+
+    Returns
+    -------
+    kernels : dict(int: (numpy.ndarray, numpy.ndarray)) or dict(int: array)
+        Dictionary of estimated kernels, where each key is the nonlinear
+        order; in 'cp' form, each kernel is a tuple ``(weights, filters)``
+        where `weights` has shape ``(R,)`` and `filters` has shape
+        ``(R, n, M)``, with unit-norm filters.
+    error : float
+        Relative residual error; only returned if `return_error` is True.
+    """
+
+    input_sig = np.asarray(input_sig, dtype=float)
+    output_sig = np.asarray(output_sig, dtype=float)
+    _M = _as_list(M, N)
+    ranks = [1] + [rank.get(n, 1) if isinstance(rank, dict) else rank
+                   for n in range(2, N+1)]
+    fft_filter = _FFTFilter(input_sig, max(_M))
+
+    factors = _initial_factors(input_sig, output_sig, N, _M, ranks,
+                               fft_filter, seed)
+    filtered = {n: np.array([[fft_filter.filtering(taps) for taps in branch]
+                             for branch in val])
+                for n, val in factors.items()}
+    output_sig_est = sum(np.sum(np.prod(val, axis=1), axis=0)
+                         for val in filtered.values())
+
+    norm_output = np.linalg.norm(output_sig) or 1.
+    error = np.linalg.norm(output_sig - output_sig_est) / norm_output
+    for _ in range(max_iter):
+        for k in range(N):
+            _update_modes(factors, filtered, {n: k % n for n in factors},
+                          output_sig, fft_filter)
+        for n in factors:
+            _balance(factors[n], filtered[n])
+
+        previous_error = error
+        output_sig_est = sum(np.sum(np.prod(val, axis=1), axis=0)
+                             for val in filtered.values())
+        error = np.linalg.norm(output_sig - output_sig_est) / norm_output
+        if abs(previous_error - error) <= tol * previous_error:
+            break
+
+    kernels = dict()
+    for n, val in factors.items():
+        norms = np.linalg.norm(val, axis=2)
+        norms[norms == 0] = 1.
+        kernels[n] = (np.prod(norms, axis=1), val / norms[:, :, np.newaxis])
+    if out_form not in _STRING_OPT_CP:
+        kernels_vec = {n: cp2kernel(weights, filters, n, form='vec')
+                       for n, (weights, filters) in kernels.items()}
+        kernels = _format_kernels(kernels_vec, N, _M, None, None, out_form)
+
+    if return_error:
+        return kernels, error
+    else:
+        return kernels
+
+
+def _initial_factors(input_sig, output_sig, N, M, ranks, fft_filter, seed):
+    """
+    Initial filters, randomly spread around the best linear filter.
+
+    The first-order kernel is initialized by least-squares; as the linear
+    filter generally shares its dynamics with those of higher orders (e.g.
+    for Wiener-like systems), it is used as the common direction of all other
+    filters, to which a random part is added to differentiate branches.
+    """
+
+    rng = np.random.RandomState(seed)
+    factors = {1: np.zeros((1, 1, M[0]))}
+    filtered = {1: np.zeros((1, 1, input_sig.shape[0]))}
+    _update_modes(factors, filtered, {1: 0}, output_sig, fft_filter)
+    linear = factors[1][0, 0] / (np.linalg.norm(factors[1][0, 0]) or 1.)
+
+    for n in range(2, N+1):
+        m = M[n-1]
+        direction = np.zeros((m,))
+        direction[:min(m, M[0])] = linear[:m]
+        factors[n] = direction + rng.normal(size=(ranks[n-1], n, m)) / \
+            np.sqrt(2*m)
+    return factors
+
+
+def _update_modes(factors, filtered, modes, target, fft_filter):
+    """
+    Joint least-squares update of one mode of the filters of each order.
+
+    With all other filters fixed, the output of each order is linear in the
+    filters of the chosen mode (given by `modes`), so that the filters of
+    all orders are updated at once; this avoids the slow convergence of an
+    order-by-order update when homogeneous orders are correlated.
+    """
+
+    L = fft_filter.L
+    blocks = []
+    for n, k in sorted(modes.items()):
+        R, _, m = factors[n].shape
+        others = np.prod(np.delete(filtered[n], k, axis=1), axis=1) if n > 1 \
+            else np.ones((R, L))
+        blocks.append((n, k, R, m, others))
+    sizes = [R*m for (_, _, R, m, _) in blocks]
+    bounds = np.cumsum([0] + sizes)
+
+    def matvec(vec):
+        vec = np.ravel(vec)
+        out = np.zeros((L,))
+        for (n, k, R, m, others), start in zip(blocks, bounds):
+            taps = vec[start:start+R*m].reshape((R, m))
+            for r in range(R):
+                out += others[r] * fft_filter.filtering(taps[r])
+        return out
+
+    def rmatvec(sig):
+        sig = np.ravel(sig)
+        return np.concatenate([fft_filter.correlation(others[r] * sig, m)
+                               for (n, k, R, m, others) in blocks
+                               for r in range(R)])
+
+    init = np.concatenate([factors[n][:, k].ravel()
+                           for (n, k, _, _, _) in blocks])
+    operator = sc_sparse_lin.LinearOperator((L, bounds[-1]), matvec=matvec,
+                                            rmatvec=rmatvec, dtype=float)
+    # Solved for the correction of the current factors (parameter `x0` of
+    # lsqr is not available in all supported versions of scipy)
+    correction = sc_sparse_lin.lsqr(operator, target - matvec(init),
+                                    atol=1e-12, btol=1e-12, conlim=np.inf,
+                                    iter_lim=2*bounds[-1])[0]
+    solution = init + correction
+
+    for (n, k, R, m, _), start in zip(blocks, bounds):
+        factors[n][:, k] = solution[start:start+R*m].reshape((R, m))
+        for r in range(R):
+            filtered[n][r, k] = fft_filter.filtering(factors[n][r, k])
+
+
+def _balance(factors, filtered):
+    """Rescale the filters of each branch so that they have the same norm."""
+
+    n = factors.shape[1]
+    if n == 1:
+        return
+    norms = np.linalg.norm(factors, axis=2)
+    for r in range(factors.shape[0]):
+        if np.all(norms[r] > 0):
+            scale = np.prod(norms[r])**(1/n) / norms[r]
+            factors[r] *= scale[:, np.newaxis]
+            filtered[r] *= scale[:, np.newaxis]
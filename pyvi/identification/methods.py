@@ -38,7 +38,11 @@ __all__ = ['direct_method', 'order_method', 'term_method', 'iter_method',
 
 import warnings
 import numpy as np
-from .tools import _solver, _complex2real
+from .tools import (_solver, _block_triangular_solver, _complex2real_into,
+                    _check_cast_mode, _nb_workers, _thread_map)
+from .diagnostics import (IdentificationDiagnostics, _energy,
+                          _diagnostics_by_term, _diagnostics_by_phase,
+                          _diagnostics_by_iteration)
 from ..volterra.combinatorial_basis import (compute_combinatorial_basis,
                                             _check_parameters,
                                             _compute_list_nb_coeff,
@@ -71,19 +75,34 @@ def direct_method(input_sig, output_sig, N, **kwargs):
     {}
     """
 
+    _check_single_solver(kwargs.get('solver'), 'direct_method')
+
     def required_nb_data_func(list_nb_coeff):
         """Compute the minimum number of data required."""
         return sum(list_nb_coeff)
 
-    def core_func(phi_by_order, out_sig, solver, sizes=[], **kwargs):
+    def core_func(phi_by_order, out_sig, solver, sizes=[], solver_kwargs={},
+                  solver_info=None, **kwargs):
         """Core computation of the identification."""
         mat = np.concatenate([val for n, val in sorted(phi_by_order.items())],
                              axis=1)
-        kernels_vec = _solver(mat, out_sig, solver)
+        kernels_vec = _solver(mat, out_sig, solver,
+                              info=_system_info(solver_info,
+                                                tuple(sorted(phi_by_order))),
+                              **solver_kwargs)
         return _vec2dict_of_vec(kernels_vec, sizes)
 
+    def diagnostics_func(phi_by_order, out_sig, kernels_vec, cast_mode):
+        """Fitted output and energies of the linear system."""
+        fitted = sum(np.dot(phi, kernels_vec[n])
+                     for n, phi in phi_by_order.items())
+        key = tuple(sorted(phi_by_order))
+        return (fitted, {key: _energy(out_sig - fitted)},
+                {key: _energy(out_sig)})
+
     return _identification(input_sig, output_sig, N, required_nb_data_func,
-                           core_func, 'order', **kwargs)
+                           core_func, 'order',
+                           diagnostics_func=diagnostics_func, **kwargs)
 
 
 def order_method(input_sig, output_by_order, N, **kwargs):
@@ -111,15 +130,34 @@ def order_method(input_sig, output_by_order, N, **kwargs):
         """Compute the minimum number of data required."""
         return max(list_nb_coeff)
 
-    def core_func(phi_by_order, out_by_order, solver, **kwargs):
+    def core_func(phi_by_order, out_by_order, solver, solver_kwargs={},
+                  solver_info=None, **kwargs):
         """Core computation of the identification."""
-        kernels_vec = dict()
-        for n, phi in phi_by_order.items():
-            kernels_vec[n] = _solver(phi, out_by_order[n-1], solver)
-        return kernels_vec
+
+        def solve_order(n):
+            """Solve the linear system of order n."""
+            return n, _solver(phi_by_order[n], out_by_order[n-1],
+                              _solver_of_order(solver, n),
+                              info=_system_info(solver_info, (n,)),
+                              **solver_kwargs)
+
+        orders = _orders_by_decreasing_size(phi_by_order)
+        nb_workers, solver_kwargs = _order_workers(orders, solver_kwargs)
+        return dict(_thread_map(solve_order, orders, nb_workers))
+
+    def diagnostics_func(phi_by_order, out_by_order, kernels_vec, cast_mode):
+        """Fitted orders and energies of the linear systems."""
+        fitted = np.array([np.dot(phi_by_order[n], kernels_vec[n])
+                           for n in range(1, N+1)])
+        residual_energy = {(n,): _energy(out_by_order[n-1] - fitted[n-1])
+                           for n in range(1, N+1)}
+        output_energy = {(n,): _energy(out_by_order[n-1])
+                         for n in range(1, N+1)}
+        return fitted, residual_energy, output_energy
 
     return _identification(input_sig, output_by_order, N,
-                           required_nb_data_func, core_func, 'order', **kwargs)
+                           required_nb_data_func, core_func, 'order',
+                           diagnostics_func=diagnostics_func, **kwargs)
 
 
 def term_method(input_sig, output_by_term, N, **kwargs):
@@ -149,25 +187,38 @@ def term_method(input_sig, output_by_term, N, **kwargs):
         """Compute the minimum number of data required."""
         return max(list_nb_coeff / (1+np.arange(1, N+1)//2))
 
-    def core_func(phi_by_term, out_by_term, solver, cast_mode='', **kwargs):
+    def core_func(phi_by_term, out_by_term, solver, cast_mode='',
+                  solver_kwargs={}, solver_info=None, **kwargs):
         """Core computation of the identification."""
 
-        kernels_vec = dict()
-        _phi_by_term = _cast_complex2real(phi_by_term, cast_mode)
-        _out_by_term = _cast_complex2real(out_by_term, cast_mode)
+        cast_mode = _check_cast_mode(cast_mode)
+        dtype = _cast_dtype(cast_mode)
 
-        for n in range(1, N+1):
+        def solve_order(n):
+            """Build and solve the linear system of order n."""
+            L, nb_coeff = phi_by_term[(n, 0)].shape
             k_vec = list(range(1+n//2))
-            phi_n = np.concatenate([_phi_by_term[(n, k)] for k in k_vec],
-                                   axis=0)
-            out_n = np.concatenate([_out_by_term[(n, k)] for k in k_vec],
-                                   axis=0)
-            kernels_vec[n] = _solver((2**n) * phi_n, out_n, solver)
-
-        return kernels_vec
+            starts = np.cumsum([0] + [_nb_real_rows(n, k, L, cast_mode)
+                                      for k in k_vec])
+            phi_n = np.empty((starts[-1], nb_coeff), dtype=dtype)
+            out_n = np.empty((starts[-1],), dtype=dtype)
+            for k, start, end in zip(k_vec, starts[:-1], starts[1:]):
+                _cast_term_into(phi_n[start:end], phi_by_term[(n, k)], n, k,
+                                cast_mode, factor=2**n)
+                _cast_term_into(out_n[start:end], out_by_term[(n, k)], n, k,
+                                cast_mode)
+            return n, _solver(phi_n, out_n, _solver_of_order(solver, n),
+                              info=_system_info(solver_info, (n,)),
+                              **solver_kwargs)
+
+        orders = _orders_by_decreasing_size({n: phi_by_term[(n, 0)]
+                                             for n in range(1, N+1)})
+        nb_workers, solver_kwargs = _order_workers(orders, solver_kwargs)
+        return dict(_thread_map(solve_order, orders, nb_workers))
 
     return _identification(input_sig, output_by_term, N,
-                           required_nb_data_func, core_func, 'term', **kwargs)
+                           required_nb_data_func, core_func, 'term',
+                           diagnostics_func=_diagnostics_by_term, **kwargs)
 
 
 def iter_method(input_sig, output_by_phase, N, **kwargs):
@@ -194,38 +245,58 @@ def iter_method(input_sig, output_by_phase, N, **kwargs):
     {}
     """
 
+    _check_single_solver(kwargs.get('solver'), 'iter_method')
+
     def required_nb_data_func(list_nb_coeff):
         """Compute the minimum number of data required."""
         return max(list_nb_coeff)
 
-    def core_func(phi_by_term, out_by_phase, solver, cast_mode='', **kwargs):
+    def core_func(phi_by_term, out_by_phase, solver, cast_mode='',
+                  solver_kwargs={}, solver_info=None, **kwargs):
         """Core computation of the identification."""
 
         kernels_vec = dict()
-        _phi_by_term = _cast_complex2real(phi_by_term, cast_mode)
-        _out_by_phase = out_by_phase.copy()
+        cast_mode = _check_cast_mode(cast_mode)
+        dtype = _cast_dtype(cast_mode)
+        # Only null-and-positive phases are used (and updated)
+        _out_by_phase = out_by_phase[:N+1].copy()
 
         for n in range(N, 0, -1):
-            current_phi = _phi_by_term[(n, 0)]
-            current_phase_sig = _complex2real(_out_by_phase[n],
-                                              cast_mode=cast_mode)
+            L, nb_coeff = phi_by_term[(n, 0)].shape
+            nb_rows = _nb_real_rows(n, 0, L, cast_mode)
+            nb_rows_tot = nb_rows + L*(n == 2)
+            current_phi = np.empty((nb_rows_tot, nb_coeff), dtype=dtype)
+            current_phase_sig = np.empty((nb_rows_tot,), dtype=dtype)
+            _cast_term_into(current_phi[:nb_rows], phi_by_term[(n, 0)], n, 0,
+                            cast_mode)
+            _cast_term_into(current_phase_sig[:nb_rows], _out_by_phase[n], n,
+                            0, cast_mode)
 
             if n == 2:
-                current_phi = np.concatenate(
-                    (current_phi, 2 * np.real(_phi_by_term[(2, 1)])), axis=0)
-                current_phase_sig = np.concatenate(
-                    (current_phase_sig, np.real(_out_by_phase[0])), axis=0)
+                _cast_term_into(current_phi[nb_rows:], phi_by_term[(2, 1)], 2,
+                                1, cast_mode, factor=2)
+                _cast_term_into(current_phase_sig[nb_rows:], _out_by_phase[0],
+                                2, 1, cast_mode)
 
-            kernels_vec[n] = _solver(current_phi, current_phase_sig, solver)
+            kernels_vec[n] = _solver(current_phi, current_phase_sig, solver,
+                                     info=_system_info(solver_info, (n,)),
+                                     **solver_kwargs)
 
             for k in range(1, 1+n//2):
                 p = n - 2*k
-                _out_by_phase[p] -= binomial(n, k) * \
-                                    np.dot(phi_by_term[(n, k)], kernels_vec[n])
+                temp = np.dot(phi_by_term[(n, k)], kernels_vec[n])
+                temp *= binomial(n, k)
+                _out_by_phase[p] -= temp
         return kernels_vec
 
+    def diagnostics_func(phi_by_term, out_by_phase, kernels_vec, cast_mode):
+        """Fitted phases and energies of the (deflated) linear systems."""
+        return _diagnostics_by_iteration(phi_by_term, out_by_phase,
+                                         kernels_vec, N, cast_mode)
+
     return _identification(input_sig, output_by_phase, N,
-                           required_nb_data_func, core_func, 'term', **kwargs)
+                           required_nb_data_func, core_func, 'term',
+                           diagnostics_func=diagnostics_func, **kwargs)
 
 
 def phase_method(input_sig, output_by_phase, N, **kwargs):
@@ -252,56 +323,63 @@ def phase_method(input_sig, output_by_phase, N, **kwargs):
     {}
     """
 
+    _check_single_solver(kwargs.get('solver'), 'phase_method')
+
     def required_nb_data_func(list_nb_coeff):
         """Compute the minimum number of data required."""
         return max(list_nb_coeff)
 
-    def core_func(phi_by_term, out_by_phase, solver, sizes=[], cast_mode=''):
+    def core_func(phi_by_term, out_by_phase, solver, sizes=[], cast_mode='',
+                  solver_kwargs={}, solver_info=None):
         """Core computation of the identification."""
 
-        L = out_by_phase.shape[1]
-        L = 2*L if cast_mode == 'real-imag' else L
         kernels = dict()
-        _phi_by_term = _cast_complex2real(phi_by_term, cast_mode)
+        cast_mode = _check_cast_mode(cast_mode)
 
         for is_odd in [False, True]:
-            curr_phases = range(2-is_odd, N+1, 2)
-            curr_y = np.concatenate([_complex2real(out_by_phase[p],
-                                                   cast_mode=cast_mode)
-                                     for p in curr_phases], axis=0)
-
-            curr_phi = np.bmat(
-                [[_phi_by_term.get((p+2*k, k), np.zeros((L, sizes[p+2*k-1]))) *
-                  binomial(p+2*k, k) for k in range(1-(p+1)//2, 1+(N-p)//2)]
-                 for p in curr_phases])
-
-            if not is_odd:
-                curr_y = np.concatenate((np.real(out_by_phase[0]), curr_y),
-                                        axis=0)
-                n_even = range(2, N+1, 2)
-                temp = np.concatenate([_phi_by_term[n, n//2] *
-                                       binomial(n, n//2) for n in n_even],
-                                      axis=1)
-                curr_phi = np.concatenate((np.real(temp), curr_phi), axis=0)
-
-            curr_f = _solver(curr_phi, curr_y, solver)
+            orders = list(range(2-is_odd, N+1, 2))
+            if not orders:
+                continue
+
+            # Block upper-triangular system: phase p only involves orders n>=p
+            row_blocks = _phase_row_blocks(phi_by_term, out_by_phase, orders,
+                                           sizes, cast_mode)
+            curr_f = _block_triangular_solver(row_blocks,
+                                              [sizes[n-1] for n in orders],
+                                              solver,
+                                              info=_system_info(solver_info,
+                                                                tuple(orders)),
+                                              **solver_kwargs)
 
             index = 0
-            for n in range(1 if is_odd else 2, N+1, 2):
+            for n in orders:
                 nb_term = sizes[n-1]
                 kernels[n] = curr_f[index:index+nb_term]
                 index += nb_term
 
         return kernels
 
+    def diagnostics_func(phi_by_term, out_by_phase, kernels_vec, cast_mode):
+        """Fitted phases and energies of the linear systems."""
+        phases_by_system = dict()
+        for is_odd in [False, True]:
+            orders = list(range(2-is_odd, N+1, 2))
+            if orders:
+                phases_by_system[tuple(orders)] = orders + [0]*(not is_odd)
+        return _diagnostics_by_phase(phi_by_term, out_by_phase, kernels_vec,
+                                     N, cast_mode, phases_by_system)
+
     return _identification(input_sig, output_by_phase, N,
-                           required_nb_data_func, core_func, 'term', **kwargs)
+                           required_nb_data_func, core_func, 'term',
+                           diagnostics_func=diagnostics_func, **kwargs)
 
 
 def _identification(input_data, output_data, N, required_nb_data_func,
-                    core_func, sorted_by, solver='LS', out_form='vec', M=None,
-                    orthogonal_basis=None, phi=None, cast_mode='real-imag',
-                    system_type='volterra'):
+                    core_func, sorted_by, diagnostics_func=None, solver='LS',
+                    out_form='vec', M=None, orthogonal_basis=None, phi=None,
+                    cast_mode='real-imag', system_type='volterra', seed=None,
+                    n_jobs=None, chunk_size=None, memory_budget=None,
+                    diagnostics=False):
     """Core function for kernel identification in linear algebra formalism."""
 
 
@@ -310,12 +388,7 @@ def _identification(input_data, output_data, N, required_nb_data_func,
     list_nb_coeff = _compute_list_nb_coeff(N, system_type, M,
                                            orthogonal_basis,
                                            is_orthogonal_basis_as_list)
-    if system_type in _STRING_HAMMERSTEIN:
-        if out_form not in _STRING_OPT_VEC:
-            message = "Out form {} was specified for a Hammerstein system;" + \
-                      " a vector will however be outputed."
-            warnings.warn(message, UserWarning)
-        out_form = 'vec'
+    out_form = _check_out_form(out_form, system_type)
 
     # Check that there is enough data to do the identification
     nb_data = input_data.size
@@ -336,10 +409,29 @@ def _identification(input_data, output_data, N, required_nb_data_func,
         #TODO check correct
 
     # Estimate kernels
+    solver_info = dict() if diagnostics else None
+    solver_kwargs = {'seed': seed, 'n_jobs': n_jobs, 'chunk_size': chunk_size,
+                     'memory_budget': memory_budget}
     kernels_vec = core_func(phi, output_data, solver, sizes=list_nb_coeff,
-                            cast_mode=cast_mode)
+                            cast_mode=cast_mode, solver_kwargs=solver_kwargs,
+                            solver_info=solver_info)
 
     # Output
+    kernels = _format_kernels(kernels_vec, N, M, orthogonal_basis,
+                              is_orthogonal_basis_as_list, out_form)
+    if diagnostics:
+        fitted, residual_energy, output_energy = \
+            diagnostics_func(phi, output_data, kernels_vec, cast_mode)
+        return kernels, IdentificationDiagnostics(fitted, residual_energy,
+                                                  output_energy, solver_info)
+    else:
+        return kernels
+
+
+def _format_kernels(kernels_vec, N, M, orthogonal_basis,
+                    is_orthogonal_basis_as_list, out_form):
+    """Rearrange the estimated kernels following `out_form`."""
+
     if out_form in _STRING_OPT_VEC:
         return kernels_vec
     else:
@@ -354,17 +446,123 @@ def _identification(input_data, output_data, N, required_nb_data_func,
                               form=out_form)
 
 
-def _cast_complex2real(val_by_term, cast_mode):
-    """Cast dictionary of values sorted by term from complex to real. """
+def _check_out_form(out_form, system_type):
+    """Force vector form for Hammerstein systems, with a warning."""
 
-    _val_by_term = dict()
-    for (n, k) in val_by_term.keys():
-        if (not n % 2) and (k == n//2):
-            _val_by_term[(n, k)] = np.real(val_by_term[(n, k)])
-        else:
-            _val_by_term[(n, k)] = _complex2real(val_by_term[(n, k)],
-                                                 cast_mode=cast_mode)
-    return _val_by_term
+    if system_type in _STRING_HAMMERSTEIN:
+        if out_form not in _STRING_OPT_VEC:
+            message = "Out form {} was specified for a Hammerstein system;" + \
+                      " a vector will however be outputed."
+            warnings.warn(message, UserWarning)
+        out_form = 'vec'
+    return out_form
+
+
+def _system_info(solver_info, orders):
+    """Return the dictionary recording the solver of a linear system."""
+
+    if solver_info is None:
+        return None
+    else:
+        return solver_info.setdefault(orders, dict())
+
+
+def _check_single_solver(solver, method_name):
+    """Raise an error if solvers are given by order."""
+
+    if isinstance(solver, dict):
+        raise ValueError('Solvers given by order (as a dictionary) are only ' +
+                         'supported by `order_method` and `term_method`, ' +
+                         'not by `{}`.'.format(method_name))
+
+
+def _solver_of_order(solver, n):
+    """Return the solver used for order n (default is 'LS')."""
+
+    if isinstance(solver, dict):
+        return solver.get(n, 'LS')
+    else:
+        return solver
+
+
+def _orders_by_decreasing_size(phi_by_order):
+    """Sort orders so that the biggest linear systems are solved first."""
+
+    return sorted(phi_by_order.keys(), key=lambda n: -phi_by_order[n].size)
+
+
+def _order_workers(orders, solver_kwargs):
+    """
+    Return the number of threads solving orders, and the solver arguments.
+
+    When orders are solved concurrently, each linear system is solved
+    serially, so that solvers using worker processes (such as 'tsqr') do not
+    each start their own pool.
+    """
+
+    nb_workers = min(_nb_workers(solver_kwargs.get('n_jobs')), len(orders))
+    if nb_workers > 1:
+        solver_kwargs = dict(solver_kwargs, n_jobs=None)
+    return nb_workers, solver_kwargs
+
+
+def _phase_row_blocks(phi_by_term, out_by_phase, orders, sizes, cast_mode):
+    """Generate the row blocks of the system of one parity of phase_method."""
+
+    L = out_by_phase.shape[-1]
+    dtype = _cast_dtype(cast_mode)
+    col_starts = np.cumsum([0] + [sizes[n-1] for n in orders])
+
+    def row_block(ind, p, nb_rows):
+        """Augmented matrix of the row block of phase p."""
+        offset = col_starts[ind]
+        mat = np.empty((nb_rows, col_starts[-1] - offset + 1), dtype=dtype)
+        for n, start, end in zip(orders[ind:], col_starts[ind:-1],
+                                 col_starts[ind+1:]):
+            k = (n-p)//2
+            _cast_term_into(mat[:, start-offset:end-offset],
+                            phi_by_term[(n, k)], n, k, cast_mode,
+                            factor=binomial(n, k))
+        return mat
+
+    # Blocks are generated by decreasing first column block, one at a time
+    for ind in range(len(orders)-1, -1, -1):
+        p = orders[ind]
+        mat = row_block(ind, p, _nb_real_rows(p, 0, L, cast_mode))
+        _cast_term_into(mat[:, -1], out_by_phase[p], p, 0, cast_mode)
+        yield ind, mat
+
+    # Null phase (only for even orders), whose terms are real
+    if not orders[0] % 2:
+        mat = row_block(0, 0, L)
+        np.copyto(mat[:, -1], np.real(out_by_phase[0]))
+        yield 0, mat
+
+
+def _cast_dtype(cast_mode):
+    """Return the data type of linear systems casted following `cast_mode`."""
+
+    return complex if cast_mode == 'cplx' else float
+
+
+def _nb_real_rows(n, k, L, cast_mode):
+    """Return the number of rows of term (n, k) casted to real numbers."""
+
+    if ((not n % 2) and (k == n//2)) or (cast_mode != 'real-imag'):
+        return L
+    else:
+        return 2*L
+
+
+def _cast_term_into(out, val, n, k, cast_mode, factor=1):
+    """Write term (n, k) casted following `cast_mode` (and scaled) in `out`."""
+
+    if (not n % 2) and (k == n//2):
+        # Central interconjugate terms of even orders are real
+        np.multiply(np.real(val), factor, out=out)
+    else:
+        _complex2real_into(out, val, cast_mode=cast_mode, factor=factor)
+    return out
 
 
 #========================================#
@@ -372,10 +570,18 @@ def _cast_complex2real(val_by_term, cast_mode):
 kwargs_docstring_common_pre = """
     Other parameters
     ----------------
-    solver : {'LS', 'QR'}, optional (default='LS')
+    solver : {'LS', 'QR', 'sketch', 'tsqr', 'auto'}, optional (default='LS')
         Method used for solving linear systems; if set to 'LS', a standard
         Least-Squares estimate is used; if set to 'QR', a QR decomposition of
-        the matrix to invert is used.
+        the matrix to invert is used; if set to 'sketch', a randomized sketch
+        of the matrix is used to precondition an iterative least-squares
+        solver (useful for very long signals); if set to 'tsqr', a
+        tall-skinny QR decomposition is computed by blocks of rows, possibly
+        in parallel; if set to 'auto', the solver is chosen from the size of
+        the matrix, the memory budget and an estimate of its condition
+        number (see `diagnostics`); for `order_method` and `term_method`,
+        can also be a dictionary giving the solver of each order (orders not
+        in the dictionary use 'LS').
     out_form : {'tri', 'sym', 'vec'}, optional (default='vec')
         Form to assume for the kernel; if None, no specific form is assumed.
         See module :mod:`pyvi.volterra.tools` for more precisions.
@@ -406,6 +612,31 @@ kwargs_docstring_common_post = """
         contains all possible input products; if set to 'hammerstein',
         combinatorial basis only contains those corresponding to diagonal
         kernel values.
+    seed : int, optional (default=None)
+        Seed of the random generator; only used if `solver` is 'sketch', in
+        which case it makes the estimation reproducible.
+    n_jobs : int, optional (default=None)
+        Number of workers; if None, no worker is used; if -1, all cores are
+        used; if `solver` is 'tsqr', number of worker processes of the QR
+        decomposition; for `order_method` and `term_method`, number of
+        threads solving the orders concurrently (biggest systems first),
+        each system being then solved without worker processes.
+    memory_budget : int, optional (default=None)
+        Memory (in bytes) available to the solver in addition to the
+        combinatorial matrix; only used if `solver` is 'auto'; if None,
+        1 GiB is assumed.
+    diagnostics : boolean, optional (default=False)
+        If True, an :class:`IdentificationDiagnostics` object is also
+        returned, giving the residual energy, effective rank and condition
+        number of each linear system, the metadata of its solver (for
+        'auto', the chosen solver, the condition estimate and the
+        regularization used), and the fitted output data; these are
+        computed from the combinatorial basis and the solver decompositions,
+        without re-simulating the estimated model.
+    chunk_size : int, optional (default=None)
+        Number of rows in each block of the tall-skinny QR decomposition;
+        only used if `solver` is 'tsqr'; if None, rows are evenly split
+        between worker processes.
 
     Either the memory length `M` or parameter `orthogonal_basis` must be
     specified; if both are `None`, the method will issue an error; if both are
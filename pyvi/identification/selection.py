@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+"""
+Module for regularization and model selection in kernel identification.
+
+Functions
+---------
+regularization_path :
+    Ridge kernel identification for a whole vector of parameters.
+cross_validation :
+    K-fold cross-validation of the kernel identification.
+model_order_selection :
+    Compare all nested models up to a truncation order and memory length.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['regularization_path', 'cross_validation', 'model_order_selection']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import itertools as itr
+import numpy as np
+import scipy.linalg as sc_lin
+from .tools import _ridge_path, _is_by_order, _required_nb_data
+from ..volterra.combinatorial_basis import (compute_combinatorial_basis,
+                                            _check_parameters,
+                                            _compute_list_nb_coeff,
+                                            _STRING_VOLTERRA)
+from ..volterra.tools import _vec2dict_of_vec
+from ..utilities.measures import evaluation_error
+
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+_STRING_CRITERIA = {'aic', 'bic', 'validation'}
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def regularization_path(input_sig, output_data, N, lambdas, method='direct',
+                        decomposition='svd', M=None, orthogonal_basis=None,
+                        phi=None, system_type='volterra'):
+    """
+    Ridge kernel identification for a whole vector of parameters.
+
+    For each regularization parameter ``lam``, kernels minimize
+    ``||phi f - y||**2 + lam * ||f||**2``; only one decomposition of the
+    combinatorial matrix is computed (per order if `method` is 'order'), from
+    which all solutions, as well as generalized cross-validation (GCV) scores
+    and L-curve coordinates, are derived at negligible extra cost.
+
+    Parameters
+    ----------
+    input_sig : numpy.ndarray
+        Input signal.
+    output_data : numpy.ndarray
+        Output signal (if `method` is 'direct') or its nonlinear homogeneous
+        orders with shape ``(N, input_sig.shape)`` (if `method` is 'order').
+    N : int
+        Truncation order.
+    lambdas : array_like
+        Vector of nonnegative regularization parameters.
+    method : {'direct', 'order'}, optional (default='direct')
+        Identification method; see :func:`pyvi.identification.direct_method`
+        and :func:`pyvi.identification.order_method`.
+    decomposition : {'svd', 'gram'}, optional (default='svd')
+        If 'svd', a thin SVD of the combinatorial matrix is used; if 'gram',
+        the eigendecomposition of its Gram matrix is used instead, which is
+        cheaper for very long signals but less accurate for ill-conditioned
+        problems.
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples); can be specified
+        globally for all orders, or separately for each order via a list of
+        different values.
+    orthogonal_basis : (list of) basis object, optional (default=None)
+        Orthogonal basis unto which kernels are projected; can be specified
+        globally for all orders, or separately for each order via a list of
+        different values. See module :mod:`pyvi.utilities.orthogonal_basis`
+        for precisions on what basis object can be.
+    phi : dict(int: numpy.ndarray), optional (default=None)
+        Pre-computed dictionary of the combinatorial matrix for each nonlinear
+        homogeneous order.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system; if set to 'volterra', combinatorial basis
+        contains all possible input products; if set to 'hammerstein',
+        combinatorial basis only contains those corresponding to diagonal
+        kernel values.
+
+    Returns
+    -------
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of estimated kernels in vector form, where each key is the
+        nonlinear order; each value has shape ``(len(lambdas), nb_coeff)``.
+    scores : dict(str: numpy.ndarray)
+        Dictionary with keys 'residual_norm', 'solution_norm' and 'gcv' (each
+        value has shape ``(len(lambdas),)`` if `method` is 'direct' or
+        ``(N, len(lambdas))`` if `method` is 'order'), and key 'best_lambda'
+        giving the parameter minimizing the GCV score (for each order if
+        `method` is 'order').
+    """
+
+    lambdas = np.asarray(lambdas, dtype=float)
+    by_order = _is_by_order(method)
+    systems, list_nb_coeff = _linear_systems(input_sig, output_data, N,
+                                             by_order, M, orthogonal_basis,
+                                             phi, system_type)
+
+    results = [_ridge_path(A, y, lambdas, decomposition=decomposition)
+               for A, y in systems]
+
+    # Kernels
+    if by_order:
+        kernels = {n+1: x_path for n, (x_path, _) in enumerate(results)}
+    else:
+        kernels_t = _vec2dict_of_vec(results[0][0].T, list_nb_coeff)
+        kernels = {n: h_t.T for n, h_t in kernels_t.items()}
+
+    # Scores
+    scores = dict()
+    for key in ('residual_norm', 'solution_norm', 'gcv'):
+        scores[key] = np.array([val[key] for _, val in results])
+        if not by_order:
+            scores[key] = scores[key][0]
+    scores['best_lambda'] = lambdas[np.argmin(scores['gcv'], axis=-1)]
+
+    return kernels, scores
+
+
+def cross_validation(input_sig, output_data, N, nb_folds=5, method='direct',
+                     lam=0., db=True, return_kernels=False, M=None,
+                     orthogonal_basis=None, phi=None,
+                     system_type='volterra'):
+    """
+    K-fold cross-validation of the kernel identification.
+
+    Samples are split into `nb_folds` contiguous folds; for each fold,
+    kernels are estimated on all other folds and evaluated on the held-out
+    one. Normal equations of each fold are accumulated once, and the
+    estimation for a given fold is obtained by subtracting the contribution
+    of this fold from the total normal equations, so that the total cost is
+    close to the one of a single identification.
+
+    Parameters
+    ----------
+    input_sig : numpy.ndarray
+        Input signal.
+    output_data : numpy.ndarray
+        Output signal (if `method` is 'direct') or its nonlinear homogeneous
+        orders with shape ``(N, input_sig.shape)`` (if `method` is 'order').
+    N : int
+        Truncation order.
+    nb_folds : int, optional (default=5)
+        Number of folds.
+    method : {'direct', 'order'}, optional (default='direct')
+        Identification method; see :func:`pyvi.identification.direct_method`
+        and :func:`pyvi.identification.order_method`.
+    lam : float, optional (default=0.)
+        Ridge regularization parameter.
+    db : boolean, optional (default=True)
+        Whether errors are given in dB; see
+        :func:`pyvi.utilities.measures.evaluation_error`.
+    return_kernels : boolean, optional (default=False)
+        If True, kernels estimated for each fold are also returned.
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples); can be specified
+        globally for all orders, or separately for each order via a list of
+        different values.
+    orthogonal_basis : (list of) basis object, optional (default=None)
+        Orthogonal basis unto which kernels are projected; can be specified
+        globally for all orders, or separately for each order via a list of
+        different values. See module :mod:`pyvi.utilities.orthogonal_basis`
+        for precisions on what basis object can be.
+    phi : dict(int: numpy.ndarray), optional (default=None)
+        Pre-computed dictionary of the combinatorial matrix for each nonlinear
+        homogeneous order.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system; if set to 'volterra', combinatorial basis
+        contains all possible input products; if set to 'hammerstein',
+        combinatorial basis only contains those corresponding to diagonal
+        kernel values.
+
+    Returns
+    -------
+    errors : numpy.ndarray
+        Evaluation error of the output signal on each held-out fold, as
+        computed by :func:`pyvi.utilities.measures.evaluation_error`.
+    kernels : list(dict(int: numpy.ndarray))
+        List of the kernels (in vector form) estimated for each fold; only
+        returned if `return_kernels` is True.
+    """
+
+    by_order = _is_by_order(method)
+    systems, list_nb_coeff = _linear_systems(input_sig, output_data, N,
+                                             by_order, M, orthogonal_basis,
+                                             phi, system_type)
+    L = systems[0][0].shape[0]
+    if not 2 <= nb_folds <= L:
+        raise ValueError('Number of folds should be between 2 and the ' +
+                         'signal length (got {}).'.format(nb_folds))
+    bounds = np.linspace(0, L, nb_folds+1).astype(int)
+    folds = [slice(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+    # Normal equations of each fold, accumulated once
+    gram_by_fold = []
+    rhs_by_fold = []
+    for A, y in systems:
+        gram_by_fold.append([np.dot(A[fold].T, A[fold]) for fold in folds])
+        rhs_by_fold.append([np.dot(A[fold].T, y[fold]) for fold in folds])
+    gram_total = [sum(val) for val in gram_by_fold]
+    rhs_total = [sum(val) for val in rhs_by_fold]
+
+    # Downdating for each fold
+    errors = np.zeros((nb_folds,))
+    kernels = []
+    for ind, fold in enumerate(folds):
+        output_ref = 0
+        output_est = 0
+        vec_list = []
+        for ind_sys, (A, y) in enumerate(systems):
+            gram = gram_total[ind_sys] - gram_by_fold[ind_sys][ind]
+            rhs = rhs_total[ind_sys] - rhs_by_fold[ind_sys][ind]
+            vec = _normal_equations_solver(gram, rhs, lam)
+            output_ref = output_ref + y[fold]
+            output_est = output_est + np.dot(A[fold], vec)
+            vec_list.append(vec)
+        errors[ind] = evaluation_error(output_ref, output_est, db=db)
+        if by_order:
+            kernels.append({n+1: vec for n, vec in enumerate(vec_list)})
+        else:
+            kernels.append(_vec2dict_of_vec(vec_list[0], list_nb_coeff))
+
+    if return_kernels:
+        return errors, kernels
+    else:
+        return errors
+
+
+def model_order_selection(input_sig, output_data, N_max, M_max=None,
+                          method='direct', criterion='bic',
+                          validation_data=None, orthogonal_basis=None,
+                          phi=None, system_type='volterra'):
+    """
+    Compare all nested models up to a truncation order and memory length.
+
+    The combinatorial basis is computed only once for the largest model; each
+    candidate model ``(N, M)`` corresponds to a subset of its columns (orders
+    up to `N` and delays strictly lower than `M`). Columns are ordered so that
+    those subsets are nested, and a single QR decomposition of the augmented
+    matrix (equivalent to growing the QR factor column by column) gives the
+    residual and estimation of every candidate model.
+
+    Parameters
+    ----------
+    input_sig : numpy.ndarray
+        Input signal.
+    output_data : numpy.ndarray
+        Output signal (if `method` is 'direct') or its nonlinear homogeneous
+        orders with shape ``(N_max, input_sig.shape)`` (if `method` is
+        'order').
+    N_max : int
+        Largest truncation order.
+    M_max : int, optional (default=None)
+        Largest memory length (in samples).
+    method : {'direct', 'order'}, optional (default='direct')
+        Identification method; see :func:`pyvi.identification.direct_method`
+        and :func:`pyvi.identification.order_method`; if 'order', the memory
+        length is selected separately for each order.
+    criterion : {'aic', 'bic', 'validation'}, optional (default='bic')
+        Criterion used to compare models; if 'aic' or 'bic', the Akaike or
+        Bayesian information criterion is computed from the residual; if
+        'validation', the evaluation error (in dB) on `validation_data` is
+        used (see :func:`pyvi.utilities.measures.evaluation_error`).
+    validation_data : (numpy.ndarray, numpy.ndarray), optional (default=None)
+        Input and output data used for validation; only used if `criterion`
+        is 'validation'.
+    orthogonal_basis : basis object, optional (default=None)
+        Orthogonal basis unto which kernels are projected; in that case, the
+        number of elements of the basis is used in place of the memory length.
+        See module :mod:`pyvi.utilities.orthogonal_basis` for precisions on
+        what basis object can be.
+    phi : dict(int: numpy.ndarray), optional (default=None)
+        Pre-computed dictionary of the combinatorial matrix for each nonlinear
+        homogeneous order of the largest model.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system; if set to 'volterra', combinatorial basis
+        contains all possible input products; if set to 'hammerstein',
+        combinatorial basis only contains those corresponding to diagonal
+        kernel values.
+
+    Returns
+    -------
+    table : numpy.ndarray
+        Table of the criterion, with shape ``(N_max, M_max)``; if `method` is
+        'direct', ``table[N-1, M-1]`` is the criterion of the model of
+        truncation order `N` and memory length `M`; if `method` is 'order',
+        ``table[n-1, M-1]`` is the criterion of the kernel of order `n` with
+        memory length `M`.
+    best : (int, int) or list(int)
+        Truncation order and memory length of the best model (if `method` is
+        'direct'), or best memory length of each order (if `method` is
+        'order').
+    """
+
+    if criterion not in _STRING_CRITERIA:
+        message = "Unknown criterion {}; available criteria are 'aic', " + \
+                  "'bic' or 'validation'."
+        raise ValueError(message.format(criterion))
+    if criterion == 'validation' and validation_data is None:
+        raise ValueError("Parameter `validation_data` must be given when " +
+                         "criterion is 'validation'.")
+    if orthogonal_basis is not None and M_max is not None:
+        M_max = None
+    if orthogonal_basis is not None:
+        nb_element = orthogonal_basis.K
+    else:
+        nb_element = M_max
+
+    by_order = _is_by_order(method)
+    phi, _ = _checked_basis(input_sig, N_max, by_order, M_max,
+                            orthogonal_basis, phi, system_type)
+    if criterion == 'validation':
+        phi_val, _ = _checked_basis(validation_data[0], N_max, by_order,
+                                    M_max, orthogonal_basis, None,
+                                    system_type)
+    max_index = _compute_column_max_index(N_max, nb_element, system_type)
+
+    # Nested column subsets
+    if by_order:
+        chains = [([n], (n-1,)) for n in range(1, N_max+1)]
+    else:
+        chains = [(list(range(1, N+1)), (N-1,)) for N in range(1, N_max+1)]
+
+    table = np.zeros((N_max, nb_element))
+    for orders, ind_row in chains:
+        keys = np.concatenate([max_index[n] for n in orders])
+        perm = np.argsort(keys, kind='mergesort')
+        A = np.concatenate([phi[n] for n in orders], axis=1)[:, perm]
+        y = output_data[orders[0]-1] if by_order else output_data
+        prefix_lengths = [int(np.sum(keys < M))
+                          for M in range(1, nb_element+1)]
+
+        r_aug = np.linalg.qr(np.concatenate((A, np.reshape(y, (-1, 1))),
+                                            axis=1), mode='r')
+        if criterion == 'validation':
+            A_val = np.concatenate([phi_val[n] for n in orders],
+                                   axis=1)[:, perm]
+            y_val = validation_data[1]
+            y_val = y_val[orders[0]-1] if by_order else y_val
+            table[ind_row] = _nested_validation_errors(r_aug, prefix_lengths,
+                                                       A_val, y_val)
+        else:
+            table[ind_row] = _nested_information_criteria(
+                r_aug, prefix_lengths, A.shape[0], criterion)
+
+    # Best model
+    if by_order:
+        best = [int(ind) + 1 for ind in np.argmin(table, axis=1)]
+    else:
+        ind_N, ind_M = np.unravel_index(np.argmin(table), table.shape)
+        best = (int(ind_N) + 1, int(ind_M) + 1)
+
+    return table, best
+
+
+def _compute_column_max_index(N, nb_element, system_type):
+    """Compute the largest delay (or basis index) used in each column."""
+
+    max_index = dict()
+    for n in range(1, N+1):
+        if system_type in _STRING_VOLTERRA:
+            iter_obj = itr.combinations_with_replacement(range(nb_element), n)
+            max_index[n] = np.array([idx[-1] for idx in iter_obj], dtype=int)
+        else:
+            max_index[n] = np.arange(nb_element)
+    return max_index
+
+
+def _nested_residual_norms(r_aug, prefix_lengths):
+    """Residual norms of the least-squares fits on nested column subsets."""
+
+    P = r_aug.shape[1] - 1
+    z2 = np.abs(r_aug[:, P])**2
+    z2 = np.concatenate((z2, np.zeros((P+1-z2.shape[0],))))
+    tail = np.cumsum(z2[::-1])[::-1]
+    return np.sqrt(np.array([tail[k] for k in prefix_lengths]))
+
+
+def _nested_information_criteria(r_aug, prefix_lengths, L, criterion):
+    """Information criteria of the least-squares fits on nested subsets."""
+
+    residual_norms = _nested_residual_norms(r_aug, prefix_lengths)
+    nb_param = np.array(prefix_lengths)
+    with np.errstate(divide='ignore'):
+        log_likelihood = L * np.log(residual_norms**2 / L)
+    if criterion == 'aic':
+        return log_likelihood + 2 * nb_param
+    else:
+        return log_likelihood + np.log(L) * nb_param
+
+
+def _nested_validation_errors(r_aug, prefix_lengths, A_val, y_val):
+    """Validation errors of the least-squares fits on nested subsets."""
+
+    P = r_aug.shape[1] - 1
+    errors = np.zeros((len(prefix_lengths),))
+    for ind, k in enumerate(prefix_lengths):
+        x = sc_lin.solve_triangular(r_aug[:k, :k], r_aug[:k, P]) if k else \
+            np.zeros((0,))
+        errors[ind] = evaluation_error(y_val, np.dot(A_val[:, :k], x))
+    return errors
+
+
+def _normal_equations_solver(gram, rhs, lam=0.):
+    """Solve the (regularized) normal equations of a linear system."""
+
+    if not gram.size:
+        return np.zeros((0,))
+    gram = gram + lam * np.eye(gram.shape[0])
+    return sc_lin.solve(gram, rhs, assume_a='pos')
+
+
+def _linear_systems(input_sig, output_data, N, by_order, M, orthogonal_basis,
+                    phi, system_type):
+    """Create the linear system(s) of the direct or order method."""
+
+    phi, list_nb_coeff = _checked_basis(input_sig, N, by_order, M,
+                                        orthogonal_basis, phi, system_type)
+
+    if by_order:
+        systems = [(phi[n], output_data[n-1]) for n in range(1, N+1)]
+    else:
+        mat = np.concatenate([val for n, val in sorted(phi.items())], axis=1)
+        systems = [(mat, output_data)]
+
+    return systems, list_nb_coeff
+
+
+def _checked_basis(input_sig, N, by_order, M, orthogonal_basis, phi,
+                   system_type):
+    """Check the number of data and compute the combinatorial basis."""
+
+    _M, is_orthogonal_basis_as_list = _check_parameters(N, system_type, M,
+                                                        orthogonal_basis)
+    list_nb_coeff = _compute_list_nb_coeff(N, system_type, _M,
+                                           orthogonal_basis,
+                                           is_orthogonal_basis_as_list)
+
+    # Check that there is enough data to do the identification
+    nb_data = input_sig.size
+    required_nb_data = _required_nb_data(list_nb_coeff, by_order)
+    if nb_data < required_nb_data:
+        raise ValueError('Input signal has {} data samples'.format(nb_data) +
+                         ', it should have at least ' +
+                         '{}.'.format(required_nb_data))
+
+    if phi is None:
+        phi = compute_combinatorial_basis(input_sig, N, M=_M,
+                                          orthogonal_basis=orthogonal_basis,
+                                          system_type=system_type)
+
+    return phi, list_nb_coeff
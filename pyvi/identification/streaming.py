@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+"""
+Module for kernel identification from signals streamed by chunks.
+
+Signals are never loaded as a whole: they are read by chunks (from arrays,
+memory-mapped files or any iterator of aligned chunks), the combinatorial
+basis is computed on each chunk (using the last samples of the previous
+chunk as history) and the corresponding rows are folded into the R factor
+of the linear system, whose size does not depend on the signal length.
+
+Functions
+---------
+stream_identification :
+    Kernel identification from signals streamed by chunks.
+multi_record_identification :
+    Kernel identification from several independent recordings.
+progressive_identification :
+    Kernel identification stopped as soon as the estimation has converged.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['stream_identification', 'multi_record_identification',
+           'progressive_identification']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import os
+import warnings
+import numpy as np
+from .tools import (_RFactorAccumulator, _nb_workers, _map, _is_by_order,
+                    _required_nb_data)
+from .methods import _format_kernels, _check_out_form
+from ..volterra.combinatorial_basis import (compute_combinatorial_basis,
+                                            _check_parameters,
+                                            _compute_list_nb_coeff)
+from ..volterra.tools import _vec2dict_of_vec
+from ..utilities.tools import _as_list
+from ..utilities.orthogonal_basis import _ProjectionStream
+
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+_STRING_CRITERIA = {'kernels', 'residual'}
+
+
+#==============================================================================
+# Class
+#==============================================================================
+
+class _BasisStream():
+    """
+    Combinatorial basis of a signal given by successive chunks.
+
+    The last samples of the previous chunk (or the states of the basis
+    filters for projected kernels) are kept as history, so that the rows
+    computed for each chunk are exactly those of the combinatorial basis of
+    the whole signal.
+
+    Parameters
+    ----------
+    N : int
+        Truncation order.
+    M : int or list(int)
+        Memory length for each kernels (in samples); must be None if
+        `orthogonal_basis` is given.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system.
+    orthogonal_basis : (list of) basis object, optional (default=None)
+        Orthogonal basis unto which kernels are projected; only instances of
+        :class:`pyvi.utilities.orthogonal_basis.LaguerreBasis`, `KautzBasis`
+        or `GeneralizedBasis` are accepted.
+
+    Methods
+    -------
+    __call__(input_chunk)
+        Return the combinatorial basis (by order) of the next chunk.
+    """
+
+    def __init__(self, N, M, system_type='volterra', orthogonal_basis=None):
+        self.N = N
+        self.M = M
+        self.system_type = system_type
+        if orthogonal_basis is None:
+            self._projections = None
+            self._len_history = max(max(_as_list(M, N)), 1) - 1
+        elif isinstance(orthogonal_basis, (list, tuple)):
+            self._projections = [_ProjectionStream(basis)
+                                 for basis in orthogonal_basis]
+        else:
+            self._projections = _ProjectionStream(orthogonal_basis)
+        self._history = None
+
+    def __call__(self, input_chunk):
+        """Return the combinatorial basis (by order) of the next chunk."""
+
+        input_chunk = np.asarray(input_chunk)
+        if self._projections is not None:
+            for projection in _as_list(self._projections, self.N):
+                projection.next_chunk()
+            return compute_combinatorial_basis(
+                input_chunk, self.N, system_type=self.system_type,
+                orthogonal_basis=self._projections)
+
+        if self._history is None:
+            self._history = np.zeros((self._len_history,),
+                                     dtype=input_chunk.dtype)
+
+        signal = np.concatenate((self._history, input_chunk))
+        phi = compute_combinatorial_basis(signal, self.N, M=self.M,
+                                          system_type=self.system_type)
+        for n in phi.keys():
+            phi[n] = phi[n][self._len_history:]
+        self._history = signal[signal.shape[0]-self._len_history:]
+        return phi
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def stream_identification(input_data, output_data, N, M, method='direct',
+                          chunk_size=16384, out_form='vec',
+                          system_type='volterra'):
+    """
+    Kernel identification from signals streamed by chunks.
+
+    Parameters
+    ----------
+    input_data : numpy.ndarray, str or iterable
+        Input signal, given either as an array (possibly a `numpy.memmap` for
+        raw binary recordings), as the path to a `.npy` file (which is then
+        memory-mapped), or, if `output_data` is None, as an iterable of
+        aligned ``(input_chunk, output_chunk)`` pairs.
+    output_data : numpy.ndarray, str or None
+        Output signal (if `method` is 'direct') or nonlinear homogeneous
+        orders of the output signal with shape ``(N, L)`` (if `method` is
+        'order'); same possible types as `input_data`; should be None if
+        `input_data` is an iterable of chunks.
+    N : int
+        Truncation order.
+    M : int or list(int)
+        Memory length for each kernels (in samples).
+    method : {'direct', 'order'}, optional (default='direct')
+        Identification method; see :func:`pyvi.identification.direct_method`
+        and :func:`pyvi.identification.order_method`.
+    chunk_size : int, optional (default=16384)
+        Number of samples read at each step; only used if signals are given
+        as arrays or files.
+    out_form : {'tri', 'sym', 'vec'}, optional (default='vec')
+        Form to assume for the kernel; if None, no specific form is assumed.
+        See module :mod:`pyvi.volterra.tools` for more precisions.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system; if set to 'volterra', combinatorial basis
+        contains all possible input products; if set to 'hammerstein',
+        combinatorial basis only contains those corresponding to diagonal
+        kernel values.
+
+    Returns
+    -------
+    dict(int: numpy.ndarray)
+        Dictionary of estimated kernels, where each key is the nonlinear order.
+    """
+
+    _M, _ = _check_parameters(N, system_type, M, None)
+    list_nb_coeff = _compute_list_nb_coeff(N, system_type, _M, None, None)
+    out_form = _check_out_form(out_form, system_type)
+    by_order = _is_by_order(method)
+
+    accumulators = _create_accumulators(list_nb_coeff, by_order)
+    chunks = _iter_chunks(input_data, output_data, chunk_size)
+    for phi, out_chunk in _stream_basis(chunks, N, _M, system_type):
+        _update_accumulators(accumulators, phi, out_chunk, by_order)
+
+    # Check that there was enough data to do the identification
+    nb_data = _nb_accumulated_rows(accumulators)
+    required_nb_data = _required_nb_data(list_nb_coeff, by_order)
+    if nb_data < required_nb_data:
+        raise ValueError('Input signal has {} data samples'.format(nb_data) +
+                         ', it should have at least ' +
+                         '{}.'.format(required_nb_data))
+
+    kernels_vec = _solve_accumulators(accumulators, list_nb_coeff, by_order)
+    return _format_kernels(kernels_vec, N, _M, None, None, out_form)
+
+
+def multi_record_identification(records, N, M, method='direct', n_jobs=None,
+                                chunk_size=16384, out_form='vec',
+                                system_type='volterra'):
+    """
+    Kernel identification from several independent recordings.
+
+    Each recording is processed separately (its combinatorial basis starts
+    with a null history, so that no product mixes samples from different
+    recordings), possibly in worker processes; the R factors of all
+    recordings are then merged exactly, giving the same estimation as the
+    least-squares solution of the stacked linear systems.
+
+    Parameters
+    ----------
+    records : list((array_like or str, array_like or str))
+        List of ``(input_data, output_data)`` pairs, with the same
+        conventions as in :func:`stream_identification`; if worker processes
+        are used, both signals of each recording should be given as paths to
+        `.npy` files, which are memory-mapped by the workers (so that
+        recordings are neither copied into each worker nor loaded as a
+        whole).
+    N : int
+        Truncation order.
+    M : int or list(int)
+        Memory length for each kernels (in samples).
+    method : {'direct', 'order'}, optional (default='direct')
+        Identification method; see :func:`pyvi.identification.direct_method`
+        and :func:`pyvi.identification.order_method`.
+    n_jobs : int, optional (default=None)
+        Number of worker processes; if None or 1, everything is computed in
+        the current process; if -1, all available cores are used. Worker
+        processes are only used if there are several recordings, in which
+        case they should be given as paths.
+    chunk_size : int, optional (default=16384)
+        Number of samples read at each step in each recording.
+    out_form : {'tri', 'sym', 'vec'}, optional (default='vec')
+        Form to assume for the kernel; if None, no specific form is assumed.
+        See module :mod:`pyvi.volterra.tools` for more precisions.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system; if set to 'volterra', combinatorial basis
+        contains all possible input products; if set to 'hammerstein',
+        combinatorial basis only contains those corresponding to diagonal
+        kernel values.
+
+    Returns
+    -------
+    dict(int: numpy.ndarray)
+        Dictionary of estimated kernels, where each key is the nonlinear order.
+    """
+
+    _M, _ = _check_parameters(N, system_type, M, None)
+    list_nb_coeff = _compute_list_nb_coeff(N, system_type, _M, None, None)
+    out_form = _check_out_form(out_form, system_type)
+    by_order = _is_by_order(method)
+
+    # Map: sufficient statistics of each recording
+    tasks = [(input_data, output_data, N, _M, system_type, list_nb_coeff,
+              by_order, chunk_size) for input_data, output_data in records]
+    nb_workers = min(_nb_workers(n_jobs), max(len(tasks), 1))
+    are_paths = [_is_path(input_data) and _is_path(output_data)
+                 for input_data, output_data in records]
+    if nb_workers > 1 and not all(are_paths):
+        raise ValueError('Records should be given as paths to `.npy` files ' +
+                         'when worker processes are used (n_jobs > 1); ' +
+                         'arrays and iterators of chunks are only accepted ' +
+                         'with n_jobs=None.')
+    list_accumulators = _map(_record_accumulators, tasks, nb_workers)
+
+    # Reduce: exact merge of R factors
+    accumulators = _create_accumulators(list_nb_coeff, by_order)
+    for record_accumulators in list_accumulators:
+        for key, acc in record_accumulators.items():
+            accumulators[key].merge(acc)
+
+    # Check that there was enough data to do the identification
+    nb_data = _nb_accumulated_rows(accumulators)
+    required_nb_data = _required_nb_data(list_nb_coeff, by_order)
+    if nb_data < required_nb_data:
+        raise ValueError('Records have {} data samples'.format(nb_data) +
+                         ' in total, they should have at least ' +
+                         '{}.'.format(required_nb_data))
+
+    kernels_vec = _solve_accumulators(accumulators, list_nb_coeff, by_order)
+    return _format_kernels(kernels_vec, N, _M, None, None, out_form)
+
+
+def progressive_identification(input_data, output_data, N, M,
+                               method='direct', chunk_size=4096, growth=2.,
+                               tol=1e-3, criterion='kernels', patience=1,
+                               out_form='vec', system_type='volterra'):
+    """
+    Kernel identification stopped as soon as the estimation has converged.
+
+    Signals are consumed by chunks of growing size; after each chunk, the
+    kernels are re-estimated from the accumulated R factors (which does not
+    depend on the number of samples already used), and the identification
+    stops once the change of the estimation between two consecutive steps is
+    lower than `tol` for `patience` consecutive steps. The number of
+    samples actually used can then serve to shorten future excitation
+    signals.
+
+    Parameters
+    ----------
+    input_data : numpy.ndarray, str or iterable
+        Input signal; see :func:`stream_identification`.
+    output_data : numpy.ndarray, str or None
+        Output signal or nonlinear homogeneous orders of the output signal;
+        see :func:`stream_identification`.
+    N : int
+        Truncation order.
+    M : int or list(int)
+        Memory length for each kernels (in samples).
+    method : {'direct', 'order'}, optional (default='direct')
+        Identification method; see :func:`pyvi.identification.direct_method`
+        and :func:`pyvi.identification.order_method`.
+    chunk_size : int, optional (default=4096)
+        Number of samples of the first chunk; only used if signals are given
+        as arrays or files.
+    growth : float, optional (default=2.)
+        Ratio between the sizes of two consecutive chunks; if set to 1, all
+        chunks have the same size. Using geometrically growing chunks keeps
+        the relative change between two steps meaningful, since each step
+        adds a fixed proportion of the data already used.
+    tol : float, optional (default=1e-3)
+        Tolerance on the change between two consecutive steps.
+    criterion : {'kernels', 'residual'}, optional (default='kernels')
+        Monitored change; if set to 'kernels', it is the norm of the change of
+        the kernels vector relative to its norm; if set to 'residual', it is
+        the change of the relative residual error (RMS value of the residual
+        divided by the RMS value of the output).
+    patience : int, optional (default=1)
+        Number of consecutive steps for which the change should be lower than
+        `tol` before stopping.
+    out_form : {'tri', 'sym', 'vec'}, optional (default='vec')
+        Form to assume for the kernel; if None, no specific form is assumed.
+        See module :mod:`pyvi.volterra.tools` for more precisions.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system; if set to 'volterra', combinatorial basis
+        contains all possible input products; if set to 'hammerstein',
+        combinatorial basis only contains those corresponding to diagonal
+        kernel values.
+
+    Returns
+    -------
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of estimated kernels, where each key is the nonlinear order.
+    nb_samples : int
+        Number of samples used for the estimation; if the estimation has not
+        converged (in which case a warning is issued), this is the length of
+        the signals.
+    """
+
+    if criterion not in _STRING_CRITERIA:
+        raise ValueError("Unknown criterion '{}'; ".format(criterion) +
+                         "available criteria are 'kernels' and 'residual'.")
+
+    _M, _ = _check_parameters(N, system_type, M, None)
+    list_nb_coeff = _compute_list_nb_coeff(N, system_type, _M, None, None)
+    out_form = _check_out_form(out_form, system_type)
+    by_order = _is_by_order(method)
+    required_nb_data = _required_nb_data(list_nb_coeff, by_order)
+
+    accumulators = _create_accumulators(list_nb_coeff, by_order)
+    chunks = _iter_chunks(input_data, output_data, chunk_size, growth=growth)
+    previous = None
+    nb_steps_converged = 0
+    for phi, out_chunk in _stream_basis(chunks, N, _M, system_type):
+        _update_accumulators(accumulators, phi, out_chunk, by_order)
+        nb_data = _nb_accumulated_rows(accumulators)
+        if nb_data < required_nb_data:
+            continue
+
+        kernels_vec = _solve_accumulators(accumulators, list_nb_coeff,
+                                          by_order)
+        if criterion == 'kernels':
+            current = np.concatenate([h for n, h in
+                                      sorted(kernels_vec.items())])
+            scale = np.linalg.norm(current)
+        else:
+            current = _relative_residual(accumulators)
+            scale = 1.
+        if previous is not None:
+            if np.linalg.norm(current - previous) <= tol * scale:
+                nb_steps_converged += 1
+            else:
+                nb_steps_converged = 0
+            if nb_steps_converged >= patience:
+                return _format_kernels(kernels_vec, N, _M, None, None,
+                                       out_form), nb_data
+        previous = current
+
+    # Check that there was enough data to do the identification
+    nb_data = _nb_accumulated_rows(accumulators)
+    if nb_data < required_nb_data:
+        raise ValueError('Input signal has {} data samples'.format(nb_data) +
+                         ', it should have at least ' +
+                         '{}.'.format(required_nb_data))
+
+    warnings.warn('Identification has not converged with the available ' +
+                  'data ({} samples).'.format(nb_data), UserWarning)
+    kernels_vec = _solve_accumulators(accumulators, list_nb_coeff, by_order)
+    return _format_kernels(kernels_vec, N, _M, None, None, out_form), nb_data
+
+
+def _record_accumulators(task):
+    """Compute the R factor accumulators of one recording."""
+
+    (input_data, output_data, N, M, system_type, list_nb_coeff, by_order,
+     chunk_size) = task
+    accumulators = _create_accumulators(list_nb_coeff, by_order)
+    chunks = _iter_chunks(input_data, output_data, chunk_size)
+    for phi, out_chunk in _stream_basis(chunks, N, M, system_type):
+        _update_accumulators(accumulators, phi, out_chunk, by_order)
+    return accumulators
+
+
+def _is_path(data):
+    """Check if a signal is given as a path to a file."""
+
+    return isinstance(data, (str, os.PathLike))
+
+
+def _open_signal(data):
+    """Memory-map signals given as a path to a `.npy` file."""
+
+    if _is_path(data):
+        return np.load(data, mmap_mode='r')
+    else:
+        return data
+
+
+def _iter_chunks(input_data, output_data, chunk_size, growth=1.):
+    """Iterate over aligned chunks (of growing size) of input and output."""
+
+    if output_data is None:
+        for input_chunk, output_chunk in input_data:
+            yield input_chunk, output_chunk
+    else:
+        input_sig = _open_signal(input_data)
+        output_sig = _open_signal(output_data)
+        if input_sig.shape[0] != output_sig.shape[-1]:
+            raise ValueError('Input and output signals have different ' +
+                             'lengths ({} and '.format(input_sig.shape[0]) +
+                             '{}).'.format(output_sig.shape[-1]))
+        ind = 0
+        size = chunk_size
+        while ind < input_sig.shape[0]:
+            step = max(int(round(size)), 1)
+            yield (input_sig[ind:ind+step], output_sig[..., ind:ind+step])
+            ind += step
+            size *= growth
+
+
+def _stream_basis(chunks, N, M, system_type):
+    """Compute the combinatorial basis (by order) of each chunk."""
+
+    basis_stream = _BasisStream(N, M, system_type)
+
+    for input_chunk, output_chunk in chunks:
+        input_chunk = np.asarray(input_chunk)
+        output_chunk = np.asarray(output_chunk)
+        if input_chunk.shape[0] != output_chunk.shape[-1]:
+            raise ValueError('Input and output chunks are not aligned ' +
+                             '(they have lengths ' +
+                             '{} and '.format(input_chunk.shape[0]) +
+                             '{}).'.format(output_chunk.shape[-1]))
+        if not input_chunk.shape[0]:
+            continue
+        yield basis_stream(input_chunk), output_chunk
+
+
+def _create_accumulators(list_nb_coeff, by_order):
+    """Create R factor accumulators for the linear system(s)."""
+
+    if by_order:
+        return {n+1: _RFactorAccumulator(nb_coeff)
+                for n, nb_coeff in enumerate(list_nb_coeff)}
+    else:
+        return {None: _RFactorAccumulator(sum(list_nb_coeff))}
+
+
+def _update_accumulators(accumulators, phi_by_order, out_chunk, by_order):
+    """Add the rows corresponding to a chunk to the linear system(s)."""
+
+    if by_order:
+        for n, phi in phi_by_order.items():
+            accumulators[n].update(phi, out_chunk[n-1])
+    else:
+        mat = np.concatenate([val for n, val in sorted(phi_by_order.items())],
+                             axis=1)
+        accumulators[None].update(mat, out_chunk)
+
+
+def _relative_residual(accumulators):
+    """Return the relative residual error of the accumulated system(s)."""
+
+    residual_energy = sum(acc.residual_norm()**2
+                          for acc in accumulators.values())
+    output_energy = sum(acc.output_norm()**2 for acc in accumulators.values())
+    return np.sqrt(residual_energy / (output_energy or 1.))
+
+
+def _nb_accumulated_rows(accumulators):
+    """Return the number of rows accumulated in the linear system(s)."""
+
+    return min(acc.nb_rows for acc in accumulators.values())
+
+
+def _solve_accumulators(accumulators, list_nb_coeff, by_order):
+    """Solve the accumulated linear system(s)."""
+
+    if by_order:
+        return {n: acc.solve() for n, acc in accumulators.items()}
+    else:
+        return _vec2dict_of_vec(accumulators[None].solve(), list_nb_coeff)
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Module for Monte Carlo studies of separation and identification methods.
+
+Randomized trials are run for all points of a grid of parameters, possibly
+in a pool of worker processes. The input signal common to all trials is put
+in shared memory, each trial uses its own random generator (seeded from its
+position in the study, so that results do not depend on the number of
+workers nor on the order of execution), and measures are aggregated in
+arrays as soon as each trial is finished; partial results can be saved in a
+checkpoint file, from which an interrupted study is resumed.
+
+Functions
+---------
+monte_carlo :
+    Runs randomized trials for all points of a grid of parameters.
+separation_trial :
+    Trial of order separation followed by kernel identification.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['monte_carlo', 'separation_trial']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import os
+import itertools as itr
+import multiprocessing as mp
+import numpy as np
+from .methods import order_method
+from .tools import _nb_workers
+from ..separation.methods import AS, PS, PAS
+from ..volterra.simulation import compute_output
+from ..volterra.tools import series_nb_coeff
+from ..utilities.measures import separation_error, identification_error
+from ..utilities.mathbox import rms
+
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+_SEPARATION_METHODS = {'AS': AS, 'PS': PS, 'PAS': PAS}
+_TRIAL_PARAMETERS = {'N', 'M', 'method', 'noise_level'}
+
+# State of the worker processes (input signal and trial function)
+_worker = dict()
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def monte_carlo(param_grid, nb_trials, input_sig, trial=None, seed=0,
+                n_jobs=None, checkpoint=None, checkpoint_every=100):
+    """
+    Runs randomized trials for all points of a grid of parameters.
+
+    Parameters
+    ----------
+    param_grid : dict(str: list)
+        Values of each parameter; trials are run for all combinations of
+        values (the last parameter varying fastest).
+    nb_trials : int
+        Number of trials for each point of the grid.
+    input_sig : array_like
+        Input signal used by all trials; it is put in shared memory, so that
+        it is not copied for each trial.
+    trial : callable, optional (default=None)
+        Function ``trial(params, input_sig, rng)`` returning a dictionary of
+        measures (floats or arrays), where `params` is the
+        dictionary of parameter values of a grid point and `rng` is a
+        :class:`numpy.random.RandomState`; should be defined at module level
+        if `n_jobs` is used. If None, :func:`separation_trial` is used.
+    seed : int, optional (default=0)
+        Seed of the study; the random generator of trial i of grid point p
+        is seeded by ``[seed, p, i]``.
+    n_jobs : int, optional (default=None)
+        Number of worker processes; if None or 1, everything is computed in
+        the current process; if -1, all available cores are used.
+    checkpoint : str, optional (default=None)
+        Path of a ``.npz`` file where partial results are saved; if it
+        exists, trials already computed are loaded from it instead of being
+        run again.
+    checkpoint_every : int, optional (default=100)
+        Number of finished trials between two saves of the checkpoint; it is
+        also saved at the end of the study, or when it is interrupted.
+
+    Returns
+    -------
+    points : list(dict(str: object))
+        Parameter values of each point of the grid.
+    results : dict(str: numpy.ndarray)
+        Dictionary of measures, each of shape ``(len(points), nb_trials)``
+        followed by the shape of the measure; measures whose shape depends on
+        the parameters (e.g. one value per order) are padded with NaN, as are
+        trials not run.
+    """
+
+    trial = separation_trial if trial is None else trial
+    keys = list(param_grid.keys())
+    points = [dict(zip(keys, values))
+              for values in itr.product(*[param_grid[key] for key in keys])]
+    study = repr((points, nb_trials, seed))
+
+    done = np.zeros((len(points), nb_trials), dtype=bool)
+    results = dict()
+    if checkpoint is not None and os.path.exists(checkpoint):
+        done, results = _load_checkpoint(checkpoint, study)
+
+    tasks = [(ind_point, ind_trial, params, seed)
+             for ind_point, params in enumerate(points)
+             for ind_trial in range(nb_trials)
+             if not done[ind_point, ind_trial]]
+    if not tasks:
+        return points, results
+
+    input_sig = np.asarray(input_sig)
+    buffer = mp.RawArray('b', max(input_sig.nbytes, 1))
+    np.frombuffer(buffer, dtype=input_sig.dtype,
+                  count=input_sig.size)[:] = input_sig.ravel()
+    initargs = (buffer, input_sig.dtype.str, input_sig.shape, trial)
+    nb_workers = min(_nb_workers(n_jobs), len(tasks))
+
+    nb_finished = 0
+    try:
+        for ind_point, ind_trial, measures in \
+                _run_trials(tasks, initargs, nb_workers):
+            _store_measures(results, measures, ind_point, ind_trial,
+                            done.shape)
+            done[ind_point, ind_trial] = True
+            nb_finished += 1
+            if checkpoint is not None and not nb_finished % checkpoint_every:
+                _save_checkpoint(checkpoint, study, done, results)
+    finally:
+        if checkpoint is not None and nb_finished:
+            _save_checkpoint(checkpoint, study, done, results)
+
+    return points, results
+
+
+def separation_trial(params, input_sig, rng):
+    """
+    Trial of order separation followed by kernel identification.
+
+    Random kernels (with coefficients uniformly drawn in [-1, 1]) are
+    generated; the test signals of the separation method are created from
+    the input signal and simulated, white Gaussian noise is added, the
+    estimated homogeneous orders are used for identification by
+    :func:`pyvi.identification.order_method`, and both separation and
+    identification errors are measured.
+
+    Parameters
+    ----------
+    params : dict(str: object)
+        Parameters of the trial, with keys 'N' (truncation order), 'M'
+        (memory length), and optionally 'method' (separation method among
+        'AS', 'PS' or 'PAS'; default is 'PS') and 'noise_level' (standard
+        deviation of the noise, relative to the RMS value of the outputs;
+        default is 0); other parameters (e.g. 'gain' or 'nb_phase') are given
+        to the separation method.
+    input_sig : numpy.ndarray
+        Real-valued input signal.
+    rng : numpy.random.RandomState
+        Random generator of the trial.
+
+    Returns
+    -------
+    dict(str: numpy.ndarray)
+        Dictionary with keys 'separation_error' and 'identification_error'
+        (in dB), each one being a vector of length N.
+    """
+
+    N = params['N']
+    M = params['M']
+    method = params.get('method', 'PS')
+    if method not in _SEPARATION_METHODS:
+        message = "Unknown separation method {}; available methods are " + \
+                  "'AS', 'PS' or 'PAS'."
+        raise ValueError(message.format(method))
+    method_kwargs = {key: val for key, val in params.items()
+                     if key not in _TRIAL_PARAMETERS}
+    sep_method = _SEPARATION_METHODS[method](N, **method_kwargs)
+
+    list_nb_coeff = series_nb_coeff(N, M, form='vec', out_by_order=True)
+    kernels = {n+1: rng.uniform(low=-1., high=1., size=nb_coeff)
+               for n, nb_coeff in enumerate(list_nb_coeff)}
+
+    input_coll = sep_method.gen_inputs(input_sig)
+    output_coll = compute_output(input_coll, kernels, M=M)
+    noise_level = params.get('noise_level', 0.)
+    if noise_level:
+        output_coll += noise_level * rms(output_coll) * \
+            rng.normal(size=output_coll.shape)
+    output_by_order_est = sep_method.process_outputs(output_coll)
+    kernels_est = order_method(input_sig, output_by_order_est, N, M=M)
+
+    output_by_order = compute_output(input_sig, kernels, M=M, by_order=True)
+    return {'separation_error': separation_error(output_by_order,
+                                                 output_by_order_est),
+            'identification_error': np.array(identification_error(
+                kernels, kernels_est))}
+
+
+def _init_worker(buffer, dtype, shape, trial):
+    """Set the input signal (from shared memory) and trial of a worker."""
+
+    size = int(np.prod(shape))
+    _worker['input_sig'] = np.frombuffer(buffer, dtype=dtype,
+                                         count=size).reshape(shape)
+    _worker['trial'] = trial
+
+
+def _run_trial(task):
+    """Run one trial in a worker."""
+
+    ind_point, ind_trial, params, seed = task
+    rng = np.random.RandomState([seed, ind_point, ind_trial])
+    measures = _worker['trial'](params, _worker['input_sig'], rng)
+    return ind_point, ind_trial, measures
+
+
+def _run_trials(tasks, initargs, nb_workers):
+    """Yield results of trials as soon as they are finished."""
+
+    if nb_workers > 1:
+        with mp.Pool(nb_workers, initializer=_init_worker,
+                     initargs=initargs) as pool:
+            for result in pool.imap_unordered(_run_trial, tasks):
+                yield result
+    else:
+        _init_worker(*initargs)
+        try:
+            for task in tasks:
+                yield _run_trial(task)
+        finally:
+            _worker.clear()
+
+
+def _store_measures(results, measures, ind_point, ind_trial, shape):
+    """Store the measures of a trial, allocating results if needed."""
+
+    for name, value in measures.items():
+        value = np.asarray(value)
+        if name not in results:
+            results[name] = np.full(shape + value.shape, np.nan,
+                                    dtype=np.result_type(value, float))
+        stored = results[name]
+        if value.ndim != stored.ndim - 2:
+            raise ValueError("Measure '{}' has {} ".format(name, value.ndim) +
+                             "dimensions instead of " +
+                             "{}.".format(stored.ndim - 2))
+        if any(dim > dim_stored for dim, dim_stored
+               in zip(value.shape, stored.shape[2:])):
+            new_shape = np.maximum(value.shape, stored.shape[2:])
+            results[name] = np.full(shape + tuple(new_shape), np.nan,
+                                    dtype=stored.dtype)
+            results[name][(Ellipsis,) + tuple(slice(dim) for dim
+                                              in stored.shape[2:])] = stored
+        index = (ind_point, ind_trial) + tuple(slice(dim)
+                                               for dim in value.shape)
+        results[name][index] = value
+
+
+def _save_checkpoint(path, study, done, results):
+    """Save partial results of a study (replacing the file atomically)."""
+
+    tmp_path = path + '.tmp.npz'
+    arrays = {'measure_' + name: val for name, val in results.items()}
+    np.savez(tmp_path, study=np.array(study), done=done, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _load_checkpoint(path, study):
+    """Load partial results of a study."""
+
+    with np.load(path) as data:
+        if str(data['study']) != study:
+            raise ValueError("Checkpoint file '{}' was ".format(path) +
+                             "created for another study (different grid, " +
+                             "number of trials or seed).")
+        done = data['done'].copy()
+        results = {name[len('measure_'):]: data[name].copy()
+                   for name in data.files if name.startswith('measure_')}
+    return done, results
@@ -2,6 +2,11 @@
 """
 Tools for kernel identification.
 
+Class
+-----
+_RFactorAccumulator :
+    Incremental R factor of an augmented linear system ``[A, y]``.
+
 Functions
 ---------
 _solver :
@@ -10,8 +15,26 @@ _ls_solver :
     Compute least-squares solution of Ax=y.
 _qr_solver :
     Compute solution of Ax=y using a QR decomposition of A.
-_cplx_to_real :
+_sketch_solver :
+    Compute least-squares solution of Ax=y using a randomized sketch of A.
+_tsqr_solver :
+    Compute solution of Ax=y using a tall-skinny QR decomposition of A.
+_auto_solver :
+    Solve Ax=y using a solver chosen from the size and conditioning of A.
+_block_triangular_solver :
+    Solve a block upper-triangular linear system, skipping its zero blocks.
+_spectral_decomposition :
+    Compute the singular values and projections needed for ridge solutions.
+_ridge_path :
+    Compute ridge solutions and their scores for a vector of parameters.
+_is_by_order :
+    Check the identification method and whether it works by order.
+_required_nb_data :
+    Compute the minimum number of data required by direct or order method.
+_complex2real :
     Cast a numpy.ndarray of complex type to real type with a specified mode.
+_complex2real_into :
+    Write a complex array casted to real type (and scaled) into `out`.
 
 Notes
 -----
@@ -23,45 +46,780 @@ Developed for Python 3.6
 # Importations
 #==============================================================================
 
+import os
+import queue
 import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 import scipy.linalg as sc_lin
+import scipy.sparse as sc_sparse
+import scipy.sparse.linalg as sc_sparse_lin
+
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+_STRING_DIRECT = {'direct', 'Direct', 'DIRECT'}
+_STRING_ORDER = {'order', 'Order', 'ORDER'}
+_STRING_AUTO = {'auto', 'AUTO'}
+
+# Parameters of the automatic solver selection
+_AUTO_MEMORY_BUDGET = 2**30
+_AUTO_TALL_RATIO = 50
+_AUTO_COND_CHOLESKY = 1e4
+_AUTO_COND_SINGULAR = 1e10
+_AUTO_REGULARIZATION = 1e-10
+_SKETCH_OVERSAMPLING = 4
+
+# Default maximum size (in bytes) of the row blocks of the tall-skinny QR
+_TSQR_BLOCK_BYTES = 2**26
+
+# System of the tall-skinny QR, as inherited by forked worker processes
+_tsqr_shared_data = None
+
+
+#==============================================================================
+# Class
+#==============================================================================
+
+class _RFactorAccumulator():
+    """
+    Incremental R factor of an augmented linear system ``[A, y]``.
+
+    Rows of the system are given by blocks; only the R factor of the
+    augmented matrix (of shape ``(P+1, P+1)``) is kept in memory, so that the
+    solution can be computed from an arbitrary long signal.
+
+    Parameters
+    ----------
+    P : int
+        Number of columns of `A`.
+
+    Attributes
+    ----------
+    P : int
+    nb_rows : int
+        Number of rows accumulated so far.
+    r_aug : numpy.ndarray
+        Current augmented R factor.
+
+    Methods
+    -------
+    update(A, y)
+        Add a block of rows to the system.
+    merge(other)
+        Add all rows accumulated in another accumulator.
+    solve()
+        Return the least-squares solution of the accumulated system.
+    residual_norm()
+        Return the norm of the residual of the least-squares solution.
+    output_norm()
+        Return the norm of the right-hand side of the accumulated system.
+    """
+
+    def __init__(self, P):
+        self.P = P
+        self.nb_rows = 0
+        self.r_aug = np.zeros((0, P+1))
+
+    def update(self, A, y):
+        """Add a block of rows to the system."""
+
+        mat = np.concatenate((np.asarray(A), np.reshape(y, (-1, 1))), axis=1)
+        self.r_aug = np.linalg.qr(np.concatenate((self.r_aug, mat), axis=0),
+                                  mode='r')
+        self.nb_rows += mat.shape[0]
+
+    def merge(self, other):
+        """Add all rows accumulated in another accumulator."""
+
+        self.r_aug = _stacked_r_factor((self.r_aug, other.r_aug))
+        self.nb_rows += other.nb_rows
+
+    def solve(self):
+        """Return the least-squares solution of the accumulated system."""
+
+        if not self.P:
+            return np.zeros((0,))
+        return _solve_augmented_r_factor(self.r_aug, self.P)
+
+    def residual_norm(self):
+        """Return the norm of the residual of the least-squares solution."""
+
+        if self.r_aug.shape[0] > self.P:
+            return float(np.abs(self.r_aug[self.P, self.P]))
+        else:
+            return 0.
+
+    def output_norm(self):
+        """Return the norm of the right-hand side of the accumulated system."""
+
+        return float(np.linalg.norm(self.r_aug[:, self.P]))
 
 
 #==============================================================================
 # Functions
 #==============================================================================
 
-def _solver(A, y, solver):
-    """Solve Ax=y using specified method if A is not an empty array."""
+def _solver(A, y, solver, seed=None, n_jobs=None, chunk_size=None,
+            memory_budget=None, info=None):
+    """
+    Solve Ax=y using specified method if A is not an empty array.
 
+    If `info` is a dictionary, it is updated with the solver used, and with
+    the effective rank and condition number of A (exact, or estimated for
+    'sketch' and 'auto') as given by the decomposition used for solving; if
+    `solver` is 'auto', it also records the metadata of its decision.
+    """
+
+    if info is not None:
+        info['solver'] = solver
     if A.size:
         if solver in {'LS', 'ls'}:
-            return _ls_solver(A, y)
+            return _ls_solver(A, y, info=info)
         elif solver in {'QR', 'qr'}:
-            return _qr_solver(A, y)
+            return _qr_solver(A, y, info=info)
+        elif solver in {'sketch', 'SKETCH'}:
+            return _sketch_solver(A, y, seed=seed, info=info)
+        elif solver in {'TSQR', 'tsqr'}:
+            return _tsqr_solver(A, y, n_jobs=n_jobs, chunk_size=chunk_size,
+                                info=info)
+        elif solver in _STRING_AUTO:
+            x, decision = _auto_solver(A, y, seed=seed,
+                                       memory_budget=memory_budget)
+            if info is not None:
+                info.update(decision)
+            return x
         else:
-            message = "Unknown solver {}; available solvers are 'LS' or 'QR'."
+            message = "Unknown solver {}; available solvers are 'LS', " + \
+                      "'QR', 'sketch', 'tsqr' or 'auto'."
             raise ValueError(message.format(solver))
     else:
         return np.zeros((0,))
 
 
-def _ls_solver(A, y):
+def _ls_solver(A, y, info=None):
     """Compute least-squares solution of Ax=y."""
 
-    x, _, _, _ = sc_lin.lstsq(A, y)
+    x, _, _, s = sc_lin.lstsq(A, y)
+    if info is not None:
+        info.update(_spectrum_info(s, A.shape))
     return x
 
 
-def _qr_solver(A, y):
+def _qr_solver(A, y, info=None):
     """Compute solution of Ax=y using a QR decomposition of A."""
 
     q, r = sc_lin.qr(A, mode='economic')
     z = np.dot(q.T, y)
+    if info is not None:
+        info.update(_spectrum_info(sc_lin.svdvals(r), A.shape))
+    return sc_lin.solve_triangular(r, z)
+
+
+def _sketch_solver(A, y, seed=None, oversampling=_SKETCH_OVERSAMPLING,
+                   tol=1e-14, info=None):
+    """
+    Compute least-squares solution of Ax=y using a randomized sketch of A.
+
+    A sparse CountSketch ``S`` of size ``oversampling * A.shape[1]`` is
+    applied to the rows of `A`; the R factor of ``SA`` serves both to compute
+    a first sketch-and-solve estimate and as a right preconditioner for LSQR,
+    which then refines the estimate up to least-squares accuracy (see [1]).
+
+    Parameters
+    ----------
+    A : numpy.ndarray
+        Matrix of the linear system, with shape ``(L, P)`` and ``L >> P``.
+    y : numpy.ndarray
+        Right-hand side of the linear system, with shape ``(L,)``.
+    seed : int, optional (default=None)
+        Seed of the random generator used for the sketch.
+    oversampling : int, optional (default=4)
+        Ratio between the number of rows of the sketch and the number of
+        columns of `A`; if the sketch is not smaller than `A`, a QR
+        decomposition of `A` is used instead.
+    tol : float, optional (default=1e-14)
+        Stopping tolerance of the preconditioned LSQR iterations.
+    info : dict, optional (default=None)
+        If given, updated with the effective rank and condition number of
+        `A` estimated from the R factor of the sketch.
+
+    Returns
+    -------
+    numpy.ndarray
+        Least-squares solution of the linear system.
+
+    References
+    ----------
+    .. [1] H. Avron, P. Maymounkov, S. Toledo "Blendenpik: Supercharging
+       LAPACK's least-squares solver", SIAM Journal on Scientific Computing,
+       vol. 32, no. 3, pp. 1217-1236, 2010.
+    """
+
+    A = np.asarray(A)
+    L, P = A.shape
+    sketch_size = oversampling * P
+    if sketch_size >= L:
+        return _qr_solver(A, y, info=info)
+
+    # Sketching of A and y
+    S = _count_sketch(L, sketch_size, seed)
+    q, r = sc_lin.qr(S.dot(A), mode='economic')
+    if info is not None:
+        info.update(_spectrum_info(sc_lin.svdvals(r), A.shape))
+
+    # Sketch-and-solve estimate
+    x0 = sc_lin.solve_triangular(r, np.dot(q.conj().T, S.dot(y)))
+
+    # Refinement by LSQR preconditioned with the sketch R factor
+    def matvec(z):
+        return np.dot(A, sc_lin.solve_triangular(r, z))
+
+    def rmatvec(w):
+        return sc_lin.solve_triangular(r, np.dot(A.conj().T, w), trans='C')
+
+    dtype = np.result_type(A, y)
+    operator = sc_sparse_lin.LinearOperator((L, P), matvec=matvec,
+                                            rmatvec=rmatvec, dtype=dtype)
+    z = sc_sparse_lin.lsqr(operator, y - np.dot(A, x0), atol=tol, btol=tol,
+                           iter_lim=10*P)[0]
+
+    return x0 + sc_lin.solve_triangular(r, z)
+
+
+def _tsqr_solver(A, y, n_jobs=None, chunk_size=None, info=None):
+    """
+    Compute solution of Ax=y using a tall-skinny QR decomposition of A.
+
+    The augmented matrix ``[A, y]`` is split into row blocks whose R factors
+    are computed independently (possibly in worker processes), and merged
+    pairwise along a binary tree; the solution is read from the root
+    augmented R factor, as in :func:`_qr_solver`, without ever forming Q.
+    Each merge is made as soon as both its R factors are available, but the
+    tree only depends on block indexes, so that the result does not depend
+    on the number of workers nor on the completion order. Blocks are
+    submitted in order, at most two per worker being pending at any time, so
+    that at most one R factor per tree level waits for its sibling in
+    addition to the pending ones; memory usage thus does not grow with the
+    number of rows.
+
+    Parameters
+    ----------
+    A : numpy.ndarray
+        Matrix of the linear system, with shape ``(L, P)``.
+    y : numpy.ndarray
+        Right-hand side of the linear system, with shape ``(L,)``.
+    n_jobs : int, optional (default=None)
+        Number of worker processes; if None or 1, everything is computed in
+        the current process; if -1, all available cores are used. Workers
+        are forked, and read their row blocks from the memory of the
+        current process; if processes cannot be forked on this platform,
+        everything is computed in the current process.
+    chunk_size : int, optional (default=None)
+        Number of rows of each block; if None, rows are split evenly between
+        workers, with blocks of at most 64 MiB.
+    info : dict, optional (default=None)
+        If given, updated with the effective rank and condition number of
+        `A` computed from its R factor.
+
+    Returns
+    -------
+    numpy.ndarray
+        Solution of the linear system.
+    """
+
+    A = np.asarray(A)
+    y = np.asarray(y)
+    L, P = A.shape
+    nb_workers = _nb_workers(n_jobs)
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        nb_workers = 1
+    if chunk_size is None:
+        max_rows = _TSQR_BLOCK_BYTES // (A.itemsize * (P+1))
+        chunk_size = max(min(-(-L // nb_workers), max_rows), 4 * (P+1))
+
+    ranges = [(ind, min(ind+chunk_size, L)) for ind in range(0, L, chunk_size)]
+    if not ranges:
+        r_aug = np.zeros((0, P+1), dtype=np.result_type(A, y))
+    elif nb_workers > 1 and len(ranges) > 1:
+        r_aug = _parallel_r_factor(A, y, ranges, nb_workers)
+    else:
+        r_aug = _serial_r_factor(A, y, ranges)
+    if info is not None:
+        info.update(_spectrum_info(sc_lin.svdvals(r_aug[:P, :P]), A.shape))
+    return _solve_augmented_r_factor(r_aug, P)
+
+
+def _auto_solver(A, y, seed=None, memory_budget=None):
+    """
+    Solve Ax=y using a solver chosen from the size and conditioning of A.
+
+    The condition number of `A` is first estimated from the R factor of a
+    small CountSketch of `A` (or of `A` itself if it is not tall), which
+    costs far less than solving the system; then:
+
+        - if `A` is near-singular, a regularized solution is computed from
+          the normal equations, with a Tikhonov parameter proportional to the
+          squared largest singular value of `A`;
+        - else, if a copy of `A` fits in the memory budget and `A` is not
+          very tall, a dense QR decomposition is used;
+        - else, if `A` is well-conditioned, a Cholesky decomposition of the
+          normal equations is used (twice cheaper than QR);
+        - else, if the sketch fits in the memory budget, the sketched and
+          preconditioned solver of :func:`_sketch_solver` is used;
+        - else, LSQR iterations are used, which only need matrix-vector
+          products.
+
+    Parameters
+    ----------
+    A : numpy.ndarray
+        Matrix of the linear system, with shape ``(L, P)``.
+    y : numpy.ndarray
+        Right-hand side of the linear system, with shape ``(L,)``.
+    seed : int, optional (default=None)
+        Seed of the random generator used for the sketch.
+    memory_budget : int, optional (default=None)
+        Memory (in bytes) that the solver can use in addition to `A`; if
+        None, 1 GiB is assumed.
+
+    Returns
+    -------
+    x : numpy.ndarray
+        Solution of the linear system.
+    decision : dict
+        Metadata of the decision, with keys 'solver' (solver used, among
+        'QR', 'cholesky', 'sketch', 'lsqr' and 'regularized'), 'condition'
+        and 'rank' (estimated condition number and effective rank of `A`),
+        'regularization' (Tikhonov parameter, null if no regularization is
+        used), 'shape' and 'memory_budget'.
+    """
+
+    A = np.asarray(A)
+    L, P = A.shape
+    if memory_budget is None:
+        memory_budget = _AUTO_MEMORY_BUDGET
+    itemsize = np.result_type(A, y).itemsize
+    decision = _spectrum_info(_sketched_singular_values(A, seed=seed),
+                              A.shape)
+    decision.update({'regularization': 0., 'shape': (L, P),
+                     'memory_budget': memory_budget})
+    cond = decision['condition']
+
+    if not cond <= _AUTO_COND_SINGULAR:
+        lam = _AUTO_REGULARIZATION * decision['singular_value_max']**2
+        decision.update({'solver': 'regularized', 'regularization': lam})
+        return _cholesky_solver(A, y, lam=lam), decision
+    elif (L*P*itemsize <= memory_budget) and (L <= _AUTO_TALL_RATIO*P):
+        decision['solver'] = 'QR'
+        return _qr_solver(A, y), decision
+    elif (cond <= _AUTO_COND_CHOLESKY) and (P*P*itemsize <= memory_budget):
+        decision['solver'] = 'cholesky'
+        return _cholesky_solver(A, y), decision
+    elif _SKETCH_OVERSAMPLING*P*P*itemsize <= memory_budget:
+        decision['solver'] = 'sketch'
+        return _sketch_solver(A, y, seed=seed), decision
+    else:
+        decision['solver'] = 'lsqr'
+        return _lsqr_solver(A, y), decision
+
+
+def _count_sketch(L, sketch_size, seed=None):
+    """Create a sparse CountSketch matrix of shape ``(sketch_size, L)``."""
+
+    rng = np.random.RandomState(seed)
+    rows = rng.randint(sketch_size, size=L)
+    signs = rng.choice([-1., 1.], size=L)
+    return sc_sparse.csr_matrix((signs, (rows, np.arange(L))),
+                                shape=(sketch_size, L))
+
+
+def _sketched_singular_values(A, seed=None):
+    """Estimate the singular values of A from the R factor of a sketch."""
+
+    L, P = A.shape
+    sketch_size = _SKETCH_OVERSAMPLING * P
+    if sketch_size < L:
+        r = np.linalg.qr(_count_sketch(L, sketch_size, seed).dot(A),
+                         mode='r')
+    else:
+        r = np.linalg.qr(A, mode='r')
+    return sc_lin.svdvals(r)
+
+
+def _spectrum_info(s, shape):
+    """Compute effective rank and condition number from singular values."""
+
+    s_max = s[0] if len(s) else 0.
+    rank = int(np.sum(s > max(shape) * np.finfo(float).eps * s_max))
+    if rank == shape[1] and rank:
+        cond = s_max / s[rank-1]
+    else:
+        cond = np.inf
+    return {'rank': rank, 'condition': cond, 'singular_value_max': s_max}
+
+
+def _cholesky_solver(A, y, lam=0.):
+    """Solve Ax=y via a Cholesky decomposition of the normal equations."""
+
+    gram = np.dot(A.conj().T, A)
+    if lam:
+        gram[np.diag_indices_from(gram)] += lam
+    return sc_lin.cho_solve(sc_lin.cho_factor(gram), np.dot(A.conj().T, y))
+
+
+def _lsqr_solver(A, y, tol=1e-14):
+    """Compute least-squares solution of Ax=y using LSQR iterations."""
+
+    return sc_sparse_lin.lsqr(A, y, atol=tol, btol=tol,
+                              iter_lim=10*A.shape[1])[0]
+
+
+def _block_triangular_solver(row_blocks, col_sizes, solver, **solver_kwargs):
+    """
+    Solve a block upper-triangular linear system, skipping its zero blocks.
+
+    Row blocks are folded into the augmented R factor of the system by
+    non-increasing index of their first nonzero column block, so that each QR
+    update only involves the nonzero blocks of the current row block and the
+    (small) R factor of the previous ones; the reduced square system given
+    by the R factor is then solved using the specified solver.
+
+    Parameters
+    ----------
+    row_blocks : iterable((int, numpy.ndarray))
+        Row blocks, each given by the index of its first nonzero column block
+        and by the augmented matrix ``[B, y]`` regrouping its blocks from this
+        column block to the last one and its right-hand side; they should be
+        given by non-increasing index of first nonzero column block, and can
+        be generated on the fly so that only one is in memory at a time.
+    col_sizes : list(int)
+        Number of columns of each column block.
+    solver : {'LS', 'QR', 'sketch', 'tsqr', 'auto'}
+        Method used for solving the reduced linear system.
+    **solver_kwargs : Keywords arguments passed to :func:`_solver`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Solution of the linear system.
+    """
+
+    starts = np.concatenate(([0], np.cumsum(col_sizes, dtype=int)))
+    current = len(col_sizes)
+    r_aug = np.zeros((0, 1))
+
+    for first, mat in row_blocks:
+        if first > current:
+            raise ValueError('Row blocks are not given by non-increasing ' +
+                             'index of first nonzero column block.')
+        nb_new_cols = starts[current] - starts[first]
+        if nb_new_cols:
+            r_aug = np.concatenate((np.zeros((r_aug.shape[0], nb_new_cols)),
+                                    r_aug), axis=1)
+            current = first
+        r_aug = np.linalg.qr(np.concatenate((r_aug, mat), axis=0), mode='r')
+
+    if starts[current]:
+        r_aug = np.concatenate((np.zeros((r_aug.shape[0], starts[current])),
+                                r_aug), axis=1)
+
+    return _solver(r_aug[:, :-1], r_aug[:, -1], solver, **solver_kwargs)
+
+
+def _augmented_r_factor(block):
+    """Compute the R factor of the augmented row block ``[A, y]``."""
+
+    A, y = block
+    mat = np.concatenate((A, np.reshape(y, (-1, 1))), axis=1)
+    return np.linalg.qr(mat, mode='r')
+
+
+def _stacked_r_factor(pair):
+    """Compute the R factor of two vertically stacked R factors."""
+
+    return np.linalg.qr(np.concatenate(pair, axis=0), mode='r')
+
+
+def _tree_sizes(nb_blocks):
+    """Return the number of nodes of each level of the reduction tree."""
+
+    sizes = [nb_blocks]
+    while sizes[-1] > 1:
+        sizes.append(-(-sizes[-1] // 2))
+    return sizes
+
+
+def _tree_insert(nodes, sizes, level, index, r_aug):
+    """
+    Insert an R factor in the reduction tree stored in `nodes`.
+
+    Node `index` of `level` is merged with node ``index ^ 1`` into node
+    ``index // 2`` of the next level, the last node of a level of odd size
+    being moved up unchanged. Returns the merge made possible by the new
+    node, as ``(level, index, pair)``, or None; the root is kept in `nodes`.
+    """
+
+    while level < len(sizes) - 1:
+        sibling = index ^ 1
+        if sibling >= sizes[level]:
+            level, index = level + 1, index // 2
+        elif (level, sibling) in nodes:
+            other = nodes.pop((level, sibling))
+            pair = (other, r_aug) if sibling < index else (r_aug, other)
+            return (level + 1, index // 2, pair)
+        else:
+            break
+    nodes[(level, index)] = r_aug
+    return None
+
+
+def _serial_r_factor(A, y, ranges):
+    """Reduce the R factors of row blocks in the current process."""
+
+    sizes = _tree_sizes(len(ranges))
+    nodes = dict()
+    for index, (start, stop) in enumerate(ranges):
+        merge = _tree_insert(nodes, sizes, 0, index,
+                             _augmented_r_factor((A[start:stop],
+                                                  y[start:stop])))
+        while merge is not None:
+            level, index_merge, pair = merge
+            merge = _tree_insert(nodes, sizes, level, index_merge,
+                                 _stacked_r_factor(pair))
+    return nodes[(len(sizes)-1, 0)]
+
+
+def _share_tsqr_data(A, y):
+    """Store the system in a forked worker (see :func:`_range_r_factor`)."""
+
+    global _tsqr_shared_data
+    _tsqr_shared_data = (A, y)
+
+
+def _range_r_factor(rows):
+    """Compute the R factor of a row block of the shared system."""
+
+    A, y = _tsqr_shared_data
+    start, stop = rows
+    return _augmented_r_factor((A[start:stop], y[start:stop]))
+
+
+def _parallel_r_factor(A, y, ranges, nb_workers):
+    """
+    Reduce the R factors of row blocks in forked worker processes.
+
+    Workers inherit `A` and `y` when forked, so that only row ranges and R
+    factors are sent between processes; the tree is the same as in
+    :func:`_serial_r_factor`.
+    """
+
+    sizes = _tree_sizes(len(ranges))
+    nodes = dict()
+    results = queue.Queue()
+    context = multiprocessing.get_context('fork')
+    with context.Pool(nb_workers, initializer=_share_tsqr_data,
+                      initargs=(A, y)) as pool:
+
+        def submit(func, arg, level, index):
+            pool.apply_async(func, (arg,),
+                             callback=lambda r: results.put((level, index, r)),
+                             error_callback=lambda e: results.put((None, None,
+                                                                   e)))
+
+        next_block = 0
+        nb_pending = 0
+        while next_block < len(ranges) or nb_pending:
+            while next_block < len(ranges) and nb_pending < 2*nb_workers:
+                submit(_range_r_factor, ranges[next_block], 0, next_block)
+                next_block += 1
+                nb_pending += 1
+            level, index, result = results.get()
+            nb_pending -= 1
+            if level is None:
+                raise result
+            merge = _tree_insert(nodes, sizes, level, index, result)
+            if merge is not None:
+                submit(_stacked_r_factor, merge[2], merge[0], merge[1])
+                nb_pending += 1
+    return nodes[(len(sizes)-1, 0)]
+
+
+def _solve_augmented_r_factor(r_aug, P):
+    """Solve the triangular system contained in an augmented R factor."""
+
+    r = r_aug[:P, :P]
+    z = r_aug[:P, P]
+    if r.shape[0] < P:
+        r = np.concatenate((r, np.zeros((P - r.shape[0], P), r.dtype)))
+        z = np.concatenate((z, np.zeros((P - z.shape[0],), z.dtype)))
     return sc_lin.solve_triangular(r, z)
 
 
+def _spectral_decomposition(A, y, decomposition='svd'):
+    """
+    Compute the singular values and projections needed for ridge solutions.
+
+    Parameters
+    ----------
+    A : numpy.ndarray
+        Matrix of the linear system, with shape ``(L, P)``.
+    y : numpy.ndarray
+        Right-hand side of the linear system, with shape ``(L,)``.
+    decomposition : {'svd', 'gram'}, optional (default='svd')
+        If 'svd', a thin SVD of `A` is computed; if 'gram', the
+        eigendecomposition of the Gram matrix ``A^H A`` is used instead,
+        which is cheaper for very tall matrices but less accurate for
+        ill-conditioned ones.
+
+    Returns
+    -------
+    s : numpy.ndarray
+        Singular values of `A`.
+    V : numpy.ndarray
+        Right singular vectors of `A`, as columns.
+    beta : numpy.ndarray
+        Projection of `y` on the left singular vectors of `A`.
+    """
+
+    A = np.asarray(A)
+    if decomposition in {'svd', 'SVD'}:
+        U, s, Vh = sc_lin.svd(A, full_matrices=False)
+        return s, Vh.conj().T, np.dot(U.conj().T, y)
+    elif decomposition in {'gram', 'Gram', 'GRAM'}:
+        eigvals, V = sc_lin.eigh(np.dot(A.conj().T, A))
+        eigvals, V = eigvals[::-1], V[:, ::-1]
+        s = np.sqrt(np.maximum(eigvals, 0))
+        tol = max(A.shape) * np.finfo(float).eps * s[0] if s.size else 0.
+        s[s <= tol] = 0
+        c = np.dot(V.conj().T, np.dot(A.conj().T, y))
+        beta = np.zeros(c.shape, dtype=c.dtype)
+        beta[s > 0] = c[s > 0] / s[s > 0]
+        return s, V, beta
+    else:
+        message = "Unknown decomposition {}; available decompositions " + \
+                  "are 'svd' or 'gram'."
+        raise ValueError(message.format(decomposition))
+
+
+def _ridge_path(A, y, lambdas, decomposition='svd'):
+    """
+    Compute ridge solutions and their scores for a vector of parameters.
+
+    For each value ``lam`` in `lambdas`, the solution minimizes
+    ``||Ax - y||**2 + lam * ||x||**2``; all solutions, as well as residual
+    norms, solution norms (for L-curve analysis) and generalized
+    cross-validation scores, are computed from a single decomposition of `A`.
+
+    Parameters
+    ----------
+    A : numpy.ndarray
+        Matrix of the linear system, with shape ``(L, P)``.
+    y : numpy.ndarray
+        Right-hand side of the linear system, with shape ``(L,)``.
+    lambdas : array_like
+        Vector of nonnegative regularization parameters.
+    decomposition : {'svd', 'gram'}, optional (default='svd')
+        See :func:`_spectral_decomposition`.
+
+    Returns
+    -------
+    x_path : numpy.ndarray
+        Ridge solutions, with shape ``(len(lambdas), P)``.
+    scores : dict(str: numpy.ndarray)
+        Dictionary with keys 'residual_norm', 'solution_norm' and 'gcv', each
+        value being a vector of length ``len(lambdas)``.
+    """
+
+    lambdas = np.asarray(lambdas, dtype=float)
+    L, P = np.shape(A)
+    y_norm2 = np.sum(np.abs(y)**2)
+
+    if P:
+        s, V, beta = _spectral_decomposition(A, y, decomposition)
+    else:
+        s = np.zeros((0,))
+        V = np.zeros((0, 0))
+        beta = np.zeros((0,))
+
+    # Filter factors for each parameter (null for null singular values)
+    s2 = s**2
+    den = s2[np.newaxis, :] + lambdas[:, np.newaxis]
+    filt = np.zeros(den.shape)
+    np.divide(s2, den, out=filt, where=(den > 0))
+
+    # Solutions
+    coeff = np.zeros(den.shape, dtype=np.result_type(beta, float))
+    np.divide(s * beta, den, out=coeff, where=(den > 0))
+    x_path = np.dot(coeff, V.T)
+
+    # Scores
+    beta2 = np.abs(beta)**2
+    residual_norm2 = y_norm2 - np.sum(beta2) + \
+        np.sum(((1 - filt)**2) * beta2, axis=1)
+    residual_norm2 = np.maximum(residual_norm2, 0)
+    dof = np.sum(filt, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gcv = L * residual_norm2 / (L - dof)**2
+    scores = {'residual_norm': np.sqrt(residual_norm2),
+              'solution_norm': np.sqrt(np.sum(np.abs(coeff)**2, axis=1)),
+              'gcv': gcv}
+
+    return x_path, scores
+
+
+def _nb_workers(n_jobs):
+    """Return the number of worker processes corresponding to `n_jobs`."""
+
+    if n_jobs is None:
+        return 1
+    elif n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    else:
+        return max(1, n_jobs)
+
+
+def _map(func, iterable, nb_workers):
+    """Map `func` on `iterable`, in a process pool if `nb_workers` > 1."""
+
+    if nb_workers > 1:
+        with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+            return list(executor.map(func, iterable))
+    else:
+        return [func(val) for val in iterable]
+
+
+def _thread_map(func, iterable, nb_workers):
+    """Map `func` on `iterable`, in a thread pool if `nb_workers` > 1."""
+
+    if nb_workers > 1:
+        with ThreadPoolExecutor(max_workers=nb_workers) as executor:
+            return list(executor.map(func, iterable))
+    else:
+        return [func(val) for val in iterable]
+
+
+def _is_by_order(method):
+    """Check the identification method and whether it works by order."""
+
+    if method in _STRING_DIRECT:
+        return False
+    elif method in _STRING_ORDER:
+        return True
+    else:
+        message = "Unknown method {}; available methods are 'direct' or " + \
+                  "'order'."
+        raise ValueError(message.format(method))
+
+
+def _required_nb_data(list_nb_coeff, by_order):
+    """Compute the minimum number of data required by direct/order method."""
+
+    return max(list_nb_coeff) if by_order else sum(list_nb_coeff)
+
+
 def _complex2real(sig_cplx, cast_mode='real-imag'):
     """
     Cast a numpy.ndarray of complex type to real type with a specified mode.
@@ -79,9 +837,7 @@ def _complex2real(sig_cplx, cast_mode='real-imag'):
         Array `sig_cplx` casted to real numbers following `cast_mode`.
     """
 
-    if cast_mode not in {'real', 'imag', 'real-imag', 'cplx'}:
-        warnings.warn("Unknown cast_mode, mode 'real-imag' used.", UserWarning)
-        cast_mode = 'real-imag'
+    cast_mode = _check_cast_mode(cast_mode)
 
     if cast_mode == 'real':
         return np.real(sig_cplx)
@@ -91,3 +847,53 @@ def _complex2real(sig_cplx, cast_mode='real-imag'):
         return np.concatenate((np.real(sig_cplx), np.imag(sig_cplx)), axis=0)
     elif cast_mode == 'cplx':
         return sig_cplx
+
+
+def _complex2real_into(out, sig_cplx, cast_mode='real-imag', factor=1):
+    """
+    Write a complex array casted to real type (and scaled) into `out`.
+
+    This is the in-place counterpart of :func:`_complex2real`: no
+    intermediate array is created, which allows to fill directly the rows of
+    a pre-allocated linear system.
+
+    Parameters
+    ----------
+    out : numpy.ndarray
+        Array in which to write; its first dimension should be twice the one
+        of `sig_cplx` if `cast_mode` is 'real-imag', and equal otherwise.
+    sig_cplx : numpy.ndarray
+        Array to cast to real numbers.
+    cast_mode : {'real', 'imag', 'real-imag'}, optional (default='real-imag')
+        Choose how complex number are casted to real numbers.
+    factor : float, optional (default=1)
+        Factor applied to the casted values.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array `out`.
+    """
+
+    cast_mode = _check_cast_mode(cast_mode)
+
+    if cast_mode == 'real':
+        np.multiply(np.real(sig_cplx), factor, out=out)
+    elif cast_mode == 'imag':
+        np.multiply(np.imag(sig_cplx), factor, out=out)
+    elif cast_mode == 'real-imag':
+        L = sig_cplx.shape[0]
+        np.multiply(np.real(sig_cplx), factor, out=out[:L])
+        np.multiply(np.imag(sig_cplx), factor, out=out[L:])
+    elif cast_mode == 'cplx':
+        np.multiply(sig_cplx, factor, out=out)
+    return out
+
+
+def _check_cast_mode(cast_mode):
+    """Check the cast mode, using 'real-imag' (with a warning) if unknown."""
+
+    if cast_mode not in {'real', 'imag', 'real-imag', 'cplx'}:
+        warnings.warn("Unknown cast_mode, mode 'real-imag' used.", UserWarning)
+        cast_mode = 'real-imag'
+    return cast_mode
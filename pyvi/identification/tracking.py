@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+"""
+Module for tracking the kernels of time-varying systems.
+
+Estimators of this module are fed with successive chunks of the input and
+output signals, and give at any time an estimation of the kernels adapted
+to the most recent data.
+
+Class
+-----
+SlidingWindowEstimator :
+    Kernel estimation on a sliding window by QR updating and downdating.
+KalmanTracker :
+    Kalman-filter tracking of kernels following a random walk.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['SlidingWindowEstimator', 'KalmanTracker']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import numpy as np
+import scipy.linalg as sc_lin
+from .tools import _solve_augmented_r_factor
+from .methods import _format_kernels, _check_out_form
+from .streaming import _BasisStream
+from ..volterra.combinatorial_basis import (_check_parameters,
+                                            _compute_list_nb_coeff)
+from ..volterra.tools import _vec2dict_of_vec
+
+
+#==============================================================================
+# Class
+#==============================================================================
+
+class SlidingWindowEstimator():
+    """
+    Kernel estimation on a sliding window by QR updating and downdating.
+
+    The least-squares estimation is made on the last `window` samples only;
+    the R factor of the augmented linear system ``[phi, y]`` is updated with
+    Givens rotations when a sample enters the window, and downdated with
+    (mixed) hyperbolic rotations when a sample leaves it (see [1]), so that
+    each window advance costs O(P^2) operations per sample instead of a full
+    refit. Contrary to exponential-forgetting RLS, old samples are exactly
+    removed, and the covariance is never explicitly propagated; if a
+    downdate fails because the window has become rank-deficient, the R
+    factor is recomputed from the rows of the window.
+
+    Parameters
+    ----------
+    N : int
+        Truncation order.
+    M : int or list(int)
+        Memory length for each kernels (in samples).
+    window : int
+        Number of samples used for the estimation.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system; if set to 'volterra', combinatorial basis
+        contains all possible input products; if set to 'hammerstein',
+        combinatorial basis only contains those corresponding to diagonal
+        kernel values.
+
+    Attributes
+    ----------
+    N : int
+    M : int or list(int)
+    window : int
+    system_type : {'volterra', 'hammerstein'}
+    P : int
+        Number of kernel coefficients.
+    nb_rows : int
+        Number of samples currently in the window.
+    r_aug : numpy.ndarray
+        Augmented R factor of the linear system of the current window.
+    nb_refactorizations : int
+        Number of times the R factor had to be recomputed from the window.
+
+    Methods
+    -------
+    update(input_chunk, output_chunk)
+        Slide the window over a new chunk of the input and output signals.
+    update_rows(phi_rows, output_chunk)
+        Slide the window over new rows of the linear system.
+    get_kernels(out_form='vec')
+        Return the kernels estimated on the current window.
+    residual_norm()
+        Return the norm of the residual on the current window.
+
+    References
+    ----------
+    .. [1] A. W. Bojanczyk, R. P. Brent, P. Van Dooren, F. R. de Hoog "A
+       note on downdating the Cholesky factorization", SIAM Journal on
+       Scientific and Statistical Computing, vol. 8, no. 3, pp. 210-221, 1987.
+    """
+
+    def __init__(self, N, M, window, system_type='volterra'):
+        _M, _ = _check_parameters(N, system_type, M, None)
+        self.N = N
+        self.M = _M
+        self.window = window
+        self.system_type = system_type
+        self._list_nb_coeff = _compute_list_nb_coeff(N, system_type, _M,
+                                                     None, None)
+        self.P = int(sum(self._list_nb_coeff))
+        if window < self.P:
+            raise ValueError('Window has {} samples'.format(window) +
+                             ', it should have at least ' +
+                             '{}.'.format(self.P))
+
+        self.nb_rows = 0
+        self.r_aug = np.zeros((self.P+1, self.P+1))
+        self.nb_refactorizations = 0
+        self._rows = np.zeros((window, self.P+1))
+        self._index = 0
+        self._basis_stream = _BasisStream(N, _M, system_type)
+
+    def update(self, input_chunk, output_chunk):
+        """
+        Slide the window over a new chunk of the input and output signals.
+
+        Parameters
+        ----------
+        input_chunk : numpy.ndarray
+            Next samples of the input signal.
+        output_chunk : numpy.ndarray
+            Next samples of the output signal.
+        """
+
+        phi = self._basis_stream(input_chunk)
+        phi_rows = np.concatenate([val for n, val in sorted(phi.items())],
+                                  axis=1)
+        self.update_rows(phi_rows, output_chunk)
+
+    def update_rows(self, phi_rows, output_chunk):
+        """
+        Slide the window over new rows of the linear system.
+
+        Parameters
+        ----------
+        phi_rows : numpy.ndarray
+            New rows of the combinatorial basis, with shape ``(L, P)``.
+        output_chunk : numpy.ndarray
+            Corresponding output samples, with shape ``(L,)``.
+        """
+
+        mat = np.concatenate((np.asarray(phi_rows, dtype=float),
+                              np.reshape(output_chunk, (-1, 1))), axis=1)
+        for row in mat:
+            _givens_update(self.r_aug, row.copy())
+            if self.nb_rows == self.window:
+                old_row = self._rows[self._index].copy()
+                if not _hyperbolic_downdate(self.r_aug, old_row, self.P):
+                    self._rows[self._index] = row
+                    self._refactorize()
+                    self._index = (self._index + 1) % self.window
+                    continue
+            else:
+                self.nb_rows += 1
+            self._rows[self._index] = row
+            self._index = (self._index + 1) % self.window
+
+    def get_kernels(self, out_form='vec'):
+        """
+        Return the kernels estimated on the current window.
+
+        Parameters
+        ----------
+        out_form : {'tri', 'sym', 'vec'}, optional (default='vec')
+            Form to assume for the kernel; if None, no specific form is
+            assumed. See module :mod:`pyvi.volterra.tools` for more
+            precisions.
+
+        Returns
+        -------
+        dict(int: numpy.ndarray)
+            Dictionary of estimated kernels, where each key is the nonlinear
+            order.
+        """
+
+        if self.nb_rows < self.P:
+            raise ValueError('Window contains {} '.format(self.nb_rows) +
+                             'samples, it should have at least ' +
+                             '{}.'.format(self.P))
+        out_form = _check_out_form(out_form, self.system_type)
+        kernels_vec = _vec2dict_of_vec(
+            _solve_augmented_r_factor(self.r_aug, self.P),
+            self._list_nb_coeff)
+        return _format_kernels(kernels_vec, self.N, self.M, None, None,
+                               out_form)
+
+    def residual_norm(self):
+        """Return the norm of the residual on the current window."""
+
+        return float(np.abs(self.r_aug[self.P, self.P]))
+
+    def _refactorize(self):
+        """Recompute the R factor from the rows of the current window."""
+
+        r_aug = np.linalg.qr(self._rows[:self.nb_rows], mode='r')
+        self.r_aug = np.zeros((self.P+1, self.P+1))
+        self.r_aug[:r_aug.shape[0]] = r_aug
+        self.nb_refactorizations += 1
+
+
+class KalmanTracker():
+    """
+    Kalman-filter tracking of kernels following a random walk.
+
+    The vector of kernel coefficients is the state of a random walk
+    ``theta[t] = theta[t-1] + w[t]``, with ``w[t]`` a white noise of
+    covariance `process_noise`, observed through ``y[t] = phi[t] theta[t] +
+    v[t]``, with ``v[t]`` a white noise of variance `measurement_noise`. The
+    state covariance is updated once every `block_size` samples, all samples
+    of a block being assumed to share the same kernels; the prediction step
+    then adds ``block_size * process_noise`` to the covariance, and the
+    correction step is made either in innovation form (if the block is
+    smaller than the number of coefficients) or in information form (else),
+    so that large blocks cost O(P^3) per block instead of O(P^2) per sample.
+
+    Parameters
+    ----------
+    N : int
+        Truncation order.
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples).
+    orthogonal_basis : (list of) basis object, optional (default=None)
+        Orthogonal basis unto which kernels are projected, which keeps the
+        state dimension small for long kernels; only instances of
+        :class:`pyvi.utilities.orthogonal_basis.LaguerreBasis`, `KautzBasis`
+        or `GeneralizedBasis` are accepted.
+    process_noise : float or numpy.ndarray, optional (default=1e-6)
+        Covariance of the kernel variation between two samples; can be given
+        as a scalar, as the diagonal of the covariance matrix, or as the
+        whole matrix.
+    measurement_noise : float, optional (default=1.)
+        Variance of the noise on the output signal.
+    initial_covariance : float, optional (default=1.)
+        Variance of the kernel coefficients before any update.
+    block_size : int, optional (default=1)
+        Number of samples processed per covariance update; samples of an
+        incomplete block are kept until the block is full.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Assumed type of the system; if set to 'volterra', combinatorial basis
+        contains all possible input products; if set to 'hammerstein',
+        combinatorial basis only contains those corresponding to diagonal
+        kernel values.
+
+    Attributes
+    ----------
+    N : int
+    M : int or list(int)
+    orthogonal_basis : (list of) basis object
+    measurement_noise : float
+    block_size : int
+    system_type : {'volterra', 'hammerstein'}
+    P : int
+        Number of kernel coefficients (i.e. state dimension).
+    state : numpy.ndarray
+        Current estimation of the kernel coefficients.
+    covariance : numpy.ndarray
+        Covariance of the current estimation.
+    nb_samples : int
+        Number of samples taken into account in the estimation.
+
+    Methods
+    -------
+    update(input_chunk, output_chunk)
+        Track the kernels over a new chunk of the input and output signals.
+    update_rows(phi_rows, output_chunk)
+        Track the kernels over new rows of the linear system.
+    flush()
+        Process the samples of the incomplete block.
+    get_kernels(out_form='vec')
+        Return the current estimation of the kernels.
+
+    Notes
+    -----
+    With a null process noise, the tracked kernels are exactly the ridge
+    solution ``(phi.T phi + lambda I)^{-1} phi.T y`` with ``lambda =
+    measurement_noise / initial_covariance``, whatever the block size.
+    """
+
+    def __init__(self, N, M=None, orthogonal_basis=None, process_noise=1e-6,
+                 measurement_noise=1., initial_covariance=1., block_size=1,
+                 system_type='volterra'):
+        _M, is_list = _check_parameters(N, system_type, M, orthogonal_basis)
+        self.N = N
+        self.M = _M
+        self.orthogonal_basis = orthogonal_basis
+        self.measurement_noise = measurement_noise
+        self.block_size = block_size
+        self.system_type = system_type
+        self._is_list = is_list
+        self._list_nb_coeff = _compute_list_nb_coeff(N, system_type, _M,
+                                                     orthogonal_basis, is_list)
+        self.P = int(sum(self._list_nb_coeff))
+        self._process_noise = _covariance_matrix(process_noise, self.P)
+
+        self.state = np.zeros((self.P,))
+        self.covariance = initial_covariance * np.identity(self.P)
+        self.nb_samples = 0
+        self._pending = np.zeros((0, self.P+1))
+        self._basis_stream = _BasisStream(N, _M, system_type,
+                                          orthogonal_basis=orthogonal_basis)
+
+    def update(self, input_chunk, output_chunk):
+        """
+        Track the kernels over a new chunk of the input and output signals.
+
+        Parameters
+        ----------
+        input_chunk : numpy.ndarray
+            Next samples of the input signal.
+        output_chunk : numpy.ndarray
+            Next samples of the output signal.
+        """
+
+        phi = self._basis_stream(input_chunk)
+        phi_rows = np.concatenate([val for n, val in sorted(phi.items())],
+                                  axis=1)
+        self.update_rows(phi_rows, output_chunk)
+
+    def update_rows(self, phi_rows, output_chunk):
+        """
+        Track the kernels over new rows of the linear system.
+
+        Parameters
+        ----------
+        phi_rows : numpy.ndarray
+            New rows of the combinatorial basis, with shape ``(L, P)``.
+        output_chunk : numpy.ndarray
+            Corresponding output samples, with shape ``(L,)``.
+        """
+
+        mat = np.concatenate((np.asarray(phi_rows, dtype=float),
+                              np.reshape(output_chunk, (-1, 1))), axis=1)
+        mat = np.concatenate((self._pending, mat), axis=0)
+        nb_blocks = mat.shape[0] // self.block_size
+        for ind in range(nb_blocks):
+            block = mat[ind*self.block_size:(ind+1)*self.block_size]
+            self._block_update(block[:, :-1], block[:, -1])
+        self._pending = mat[nb_blocks*self.block_size:]
+
+    def flush(self):
+        """Process the samples of the incomplete block."""
+
+        if self._pending.shape[0]:
+            self._block_update(self._pending[:, :-1], self._pending[:, -1])
+            self._pending = np.zeros((0, self.P+1))
+
+    def get_kernels(self, out_form='vec'):
+        """
+        Return the current estimation of the kernels.
+
+        Parameters
+        ----------
+        out_form : {'tri', 'sym', 'vec'}, optional (default='vec')
+            Form to assume for the kernel; if None, no specific form is
+            assumed. See module :mod:`pyvi.volterra.tools` for more
+            precisions.
+
+        Returns
+        -------
+        dict(int: numpy.ndarray)
+            Dictionary of estimated kernels, where each key is the nonlinear
+            order.
+        """
+
+        out_form = _check_out_form(out_form, self.system_type)
+        kernels_vec = _vec2dict_of_vec(self.state.copy(),
+                                       self._list_nb_coeff)
+        return _format_kernels(kernels_vec, self.N, self.M,
+                               self.orthogonal_basis, self._is_list, out_form)
+
+    def _block_update(self, phi_block, out_block):
+        """Prediction and correction steps for one block of samples."""
+
+        B = phi_block.shape[0]
+        cov = self.covariance + B * self._process_noise
+        innovation = out_block - np.dot(phi_block, self.state)
+        if B < self.P:
+            gain_t = np.dot(phi_block, cov)
+            innovation_cov = np.dot(gain_t, phi_block.T) + \
+                self.measurement_noise * np.identity(B)
+            gain_t = sc_lin.solve(innovation_cov, gain_t, assume_a='pos')
+            self.state = self.state + np.dot(innovation, gain_t)
+            cov = cov - np.dot(np.dot(cov, phi_block.T), gain_t)
+        else:
+            information = sc_lin.inv(cov) + \
+                np.dot(phi_block.T, phi_block) / self.measurement_noise
+            cov = sc_lin.inv(information)
+            self.state = self.state + \
+                np.dot(cov, np.dot(phi_block.T, innovation)) / \
+                self.measurement_noise
+        self.covariance = (cov + cov.T) / 2
+        self.nb_samples += B
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def _givens_update(r, row):
+    """Add a row to the upper-triangular factor `r` (in place)."""
+
+    for i in range(r.shape[0]):
+        if row[i] == 0:
+            continue
+        norm = np.hypot(r[i, i], row[i])
+        c = r[i, i] / norm
+        s = row[i] / norm
+        r_i = r[i, i:].copy()
+        r[i, i:] = c * r_i + s * row[i:]
+        row[i:] = c * row[i:] - s * r_i
+
+
+def _hyperbolic_downdate(r, row, P):
+    """
+    Remove a row from the upper-triangular factor `r` (in place).
+
+    The first `P` columns are downdated with mixed hyperbolic rotations; the
+    last one (augmented column of the right-hand side) can only see its
+    diagonal term (the residual norm) vanish, in which case it is set to
+    zero. Returns False (and leaves `r` in an undefined state) if the
+    downdated factor would be singular.
+    """
+
+    for i in range(r.shape[0]):
+        if row[i] == 0:
+            continue
+        if i == P and abs(row[i]) >= abs(r[i, i]):
+            r[i, i] = 0.
+            return True
+        if abs(row[i]) >= abs(r[i, i]):
+            return False
+        s = row[i] / r[i, i]
+        c = np.sqrt((1 - s) * (1 + s))
+        r[i, i:] = (r[i, i:] - s * row[i:]) / c
+        row[i:] = c * row[i:] - s * r[i, i:]
+    return True
+
+
+def _covariance_matrix(val, P):
+    """Return the (P, P) covariance matrix given by `val`."""
+
+    val = np.asarray(val, dtype=float)
+    if val.ndim == 0:
+        return val * np.identity(P)
+    elif val.shape == (P,):
+        return np.diag(val)
+    elif val.shape == (P, P):
+        return val
+    else:
+        raise ValueError('Covariance has shape {}, '.format(val.shape) +
+                         'should be a scalar, or of shape ' +
+                         '{} or {}.'.format((P,), (P, P)))
@@ -57,7 +57,7 @@ from collections.abc import Sequence
 import itertools as itr
 import numpy as np
 import scipy.signal as sc_sig
-from .tools import inherit_docstring, _is_sorted
+from .tools import _is_sorted
 
 
 #==============================================================================
@@ -84,23 +84,159 @@ class _OrthogonalBasis():
             Signal projection; projected elements are along the first axis.
         """
 
-        return np.zeros((self.K,) + signal.shape, signal.dtype)
+        return self._projection(signal, None)
+
+    def _projection(self, signal, states):
+        """
+        Project a signal unto the basis, from given filter states.
 
+        Filters are started from the states stored in `states` (which are
+        then updated), or from zero states if `states` is None.
+        """
+
+        return np.zeros((self.K,) + signal.shape, signal.dtype)
 
     @classmethod
-    def _filtering(cls, signal, system):
-        """Filter `signal` by `system`."""
+    def _filtering(cls, signal, system, states=None):
+        """
+        Filter `signal` by `system`, starting from `states` if given.
 
+        States of complex signals are kept separately for their real and
+        imaginary parts; empty signals leave `states` untouched.
+        """
+
+        if not signal.shape[0]:
+            return np.zeros(signal.shape, np.result_type(signal, float))
         if np.iscomplexobj(signal):
-            _, filtered_signal_r, _ = sc_sig.dlsim(system, np.real(signal))
-            _, filtered_signal_i, _ = sc_sig.dlsim(system, np.imag(signal))
-            filtered_signal = filtered_signal_r + 1j * filtered_signal_i
-        else:
+            filtered_signal_r = cls._filtering(np.real(signal), system, states)
+            filtered_signal_i = cls._filtering(np.imag(signal), system, states)
+            return filtered_signal_r + 1j * filtered_signal_i
+
+        if states is None:
             _, filtered_signal, _ = sc_sig.dlsim(system, signal)
+        else:
+            ind = states.next_index(system)
+            _, filtered_signal, x = sc_sig.dlsim(system, signal,
+                                                 x0=states.values[ind])
+            states.values[ind] = np.dot(system.A, x[-1]) + \
+                np.dot(system.B, signal[-1:])
         filtered_signal.shape = signal.shape
         return filtered_signal
 
 
+class _FilterStates():
+    """
+    States of the successive filterings made by one projection.
+
+    Attributes
+    ----------
+    values : list(numpy.ndarray)
+        State of each filtering, in the order they are made.
+    is_complex : boolean or None
+        Whether the projected signal is complex-valued (None until a
+        non-empty chunk is projected).
+
+    Methods
+    -------
+    check_type(signal)
+        Checks that a chunk is of the same type as the previous ones.
+    next_index(system)
+        Returns the index of the state of the next filtering.
+    rewind()
+        Go back to the state of the first filtering.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.is_complex = None
+        self._index = 0
+
+    def check_type(self, signal):
+        """Checks that a chunk is of the same type as the previous ones."""
+
+        if not signal.shape[0]:
+            return
+        if self.is_complex is None:
+            self.is_complex = np.iscomplexobj(signal)
+        elif self.is_complex != np.iscomplexobj(signal):
+            raise ValueError('Chunks of a signal projected by chunks ' +
+                             'should be either all real-valued or all ' +
+                             'complex-valued.')
+
+    def next_index(self, system):
+        """Returns the index of the state of the next filtering."""
+
+        ind = self._index
+        if ind == len(self.values):
+            self.values.append(np.zeros((system.A.shape[0],)))
+        self._index += 1
+        return ind
+
+    def rewind(self):
+        """Go back to the state of the first filtering."""
+
+        self._index = 0
+
+
+class _ProjectionStream(_OrthogonalBasis):
+    """
+    Projection unto an orthogonal basis of a signal given by chunks.
+
+    States of the basis filters are kept from one chunk to the next, so that
+    the projections of successive chunks are exactly those of the whole
+    signal. As the projection of several signals can be needed for each
+    chunk (e.g. for a projected Hammerstein basis), one set of states is
+    kept per call to :meth:`projection` between two calls to
+    :meth:`next_chunk`. States are stored in the stream, not in the basis,
+    so that a basis can be shared between several streams. Chunks of a
+    signal should be either all real-valued or all complex-valued (empty
+    chunks being allowed).
+
+    Parameters
+    ----------
+    basis : _OrthogonalBasis
+        Orthogonal basis unto which signals are projected.
+
+    Attributes
+    ----------
+    basis : _OrthogonalBasis
+    K : int
+
+    Methods
+    -------
+    projection(signal)
+        Project the current chunk of a signal unto the basis.
+    next_chunk()
+        Move to the next chunk of the signals.
+    """
+
+    def __init__(self, basis):
+        if not isinstance(basis, _OrthogonalBasis):
+            raise TypeError('Projection of a signal given by chunks is ' +
+                            'only available for bases of type ' +
+                            'LaguerreBasis, KautzBasis or GeneralizedBasis.')
+        self.basis = basis
+        self.K = basis.K
+        self._states = []
+        self._nb_calls = 0
+
+    def projection(self, signal):
+        """Project the current chunk of a signal unto the basis."""
+
+        if self._nb_calls == len(self._states):
+            self._states.append(_FilterStates())
+        states = self._states[self._nb_calls]
+        self._nb_calls += 1
+        states.check_type(signal)
+        states.rewind()
+        return self.basis._projection(signal, states)
+
+    def next_chunk(self):
+        """Move to the next chunk of the signals."""
+
+        self._nb_calls = 0
+
+
 class LaguerreBasis(_OrthogonalBasis):
     """
     Class for Orthogonal Laguerre Basis.
@@ -149,13 +285,13 @@ class LaguerreBasis(_OrthogonalBasis):
             post_filt = sc_sig.dlti([1/pole], [pole], -pole)
         return init_filt._as_ss(), post_filt._as_ss()
 
-    @inherit_docstring
-    def projection(self, signal):
-        projection = super().projection(signal)
-        current_sig = self._filtering(signal, self._init_filter)
+    def _projection(self, signal, states):
+        projection = super()._projection(signal, states)
+        current_sig = self._filtering(signal, self._init_filter, states)
         for k in range(self.K):
             projection[k] = current_sig.copy()
-            current_sig = self._filtering(current_sig, self._post_filter)
+            current_sig = self._filtering(current_sig, self._post_filter,
+                                          states)
         return projection
 
 
@@ -221,14 +357,15 @@ class KautzBasis(_OrthogonalBasis):
             post_filt = sc_sig.dlti(num, den)
         return init_filt._as_ss(), even_filt._as_ss(), post_filt._as_ss()
 
-    @inherit_docstring
-    def projection(self, signal):
-        projection = super().projection(signal)
-        current_sig = self._filtering(signal, self._init_filter)
+    def _projection(self, signal, states):
+        projection = super()._projection(signal, states)
+        current_sig = self._filtering(signal, self._init_filter, states)
         for k in range(self.K//2):
             projection[2*k] = current_sig.copy()
-            projection[2*k+1] = self._filtering(current_sig, self._even_filter)
-            current_sig = self._filtering(current_sig, self._post_filter)
+            projection[2*k+1] = self._filtering(current_sig,
+                                                self._even_filter, states)
+            current_sig = self._filtering(current_sig, self._post_filter,
+                                          states)
         return projection
 
 
@@ -277,21 +414,25 @@ class GeneralizedBasis(_OrthogonalBasis):
                 self._type_list.append('Laguerre')
         self.K = len(self.poles)
 
-    @inherit_docstring
-    def projection(self, signal):
-        projection = super().projection(signal)
+    def _projection(self, signal, states):
+        projection = super()._projection(signal, states)
         current_sig = signal.copy()
         k = 0
         for step_type, step_filters in zip(self._type_list, self._filters):
             if step_type == 'Kautz':
-                tmp_sig = self._filtering(current_sig, step_filters[0])
+                tmp_sig = self._filtering(current_sig, step_filters[0],
+                                          states)
                 projection[k] = tmp_sig
-                projection[k+1] = self._filtering(tmp_sig, step_filters[1])
-                current_sig = self._filtering(current_sig, step_filters[2])
+                projection[k+1] = self._filtering(tmp_sig, step_filters[1],
+                                                  states)
+                current_sig = self._filtering(current_sig, step_filters[2],
+                                              states)
                 k += 2
             else:
-                projection[k] = self._filtering(current_sig, step_filters[0])
-                current_sig = self._filtering(current_sig, step_filters[1])
+                projection[k] = self._filtering(current_sig, step_filters[0],
+                                                states)
+                current_sig = self._filtering(current_sig, step_filters[1],
+                                              states)
                 k += 1
         return projection
 
@@ -20,12 +20,69 @@ Combinatorial basis (see :mod:`pyvi.volterra.combinatorial_basis`)
 compute_combinatorial_basis :
     Creates dictionary of combinatorial basis matrix.
 
+Simulation (see :mod:`pyvi.volterra.simulation`)
+------------------------------------------------
+VolterraFilter :
+    Volterra series processing a signal given by successive blocks.
+ProjectedVolterraFilter :
+    Volterra series on orthogonal bases processing a signal by blocks.
+HammersteinFilter :
+    Hammerstein series processing a signal by blocks using FFT convolution.
+compute_output :
+    Computes the output of a Volterra series from its kernels in vector form.
+compute_cp_output :
+    Computes the output of a Volterra series from CP decompositions of kernels.
+compute_projected_output :
+    Computes the output of a Volterra series from kernels on orthogonal bases.
+compute_hammerstein_output :
+    Computes the output of a Hammerstein series using FFT convolution.
+
+Ground truth (see :mod:`pyvi.volterra.ground_truth`)
+----------------------------------------------------
+compute_ground_truth :
+    Computes homogeneous orders, interconjugate terms and homophase signals.
+
+Frequency responses (see :mod:`pyvi.volterra.frequency`)
+--------------------------------------------------------
+compute_gfrf :
+    Computes the GFRF of a kernel on a grid of frequencies.
+compute_gfrf_diagonal :
+    Computes the GFRF of a kernel on its diagonal.
+compute_gfrf_intermodulation :
+    Computes the GFRF of a kernel on an intermodulation plane.
+
+Sparse models (see :mod:`pyvi.volterra.sparse`)
+-----------------------------------------------
+prune_kernels :
+    Returns sparse models keeping only the largest kernel coefficients.
+compute_sparse_output :
+    Computes the output of a Volterra series from sparse models of kernels.
+evaluate_pruning :
+    Returns the evaluation speedup and output error due to pruning.
+
+Low-rank decomposition (see :mod:`pyvi.volterra.decomposition`)
+---------------------------------------------------------------
+cp_decomposition :
+    Computes symmetric CP decompositions of Volterra kernels.
+cp2kernel :
+    Returns the Volterra kernel corresponding to a symmetric CP decomposition.
+
 Developed for Python 3.6
 @author: Damien Bouvier (Damien.Bouvier@ircam.fr)
 """
 
 from .combinatorial_basis import *
 from .tools import *
+from .simulation import *
+from .decomposition import *
+from .ground_truth import *
+from .frequency import *
+from .sparse import *
 
-__all__ = combinatorial_basis.__all__
+__all__ = list(combinatorial_basis.__all__)
 __all__ += tools.__all__
+__all__ += simulation.__all__
+__all__ += decomposition.__all__
+__all__ += ground_truth.__all__
+__all__ += frequency.__all__
+__all__ += sparse.__all__
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Module for low-rank decomposition of Volterra kernels.
+
+A symmetric kernel of order n is approximated by a symmetric CP (canonical
+polyadic) decomposition ``h(t1, ..., tn) = sum_r lambda_r w_r(t1)...w_r(tn)``,
+which corresponds to a parallel-cascade structure: a sum of Wiener branches,
+each made of a FIR filter `w_r` followed by a static power n with gain
+`lambda_r`. Evaluating the output of such a structure costs O(R * M) per
+sample (with R the rank) instead of O(binomial(M+n-1, n)).
+
+Functions
+---------
+cp_decomposition :
+    Computes symmetric CP decompositions of Volterra kernels.
+cp2kernel :
+    Returns the Volterra kernel corresponding to a symmetric CP decomposition.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['cp_decomposition', 'cp2kernel']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import numpy as np
+import scipy.optimize as sc_optim
+from .tools import vec2kernel, kernel2vec, kernel_nb_coeff, _STRING_OPT_VEC
+from .simulation import _memory_length
+from ..utilities.mathbox import array_symmetrization
+
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+# Maximum ratio between the largest weights after and before the joint
+# refinement; larger weights denote degenerate branches cancelling each other.
+_MAX_WEIGHT_GROWTH = 10.
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def cp_decomposition(kernels, rank=None, tol=1e-6, M=None, max_iter=500,
+                     return_error=False):
+    """
+    Computes symmetric CP decompositions of Volterra kernels.
+
+    Parameters
+    ----------
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of real-valued kernels, where each key is the nonlinear
+        order; each kernel can be given in vector form, or as a tensor of any
+        form.
+    rank : int or dict(int: int), optional (default=None)
+        Rank of the decomposition (for each order); if None, the smallest
+        rank attaining `tol` is used (computed greedily).
+    tol : float, optional (default=1e-6)
+        Wanted relative error (in Frobenius norm) between the kernel in
+        symmetric form and its decomposition; only used if `rank` is None.
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples); only needed for kernels
+        in vector form, and deduced from their number of coefficients if
+        None.
+    max_iter : int, optional (default=500)
+        Maximum number of iterations of the final refinement, where all
+        branches are optimized jointly; no refinement is made if 0.
+    return_error : boolean, optional (default=False)
+        If True, the relative error of each decomposition is also returned.
+
+    Returns
+    -------
+    cp_kernels : dict(int: (numpy.ndarray, numpy.ndarray))
+        Dictionary of decompositions, where each key is the nonlinear order;
+        each decomposition is a tuple ``(weights, filters)``, where `weights`
+        has shape ``(R,)`` and `filters` has shape ``(R, M)``.
+    errors : dict(int: float)
+        Relative error of each decomposition; only returned if
+        `return_error` is True.
+
+    Notes
+    -----
+    Second-order kernels are decomposed exactly by eigenvalue decomposition.
+    For higher orders, branches are added one at a time as the best
+    symmetric rank-one approximation of the current residual (computed by
+    quasi-Newton optimization on the unit sphere), all weights being refitted
+    by least-squares after each addition; all branches are then refined
+    jointly by quasi-Newton optimization of the approximation error.
+    """
+
+    N = max(kernels.keys())
+    vec_kernels = {n: h for n, h in kernels.items() if np.ndim(h) == 1}
+    _M = _memory_length(vec_kernels, N, M, 'volterra') if vec_kernels \
+        else None
+
+    cp_kernels = dict()
+    errors = dict()
+    for n, h in kernels.items():
+        tensor = _symmetric_tensor(h, n, None if _M is None else _M[n-1])
+        _rank = rank.get(n) if isinstance(rank, dict) else rank
+        weights, filters, error = _symmetric_cp(tensor, n, _rank, tol,
+                                                max_iter)
+        cp_kernels[n] = (weights, filters)
+        errors[n] = error
+
+    if return_error:
+        return cp_kernels, errors
+    else:
+        return cp_kernels
+
+
+def cp2kernel(weights, filters, n, form='sym'):
+    """
+    Returns the Volterra kernel corresponding to a symmetric CP decomposition.
+
+    Parameters
+    ----------
+    weights : numpy.ndarray
+        Weights of the branches, of shape ``(R,)``.
+    filters : numpy.ndarray
+        Filters of the branches, of shape ``(R, M)`` (or ``(R, n, M)`` for a
+        non-symmetric decomposition).
+    n : int
+        Kernel order.
+    form : {'sym', 'vec'}, optional (default='sym')
+        Form of the returned kernel. See module :mod:`pyvi.volterra.tools`
+        for more precisions.
+
+    Returns
+    -------
+    numpy.ndarray
+        The corresponding kernel.
+    """
+
+    filters = np.asarray(filters)
+    tensor = _cp_tensor(weights, filters, n, filters.shape[-1])
+    if filters.ndim == 3 and n > 1:
+        tensor = array_symmetrization(tensor)
+    if form in _STRING_OPT_VEC:
+        return kernel2vec(tensor, form='sym') if n > 1 else tensor
+    else:
+        return tensor
+
+
+def _symmetric_tensor(kernel, n, m):
+    """Returns the symmetric form of a kernel given in any form."""
+
+    kernel = np.asarray(kernel)
+    if np.iscomplexobj(kernel):
+        raise ValueError('Kernel of order {} is complex-valued; '.format(n) +
+                         'CP decomposition is only available for ' +
+                         'real-valued kernels.')
+    kernel = kernel.astype(float)
+    if n == 1:
+        return kernel
+    if kernel.ndim == 1:
+        return vec2kernel(kernel, n, m, form='sym')
+    return array_symmetrization(kernel)
+
+
+def _outer_power(vec, n):
+    """Returns the symmetric tensor ``vec x ... x vec`` of order n."""
+
+    tensor = vec
+    for _ in range(n-1):
+        tensor = np.multiply.outer(tensor, vec)
+    return tensor
+
+
+def _outer_product(vectors):
+    """Returns the tensor ``vectors[0] x ... x vectors[-1]``."""
+
+    tensor = vectors[0]
+    for vec in vectors[1:]:
+        tensor = np.multiply.outer(tensor, vec)
+    return tensor
+
+
+def _contraction(tensor, vec, k):
+    """Contracts `k` modes of a symmetric tensor with `vec`."""
+
+    for _ in range(k):
+        tensor = np.dot(tensor, vec)
+    return tensor
+
+
+def _cp_tensor(weights, filters, n, m):
+    """Returns the symmetric tensor of a symmetric CP decomposition."""
+
+    tensor = np.zeros((m,)*n)
+    for weight, vec in zip(weights, filters):
+        if np.ndim(vec) == 1:
+            tensor += weight * _outer_power(vec, n)
+        else:
+            tensor += weight * _outer_product(vec)
+    return tensor
+
+
+def _symmetric_cp(tensor, n, rank, tol, max_iter):
+    """Computes the symmetric CP decomposition of a symmetric tensor."""
+
+    m = tensor.shape[0]
+    norm = np.linalg.norm(tensor)
+    if n == 1:
+        return np.ones((1,)), tensor[np.newaxis].copy(), 0.
+    if norm == 0:
+        return np.zeros((0,)), np.zeros((0, m)), 0.
+    if n == 2:
+        return _eigen_decomposition(tensor, norm, rank, tol)
+
+    max_rank = kernel_nb_coeff(n, m, form='vec') if rank is None else rank
+    filters = []
+    weights = np.zeros((0,))
+    residual = tensor
+    error = 1.
+    while len(filters) < max_rank and (rank is not None or error > tol):
+        filters.append(_best_rank_one(residual, n))
+        weights = _fit_weights(tensor, filters, n)
+        residual = tensor - _cp_tensor(weights, filters, n, m)
+        error = np.linalg.norm(residual) / norm
+
+    if filters and max_iter:
+        weights, filters = _joint_refinement(tensor, weights, filters, n,
+                                             max_iter)
+        error = np.linalg.norm(tensor - _cp_tensor(weights, filters, n, m)) / \
+            norm
+
+    return weights, np.array(filters).reshape((len(filters), m)), error
+
+
+def _eigen_decomposition(tensor, norm, rank, tol):
+    """Computes the (optimal) symmetric CP decomposition of a matrix."""
+
+    eigval, eigvec = np.linalg.eigh(tensor)
+    order = np.argsort(-np.abs(eigval))
+    eigval, eigvec = eigval[order], eigvec[:, order]
+    tail_errors = np.sqrt(np.cumsum(eigval[::-1]**2)[::-1]) / norm
+    tail_errors = np.concatenate((tail_errors, [0.]))
+    if rank is None:
+        rank = int(np.argmax(tail_errors <= tol))
+    rank = min(rank, len(eigval))
+    return eigval[:rank], eigvec[:, :rank].T.copy(), tail_errors[rank]
+
+
+def _best_rank_one(tensor, n, init=None):
+    """Returns the unit vector w maximizing ``|<tensor, w x ... x w>|``."""
+
+    if init is None:
+        init = np.linalg.svd(tensor.reshape((tensor.shape[0], -1)),
+                             full_matrices=False)[0][:, 0]
+
+    def func(x):
+        sq_norm = np.dot(x, x)
+        grad = _contraction(tensor, x, n-1)
+        val = np.dot(grad, x)
+        cost = - val**2 / sq_norm**n
+        jac = - 2 * n * val / sq_norm**n * (grad - val * x / sq_norm)
+        return cost, jac
+
+    result = sc_optim.minimize(func, init, jac=True, method='BFGS')
+    return result.x / np.linalg.norm(result.x)
+
+
+def _fit_weights(tensor, filters, n):
+    """Least-squares weights of the branches for given filters."""
+
+    filters = np.array(filters)
+    gram = np.dot(filters, filters.T)**n
+    rhs = np.array([_contraction(tensor, vec, n) for vec in filters])
+    return np.linalg.lstsq(gram, rhs, rcond=None)[0]
+
+
+def _joint_refinement(tensor, weights, filters, n, max_iter):
+    """
+    Refine all branches at once by quasi-Newton optimization.
+
+    The greedy decomposition is kept if the refinement does not decrease the
+    error, or if it diverges towards degenerate branches (weights growing by
+    more than `_MAX_WEIGHT_GROWTH`).
+    """
+
+    R = len(filters)
+    m = tensor.shape[0]
+    signs = np.where(weights < 0, -1., 1.)
+    init = np.abs(weights)[:, np.newaxis]**(1/n) * np.array(filters)
+
+    def func(x):
+        branches = x.reshape((R, m))
+        residual = tensor - _cp_tensor(signs, branches, n, m)
+        jac = np.array([-2 * n * sign * _contraction(residual, vec, n-1)
+                        for sign, vec in zip(signs, branches)])
+        return np.sum(residual**2), jac.ravel()
+
+    result = sc_optim.minimize(func, init.ravel(), jac=True, method='BFGS',
+                               options={'maxiter': max_iter})
+    if result.fun > func(init.ravel())[0]:
+        return weights, filters
+    branches = result.x.reshape((R, m))
+    norms = np.linalg.norm(branches, axis=1)
+    norms[norms == 0] = 1.
+    refined_filters = list(branches / norms[:, np.newaxis])
+    refined_weights = _fit_weights(tensor, refined_filters, n)
+    if np.max(np.abs(refined_weights)) > \
+            _MAX_WEIGHT_GROWTH * np.max(np.abs(weights)):
+        return weights, filters
+    return refined_weights, refined_filters
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Module for computing generalized frequency response functions (GFRF).
+
+The GFRF of order n is the n-dimensional Fourier transform of the kernel of
+order n; it is computed here on the grid of normalized frequencies
+``k / nfft`` (for ``0 <= k < nfft``), with the same convention as
+:func:`numpy.fft.fftn`. As the kernel is symmetric, so is its GFRF, and only
+one symmetric sector (sorted frequency indexes ``k1 <= ... <= kn``) is
+computed. For large memory lengths, the GFRF can be evaluated only on its
+diagonal (harmonic generation) or on intermodulation planes, directly from
+the vector form of the kernel (no tensor being created).
+
+Functions
+---------
+compute_gfrf :
+    Computes the GFRF of a kernel on a grid of frequencies.
+compute_gfrf_diagonal :
+    Computes the GFRF of a kernel on its diagonal.
+compute_gfrf_intermodulation :
+    Computes the GFRF of a kernel on an intermodulation plane.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['compute_gfrf', 'compute_gfrf_diagonal',
+           'compute_gfrf_intermodulation']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import math
+import itertools as itr
+import numpy as np
+from .simulation import _memory_length
+from .tools import _sorted_tuples
+from ..utilities.mathbox import binomial
+
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+_STRING_OPT_SECTOR = {'sector', 'Sector', 'SECTOR'}
+_STRING_OPT_FULL = {'full', 'Full', 'FULL'}
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def compute_gfrf(kernel, n, nfft=None, M=None, out_form='sector'):
+    """
+    Computes the GFRF of a kernel on a grid of frequencies.
+
+    Parameters
+    ----------
+    kernel : numpy.ndarray
+        Kernel of order `n` in vector form. See module
+        :mod:`pyvi.volterra.tools` for more precisions.
+    n : int
+        Kernel order.
+    nfft : int, optional (default=None)
+        Number of points of the frequency grid along each dimension; if
+        None, the smallest power of 2 greater than the memory length is used.
+    M : int, optional (default=None)
+        Memory length of the kernel (in samples); if None, it is deduced from
+        the number of coefficients of the kernel.
+    out_form : {'sector', 'full'}, optional (default='sector')
+        Form of the returned GFRF; if 'sector', only values for sorted
+        frequency indexes ``k1 <= ... <= kn`` are returned, in the order of
+        :func:`itertools.combinations_with_replacement` (i.e. as the vector
+        form of a kernel of memory length `nfft`); if 'full', the whole
+        n-dimensional array is returned.
+
+    Returns
+    -------
+    numpy.ndarray
+        GFRF of the kernel, as a vector of length ``binomial(nfft+n-1, n)``
+        or as an array of shape ``(nfft,)*n``.
+
+    Notes
+    -----
+    Only the uniform grid of frequencies ``k / nfft`` is available; GFRF
+    values at other frequencies should be computed by zero-padding (i.e.
+    with a larger `nfft`).
+
+    The FFT of the symmetric kernel is computed one axis at a time, without
+    creating the kernel tensor: the symmetric kernel is given by its values
+    on sorted delay tuples (the vector form divided by the number of
+    distinct permutations of each tuple), and after the transform along the
+    first axis, the kernel restricted to a frequency index `k` is symmetric
+    in its remaining variables, so that it is also kept on sorted delay
+    tuples, and only frequency indexes greater than `k` are computed along
+    the next axes. Memory usage is thus of order
+    ``M * binomial(M+n-2, n-1)`` instead of ``M**n``.
+    """
+
+    kernel = np.asarray(kernel)
+    m = _memory_length({n: kernel}, n, M, 'volterra')[n-1]
+    nfft = _nfft(m, nfft)
+    if out_form not in _STRING_OPT_SECTOR | _STRING_OPT_FULL:
+        raise ValueError("Unknown out_form '{}'; ".format(out_form) +
+                         "available forms are 'sector' or 'full'.")
+
+    if n == 1:
+        sector = _dft(kernel, nfft, 0)
+    else:
+        sym_values = kernel / _nb_permutations(_sorted_tuples(n, m))
+        list_values = []
+        _symmetric_sector(sym_values, n, m, nfft, 0, list_values, dict())
+        sector = np.concatenate(list_values)
+
+    if out_form in _STRING_OPT_FULL:
+        return _sector2full(sector, n, nfft)
+    return sector
+
+
+def compute_gfrf_diagonal(kernel, n, nfft=None, M=None):
+    """
+    Computes the GFRF of a kernel on its diagonal.
+
+    The diagonal ``H_n(f, ..., f)`` gives the n-th harmonic generated by a
+    sine wave of frequency f; it is the Fourier transform of the sum of the
+    kernel over all delays of same total ``t1 + ... + tn``, which is computed
+    from the vector form of the kernel in O(binomial(M+n-1, n)) operations.
+
+    Parameters
+    ----------
+    kernel : numpy.ndarray
+        Kernel of order `n` in vector form. See module
+        :mod:`pyvi.volterra.tools` for more precisions.
+    n : int
+        Kernel order.
+    nfft : int, optional (default=None)
+        Number of points of the frequency grid; if None, the smallest power
+        of 2 greater than the memory length is used.
+    M : int, optional (default=None)
+        Memory length of the kernel (in samples); if None, it is deduced from
+        the number of coefficients of the kernel.
+
+    Returns
+    -------
+    numpy.ndarray
+        Vector of length `nfft`, whose k-th value is ``H_n(k/nfft, ...)``.
+    """
+
+    kernel = np.asarray(kernel)
+    m = _memory_length({n: kernel}, n, M, 'volterra')[n-1]
+    nfft = _nfft(m, nfft)
+    total = np.sum(_sorted_tuples(n, m), axis=1)
+    return np.fft.fft(_bincount(total % nfft, kernel, nfft))
+
+
+def compute_gfrf_intermodulation(kernel, n, q, nfft=None, M=None):
+    """
+    Computes the GFRF of a kernel on an intermodulation plane.
+
+    The plane ``H_n(f1, ..., f1, f2, ..., f2)``, with `q` frequencies equal
+    to f1 and ``n-q`` equal to f2, gives the intermodulation product of
+    frequency ``q*f1 + (n-q)*f2`` generated by two sine waves of
+    frequencies f1 and f2. It is the 2-dimensional Fourier transform of the
+    sum of the (symmetric) kernel over all delays with same partial sums
+    ``t1 + ... + tq`` and ``t(q+1) + ... + tn``, which is computed from the
+    vector form of the kernel in O(binomial(n, q) * binomial(M+n-1, n))
+    operations.
+
+    Parameters
+    ----------
+    kernel : numpy.ndarray
+        Kernel of order `n` in vector form. See module
+        :mod:`pyvi.volterra.tools` for more precisions.
+    n : int
+        Kernel order.
+    q : int
+        Number of frequencies equal to f1; should verify ``0 < q < n``.
+    nfft : int, optional (default=None)
+        Number of points of the frequency grid along each dimension; if
+        None, the smallest power of 2 greater than the memory length is used.
+    M : int, optional (default=None)
+        Memory length of the kernel (in samples); if None, it is deduced from
+        the number of coefficients of the kernel.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape ``(nfft, nfft)``, whose value of index ``(k1, k2)``
+        is ``H_n(k1/nfft, ..., k1/nfft, k2/nfft, ..., k2/nfft)``.
+    """
+
+    if not 0 < q < n:
+        raise ValueError('Parameter `q` should verify 0 < q < n ' +
+                         '(got q={} and n={}).'.format(q, n))
+    kernel = np.asarray(kernel)
+    m = _memory_length({n: kernel}, n, M, 'volterra')[n-1]
+    nfft = _nfft(m, nfft)
+
+    # Each coefficient is shared between all choices of the q delays summed
+    # in the first partial sum (see the symmetric form of the kernel)
+    tuples = _sorted_tuples(n, m)
+    total = np.sum(tuples, axis=1)
+    weights = kernel / binomial(n, q)
+    partial_sums = np.zeros((nfft*nfft,), dtype=np.result_type(kernel, float))
+    for subset in itr.combinations(range(n), q):
+        first = np.sum(tuples[:, subset], axis=1)
+        index = (first % nfft) * nfft + (total - first) % nfft
+        partial_sums += _bincount(index, weights, nfft*nfft)
+    return np.fft.fft2(partial_sums.reshape((nfft, nfft)))
+
+
+def _nfft(m, nfft):
+    """Returns (and checks) the number of frequency points."""
+
+    if nfft is None:
+        return 2**int(np.ceil(np.log2(max(m, 1))))
+    if nfft < 1:
+        raise ValueError('Parameter `nfft` should be a positive integer.')
+    return nfft
+
+
+def _bincount(index, weights, length):
+    """Sums `weights` (possibly complex) of same `index`."""
+
+    if np.iscomplexobj(weights):
+        return np.bincount(index, np.real(weights), minlength=length) + \
+            1j * np.bincount(index, np.imag(weights), minlength=length)
+    return np.bincount(index, weights, minlength=length)
+
+
+def _dft(array, nfft, axis):
+    """
+    DFT on `nfft` points along `axis`; longer signals are first folded.
+    """
+
+    length = array.shape[axis]
+    if length > nfft:
+        array = np.moveaxis(array, axis, 0)
+        nb_folds = -(-length // nfft)
+        folded = np.zeros((nb_folds * nfft,) + array.shape[1:],
+                          dtype=array.dtype)
+        folded[:length] = array
+        array = np.moveaxis(np.sum(folded.reshape((nb_folds, nfft) +
+                                                  array.shape[1:]), axis=0),
+                            0, axis)
+    return np.fft.fft(array, n=nfft, axis=axis)
+
+
+def _symmetric_sector(values, p, m, nfft, k_min, list_values, slices):
+    """
+    Append the sector of the DFT of a symmetric function to `list_values`.
+
+    The symmetric function of `p` delays lower than `m` is given by its
+    `values` on sorted delay tuples; only values for sorted frequency indexes
+    greater than `k_min` are computed, in lexicographic order. Indexes used
+    to slice the function along its first axis are cached in `slices`.
+    """
+
+    if p == 1:
+        list_values.append(_dft(values, nfft, 0)[k_min:])
+        return
+    if p not in slices:
+        slices[p] = _slice_indexes(p, m)
+    spectrum = _dft(values[slices[p]], nfft, 0)
+    if p == 2:
+        spectrum = _dft(spectrum[k_min:], nfft, 1)
+        rows, cols = np.indices(spectrum.shape)
+        list_values.append(spectrum[cols >= rows + k_min])
+    else:
+        for k in range(k_min, nfft):
+            _symmetric_sector(spectrum[k], p-1, m, nfft, k, list_values,
+                              slices)
+
+
+def _slice_indexes(p, m):
+    """
+    Returns the position of delay tuples ``(a, t)`` among sorted tuples.
+
+    The returned array has shape ``(m, binomial(m+p-2, p-1))``; its value of
+    index ``(a, j)`` is the position (in the order of
+    :func:`itertools.combinations_with_replacement`) of the sorted tuple
+    made of delay `a` and of the j-th sorted tuple of ``p-1`` delays.
+    """
+
+    tuples = _sorted_tuples(p-1, m)
+    nb_tuples = tuples.shape[0]
+    inserted = np.concatenate((np.repeat(np.arange(m), nb_tuples)[:, None],
+                               np.tile(tuples, (m, 1))), axis=1)
+    inserted.sort(axis=1)
+    return _sorted_tuples_rank(inserted, m).reshape((m, nb_tuples))
+
+
+def _sorted_tuples_rank(tuples, m):
+    """
+    Returns the position of sorted tuples of delays lower than `m`.
+
+    Sorted tuples ``(t1, ..., tp)`` preceding a given one are counted for
+    each j as those sharing its first ``j-1`` delays and whose j-th delay
+    is lower than ``tj`` (and not lower than ``t(j-1)``).
+    """
+
+    p = tuples.shape[1]
+    # Number of sorted tuples of r+1 delays not lower than v, for each (r, v)
+    counts = np.array([[binomial(m - v + r, r + 1) for v in range(m+1)]
+                       for r in range(p)], dtype=int)
+    rank = np.zeros((tuples.shape[0],), dtype=int)
+    previous = np.zeros((tuples.shape[0],), dtype=int)
+    for j in range(p):
+        r = p - j - 1
+        rank += counts[r, previous] - counts[r, tuples[:, j]]
+        previous = tuples[:, j]
+    return rank
+
+
+def _nb_permutations(tuples):
+    """Returns the number of distinct permutations of each sorted tuple."""
+
+    n = tuples.shape[1]
+    nb_perm = np.full((tuples.shape[0],), math.factorial(n), dtype=float)
+    run_length = np.ones((tuples.shape[0],), dtype=int)
+    for j in range(1, n):
+        run_length = np.where(tuples[:, j] == tuples[:, j-1],
+                              run_length + 1, 1)
+        nb_perm /= run_length
+    return nb_perm
+
+
+def _sector2full(sector, n, nfft):
+    """Returns the whole n-dimensional GFRF from its symmetric sector."""
+
+    full = np.zeros((nfft,)*n, dtype=sector.dtype)
+    tuples = _sorted_tuples(n, nfft)
+    for perm in itr.permutations(range(n)):
+        full[tuple(tuples[:, perm].T)] = sector
+    return full
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Module for computing the true outputs estimated by separation methods.
+
+Given a complex signal x (e.g. the analytic signal created by the
+``gen_inputs`` method of :class:`pyvi.separation.methods.HPS` and its
+children), the output of order n for the real signal ``Re(x)`` is the sum
+of interconjugate terms ``y_(n, q)``, where q of the n inputs are
+conjugated. Those terms are the ones estimated by the phase-based methods,
+and the homophase signals are sums of such terms with same phase
+``n - 2*q``. All of them are computed in one depth-first walk on the delay
+tuples (as in :func:`pyvi.volterra.simulation.compute_output`), without
+creating the combinatorial basis.
+
+Functions
+---------
+compute_ground_truth :
+    Computes homogeneous orders, interconjugate terms and homophase signals.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['compute_ground_truth']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import numpy as np
+import scipy.signal as sc_sig
+from .combinatorial_basis import _STRING_VOLTERRA, _STRING_HAMMERSTEIN
+from .simulation import (_memory_length, _volterra_nodes, _fir_filtering,
+                         _time_first, _time_last)
+from ..utilities.mathbox import binomial
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def compute_ground_truth(signal, kernels, M=None, system_type='volterra'):
+    """
+    Computes homogeneous orders, interconjugate terms and homophase signals.
+
+    Parameters
+    ----------
+    signal : array_like
+        Complex input signal; if real-valued, its analytic signal (computed
+        using Hilbert transform, as in the ``gen_inputs`` method of
+        separation methods) is used instead. A collection of signals can
+        also be given as an array of shape ``(K, L)``, all signals being
+        processed at once.
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of kernels in vector form, where each key is the nonlinear
+        order; missing orders are considered null. See module
+        :mod:`pyvi.volterra.tools` for more precisions.
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples); if None, it is deduced
+        from the number of coefficients of each kernel.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Type of the system.
+
+    Returns
+    -------
+    output_by_order : numpy.ndarray
+        Homogeneous orders of the output for the real signal ``Re(signal)``,
+        of shape ``(N, L)``; real-valued if kernels are real-valued.
+    output_by_term : dict((int, int): numpy.ndarray)
+        Dictionary of the interconjugate terms, as estimated by the
+        ``process_outputs`` method of :class:`pyvi.separation.methods.PS`
+        (with ``raw_mode=True``); contains all keys ``(n, q)`` for
+        ``n in range(1, N+1)`` and ``q in range(1+n//2)``.
+    homophase : numpy.ndarray
+        Homophase signals, as estimated by the ``process_outputs`` method of
+        :class:`pyvi.separation.methods.HPS`, of shape ``(2*N+1, L)``; the
+        homophase signal of phase p is at index ``p % (2*N+1)``.
+
+    Notes
+    -----
+    For a collection of signals, the first axis of each returned array is
+    that of the collection. True outputs for each test signal created by a
+    separation method (e.g. for order-based methods such as AS or CPS) are
+    given by :func:`pyvi.volterra.simulation.compute_output` applied on the
+    whole collection.
+    """
+
+    signal = np.asarray(signal)
+    if not np.iscomplexobj(signal):
+        signal = sc_sig.hilbert(signal)
+    signal = _time_first(signal)
+    N = max(kernels.keys())
+    _M = _memory_length(kernels, N, M, system_type)
+    dtype = np.result_type(signal, *kernels.values())
+    terms = np.zeros((N, N+1) + signal.shape, dtype=dtype)
+
+    if system_type in _STRING_HAMMERSTEIN:
+        _hammerstein_terms(signal, kernels, terms)
+    elif system_type in _STRING_VOLTERRA:
+        _volterra_terms(signal, _volterra_nodes(kernels, N, _M), terms)
+    else:
+        raise ValueError("Unknown system_type '{}'.".format(system_type))
+
+    output_by_order = np.zeros((N,) + signal.shape, dtype=dtype)
+    homophase = np.zeros((2*N+1,) + signal.shape, dtype=dtype)
+    output_by_term = dict()
+    for n in range(1, N+1):
+        for q in range(n+1):
+            weighted_term = binomial(n, q) / 2**n * terms[n-1, q]
+            output_by_order[n-1] += weighted_term
+            homophase[(n-2*q) % (2*N+1)] += weighted_term
+            if q <= n//2:
+                output_by_term[(n, q)] = _time_last(terms[n-1, q], 0)
+    if not np.iscomplexobj(np.result_type(*kernels.values())):
+        output_by_order = np.real(output_by_order)
+
+    return (_time_last(output_by_order, 1), output_by_term,
+            _time_last(homophase, 1))
+
+
+def _volterra_terms(signal, nodes, terms):
+    """
+    Computes all interconjugate terms of a Volterra series.
+
+    Row ``(d, k)`` of array `work` stores the sum, over all ways of
+    conjugating k of them, of the products of the d delayed inputs of the
+    current node; products of order n are weighted using FIR filtering of
+    the input and of its conjugate, and terms are normalized by the number of
+    ways of conjugating q inputs at the end.
+    """
+
+    N = terms.shape[0]
+    L = signal.shape[0]
+    work = np.zeros((N, N) + signal.shape, dtype=signal.dtype)
+    delayed = np.empty(signal.shape, dtype=signal.dtype)
+    fir_work = np.empty((2,) + signal.shape, dtype=terms.dtype)
+    fir_work_conj = np.empty((2,) + signal.shape, dtype=terms.dtype)
+    signal_conj = np.conj(signal)
+
+    for depth, delay, n, taps in nodes:
+        if depth:
+            delayed[:delay] = 0
+            delayed[delay:] = signal[:L-delay]
+            if depth == 1:
+                work[1, 0] = delayed
+                work[1, 1] = np.conj(delayed)
+            else:
+                work[depth, :depth+1] = 0
+                work[depth, :depth] += work[depth-1, :depth] * delayed
+                work[depth, 1:depth+1] += work[depth-1, :depth] * \
+                    np.conj(delayed)
+        if taps is not None:
+            filtered = _fir_filtering(taps, signal, fir_work)
+            filtered_conj = _fir_filtering(taps, signal_conj, fir_work_conj)
+            if depth:
+                terms[n-1, :n] += work[depth, :n] * filtered
+                terms[n-1, 1:n+1] += work[depth, :n] * filtered_conj
+            else:
+                terms[0, 0] += filtered
+                terms[0, 1] += filtered_conj
+
+    for n in range(2, N+1):
+        for q in range(n+1):
+            terms[n-1, q] /= binomial(n, q)
+
+
+def _hammerstein_terms(signal, kernels, terms):
+    """Computes all interconjugate terms of a Hammerstein series."""
+
+    fir_work = np.empty((2,) + signal.shape, dtype=terms.dtype)
+    signal_conj = np.conj(signal)
+    for n, h in kernels.items():
+        for q in range(n+1):
+            product = signal**(n-q) * signal_conj**q
+            terms[n-1, q] = _fir_filtering(h, product, fir_work)
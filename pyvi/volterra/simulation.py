@@ -0,0 +1,1046 @@
+# -*- coding: utf-8 -*-
+"""
+Module for computing the output of a Volterra series.
+
+The output is computed directly from the vector form of the kernels (as
+returned by the identification methods), without creating the combinatorial
+basis matrix; memory usage is thus of order O(L + P) instead of O(L * P),
+where L is the signal length and P the number of kernel coefficients.
+
+Kernels identified on orthogonal bases (see module
+:mod:`pyvi.utilities.orthogonal_basis`) are simulated by filtering the
+input by the K filters of the basis, and evaluating a polynomial in the K
+projections; the cost per sample of order n is then O(K^n / n!) instead of
+O(M^n / n!) for the equivalent kernel in the time domain.
+
+Class
+-----
+VolterraFilter :
+    Volterra series processing a signal given by successive blocks.
+ProjectedVolterraFilter :
+    Volterra series on orthogonal bases processing a signal by blocks.
+HammersteinFilter :
+    Hammerstein series processing a signal by blocks using FFT convolution.
+
+Functions
+---------
+compute_output :
+    Computes the output of a Volterra series from its kernels in vector form.
+compute_cp_output :
+    Computes the output of a Volterra series from CP decompositions of kernels.
+compute_projected_output :
+    Computes the output of a Volterra series from kernels on orthogonal bases.
+compute_hammerstein_output :
+    Computes the output of a Hammerstein series using FFT convolution.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['VolterraFilter', 'ProjectedVolterraFilter', 'HammersteinFilter',
+           'compute_output', 'compute_cp_output', 'compute_projected_output',
+           'compute_hammerstein_output']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import numpy as np
+from .tools import kernel_nb_coeff, _sorted_tuples
+from .combinatorial_basis import (_STRING_VOLTERRA, _STRING_HAMMERSTEIN,
+                                  _check_parameters)
+from ..utilities.orthogonal_basis import _ProjectionStream
+from ..utilities.tools import _as_list
+
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+# Maximum number of values (samples times delay tuples) of the sub-blocks
+# used by VolterraFilter
+_BLOCK_BUDGET = 2**16
+
+# Minimum block size for which VolterraFilter uses the walk on delay tuples
+# of compute_output (one vectorized operation per kernel coefficient)
+_WALK_MIN_BLOCK = 1024
+
+
+#==============================================================================
+# Class
+#==============================================================================
+
+class VolterraFilter():
+    """
+    Volterra series processing a signal given by successive blocks.
+
+    The last M-1 input samples (with M the maximum memory length) are kept
+    between calls, so that blocks of any size can be processed, and that
+    the concatenated outputs are exactly (bit for bit) the output of
+    :func:`compute_output` on the concatenated input. For Volterra systems
+    and small blocks (less than 1024 samples), the products of delayed
+    inputs of each order are computed for all delay tuples at once (in
+    sub-blocks of bounded size), so that each block costs O(N * M)
+    vectorized operations instead of one per kernel coefficient; the cost
+    per sample thus stays constant down to blocks of a few samples. Buffers
+    are allocated once for the largest block seen, and reused for
+    subsequent blocks.
+
+    Parameters
+    ----------
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of kernels in vector form, where each key is the nonlinear
+        order; missing orders are considered null.
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples); if None, it is deduced
+        from the number of coefficients of each kernel.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Type of the system.
+
+    Attributes
+    ----------
+    kernels : dict(int: numpy.ndarray)
+    M : list(int)
+    system_type : {'volterra', 'hammerstein'}
+    N : int
+        Truncation order.
+
+    Methods
+    -------
+    process(block, by_order=False)
+        Returns the output corresponding to the next block of input.
+    reset()
+        Clears the input history.
+    """
+
+    def __init__(self, kernels, M=None, system_type='volterra'):
+        if system_type not in _STRING_VOLTERRA | _STRING_HAMMERSTEIN:
+            raise ValueError("Unknown system_type '{}'.".format(system_type))
+        self.kernels = kernels
+        self.N = max(kernels.keys())
+        self.M = _memory_length(kernels, self.N, M, system_type)
+        self.system_type = system_type
+        self._len_history = max(max(self.M), 1) - 1
+        if system_type in _STRING_VOLTERRA:
+            self._nodes = _volterra_nodes(kernels, self.N, self.M)
+            self._plans = _block_plans(kernels, self.M)
+        self._kernels_dtype = np.result_type(*kernels.values(), float)
+        self._buffer = None
+        self._work = None
+        self._output_by_order = None
+
+    def process(self, block, by_order=False):
+        """
+        Returns the output corresponding to the next block of input.
+
+        Parameters
+        ----------
+        block : array_like
+            Next samples of the input signal.
+        by_order : boolean, optional (default=False)
+            If True, the output of each homogeneous order is returned
+            separately.
+
+        Returns
+        -------
+        numpy.ndarray
+            Output block, or array of shape ``(N, len(block))`` of the
+            homogeneous orders if `by_order` is True.
+        """
+
+        block = np.asarray(block)
+        B = block.shape[0]
+        H = self._len_history
+        self._allocate(B, np.result_type(block, float))
+
+        signal = self._buffer[:H+B]
+        signal[H:] = block
+        if self.system_type in _STRING_HAMMERSTEIN or B >= _WALK_MIN_BLOCK:
+            output_by_order = self._output_by_order[:, :H+B]
+            output_by_order.fill(0)
+            work = self._work[:, :H+B]
+            fir_work = self._fir_work[:, :H+B]
+            if self.system_type in _STRING_HAMMERSTEIN:
+                _hammerstein_output(signal, self.kernels, output_by_order,
+                                    work, fir_work)
+            else:
+                _volterra_output(signal, self._nodes, output_by_order, work,
+                                 fir_work)
+            output_by_order = output_by_order[:, H:]
+        else:
+            output_by_order = self._output_by_order[:, :B]
+            output_by_order.fill(0)
+            _block_output(signal, H, self._plans, output_by_order,
+                          self._block_work)
+        np.copyto(signal[:H], signal[B:B+H])
+
+        if by_order:
+            return output_by_order.copy()
+        else:
+            return np.sum(output_by_order, axis=0)
+
+    def reset(self):
+        """Clears the input history."""
+
+        if self._buffer is not None:
+            self._buffer.fill(0)
+
+    def _allocate(self, B, dtype):
+        """Allocate buffers for blocks of (at most) `B` samples."""
+
+        H = self._len_history
+        if self._buffer is not None and self._buffer.shape[0] >= H+B and \
+                np.can_cast(dtype, self._buffer.dtype):
+            return
+        if self._buffer is None:
+            history = np.zeros((H,), dtype=dtype)
+        else:
+            history = self._buffer[:H]
+            dtype = np.result_type(dtype, self._buffer.dtype)
+        size = max(H+B, 0 if self._buffer is None else self._buffer.shape[0])
+        self._buffer = np.zeros((size,), dtype=dtype)
+        self._buffer[:H] = history
+        out_dtype = np.result_type(dtype, self._kernels_dtype)
+        self._output_by_order = np.empty((self.N, size), dtype=out_dtype)
+        self._work = np.empty((self.N, size), dtype=dtype)
+        self._fir_work = np.empty((2, size), dtype=out_dtype)
+        if self.system_type in _STRING_VOLTERRA:
+            self._block_work = _block_work(self._plans, size, dtype,
+                                           out_dtype)
+
+
+class ProjectedVolterraFilter():
+    """
+    Volterra series on orthogonal bases processing a signal by blocks.
+
+    States of the filters of the orthogonal bases are kept between calls,
+    so that the concatenated outputs are those of
+    :func:`compute_projected_output` on the concatenated input (up to
+    rounding errors).
+
+    Parameters
+    ----------
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of kernels in vector form on the orthogonal bases (as
+        returned by identification methods used with `orthogonal_basis`),
+        where each key is the nonlinear order; missing orders are considered
+        null.
+    orthogonal_basis : (list of) basis object
+        Orthogonal basis unto which kernels are projected; can be specified
+        per kernel by a list of such basis. Only bases of type
+        LaguerreBasis, KautzBasis or GeneralizedBasis are accepted. See
+        module :mod:`pyvi.utilities.orthogonal_basis` for precisions on
+        what basis object can be.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Type of the system.
+
+    Attributes
+    ----------
+    kernels : dict(int: numpy.ndarray)
+    N : int
+        Truncation order.
+    K : list(int)
+        Number of elements of the basis of each kernel.
+    system_type : {'volterra', 'hammerstein'}
+
+    Methods
+    -------
+    process(block, by_order=False)
+        Returns the output corresponding to the next block of input.
+    reset()
+        Clears the states of the basis filters.
+    """
+
+    def __init__(self, kernels, orthogonal_basis, system_type='volterra'):
+        self.kernels = kernels
+        self.N = max(kernels.keys())
+        self.system_type = system_type
+        self._bases = _projection_bases(kernels, self.N, orthogonal_basis,
+                                        system_type)
+        self.K = [basis.K for basis in self._bases]
+        self._nodes = _projected_nodes(kernels, self.K, system_type)
+        self.reset()
+
+    def process(self, block, by_order=False):
+        """
+        Returns the output corresponding to the next block of input.
+
+        Parameters
+        ----------
+        block : array_like
+            Next samples of the input signal.
+        by_order : boolean, optional (default=False)
+            If True, the output of each homogeneous order is returned
+            separately.
+
+        Returns
+        -------
+        numpy.ndarray
+            Output block, or array of shape ``(N, len(block))`` of the
+            homogeneous orders if `by_order` is True.
+        """
+
+        for stream in set(self._streams):
+            stream.next_chunk()
+        output_by_order = _projected_output(np.asarray(block), self.kernels,
+                                            self.N, self._streams,
+                                            self._nodes, self.system_type)
+        if by_order:
+            return output_by_order
+        else:
+            return np.sum(output_by_order, axis=0)
+
+    def reset(self):
+        """Clears the states of the basis filters."""
+
+        streams = {id(basis): _ProjectionStream(basis)
+                   for basis in self._bases}
+        self._streams = [streams[id(basis)] for basis in self._bases]
+
+
+class HammersteinFilter():
+    """
+    Hammerstein series processing a signal by blocks using FFT convolution.
+
+    The output is computed as in :func:`compute_hammerstein_output`; the end
+    of the convolution of each block (of length M-1, with M the maximum
+    memory length) is kept and added to the output of the next blocks, so
+    that blocks of any size can be processed without latency, and that the
+    concatenated outputs are those of :func:`compute_hammerstein_output` on
+    the concatenated input (up to rounding errors).
+
+    Parameters
+    ----------
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of kernels in vector form (i.e. vector of diagonal values
+        of the Volterra kernels), where each key is the nonlinear order;
+        missing orders are considered null.
+    block_size : int, optional (default=None)
+        Length of the segments convolved by FFT; see
+        :func:`compute_hammerstein_output`.
+
+    Attributes
+    ----------
+    kernels : dict(int: numpy.ndarray)
+    N : int
+        Truncation order.
+    M : list(int)
+        Memory length of each kernel.
+    block_size : int
+    nfft : int
+        Length of the FFTs.
+
+    Methods
+    -------
+    process(block, by_order=False)
+        Returns the output corresponding to the next block of input.
+    reset()
+        Clears the end of the convolution carried to the next blocks.
+    """
+
+    def __init__(self, kernels, block_size=None):
+        self.kernels = kernels
+        self.N = max(kernels.keys())
+        self.M = _memory_length(kernels, self.N, None, 'hammerstein')
+        self.block_size, self.nfft = _fft_sizes(max(self.M), block_size)
+        self._orders = sorted(kernels.keys())
+        self._complex_kernels = any(np.iscomplexobj(h)
+                                    for h in kernels.values())
+        self._spectra = dict()
+        self._tail = None
+
+    def process(self, block, by_order=False):
+        """
+        Returns the output corresponding to the next block of input.
+
+        Parameters
+        ----------
+        block : array_like
+            Next samples of the input signal.
+        by_order : boolean, optional (default=False)
+            If True, the output of each homogeneous order is returned
+            separately.
+
+        Returns
+        -------
+        numpy.ndarray
+            Output block, or array of shape ``(N, len(block))`` of the
+            homogeneous orders if `by_order` is True.
+        """
+
+        block = np.asarray(block)
+        if self._tail is None:
+            self._tail = np.zeros((len(self._orders), max(self.M) - 1))
+        is_real = not (self._complex_kernels or np.iscomplexobj(block) or
+                       np.iscomplexobj(self._tail))
+        if is_real not in self._spectra:
+            self._spectra[is_real] = _kernel_spectra(self.kernels,
+                                                     self._orders, self.nfft,
+                                                     is_real)
+
+        powers = _powers(block, self._orders)
+        output, self._tail = _fft_convolution(powers, self._spectra[is_real],
+                                              self.nfft, self.block_size,
+                                              is_real, tail=self._tail)
+        output_by_order = _scatter_orders(output, self._orders, self.N)
+        if by_order:
+            return output_by_order
+        else:
+            return np.sum(output_by_order, axis=0)
+
+    def reset(self):
+        """Clears the end of the convolution carried to the next blocks."""
+
+        self._tail = None
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def compute_output(signal, kernels, M=None, system_type='volterra',
+                   by_order=False):
+    """
+    Computes the output of a Volterra series from its kernels in vector form.
+
+    Parameters
+    ----------
+    signal : array_like
+        Input signal; can be real or complex-valued. A collection of signals
+        (e.g. as returned by the ``gen_inputs`` method of separation methods)
+        can also be given as an array of shape ``(K, L)``, all signals being
+        processed at once.
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of kernels in vector form, where each key is the nonlinear
+        order; missing orders are considered null. See module
+        :mod:`pyvi.volterra.tools` for more precisions.
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples); if None, it is deduced
+        from the number of coefficients of each kernel.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Type of the system; if set to 'hammerstein', kernel of order n is
+        the vector of diagonal values of the n-th order Volterra kernel.
+    by_order : boolean, optional (default=False)
+        If True, the output of each homogeneous order is returned separately.
+
+    Returns
+    -------
+    numpy.ndarray
+        Output signal, or array of shape ``(N, L)`` of the homogeneous orders
+        (with N the maximum nonlinear order) if `by_order` is True; for a
+        collection of signals, the first axis is that of the collection.
+
+    Notes
+    -----
+    For Volterra systems, delayed input products are computed by a
+    depth-first walk on the (sorted) delay tuples, in the same order as the
+    kernel coefficients; each product of n-1 delayed inputs is then weighted
+    by the corresponding n-th order coefficients using a single FIR filter.
+    At most N + 3 signals are kept in memory at any time. All operations are
+    elementwise, so that the result for a sample does not depend on its
+    position in the signal (see :class:`VolterraFilter`).
+    """
+
+    signal = _time_first(signal)
+    N = max(kernels.keys())
+    _M = _memory_length(kernels, N, M, system_type)
+    dtype = np.result_type(signal, *kernels.values(), float)
+    output_by_order = np.zeros((N,) + signal.shape, dtype=dtype)
+
+    work = np.empty((N,) + signal.shape, dtype=np.result_type(signal, float))
+    fir_work = np.empty((2,) + signal.shape, dtype=dtype)
+    if system_type in _STRING_HAMMERSTEIN:
+        _hammerstein_output(signal, kernels, output_by_order, work, fir_work)
+    elif system_type in _STRING_VOLTERRA:
+        _volterra_output(signal, _volterra_nodes(kernels, N, _M),
+                         output_by_order, work, fir_work)
+    else:
+        raise ValueError("Unknown system_type '{}'.".format(system_type))
+
+    output_by_order = _time_last(output_by_order, 1)
+    if by_order:
+        return output_by_order
+    else:
+        return np.sum(output_by_order, axis=-2)
+
+
+def compute_cp_output(signal, cp_kernels, by_order=False):
+    """
+    Computes the output of a Volterra series from CP decompositions of kernels.
+
+    Each kernel of order n is given by a symmetric CP decomposition (as
+    returned by :func:`pyvi.volterra.decomposition.cp_decomposition`),
+    which is simulated as a parallel cascade of R Wiener branches (FIR
+    filter followed by a power n); the cost per sample is O(R * (M + n)).
+    Non-symmetric CP decompositions (as returned by
+    :func:`pyvi.identification.low_rank.cp_method`), where each branch is
+    the product of n different FIR filters, are also accepted; the cost per
+    sample is then O(R * n * M).
+
+    Parameters
+    ----------
+    signal : array_like
+        Input signal; can be real or complex-valued.
+    cp_kernels : dict(int: (numpy.ndarray, numpy.ndarray))
+        Dictionary of decompositions ``(weights, filters)``, where each key
+        is the nonlinear order; `filters` has shape ``(R, M)`` for symmetric
+        decompositions, and ``(R, n, M)`` for non-symmetric ones. Missing
+        orders are considered null.
+    by_order : boolean, optional (default=False)
+        If True, the output of each homogeneous order is returned separately.
+
+    Returns
+    -------
+    numpy.ndarray
+        Output signal, or array of shape ``(N, L)`` of the homogeneous orders
+        (with N the maximum nonlinear order) if `by_order` is True.
+    """
+
+    signal = np.asarray(signal)
+    N = max(cp_kernels.keys())
+    dtype = np.result_type(signal, *[val for cp in cp_kernels.values()
+                                     for val in cp], float)
+    output_by_order = np.zeros((N,) + signal.shape, dtype=dtype)
+    fir_work = np.empty((2,) + signal.shape, dtype=dtype)
+    power = np.empty(signal.shape, dtype=dtype)
+
+    for n, (weights, filters) in cp_kernels.items():
+        for weight, taps in zip(weights, filters):
+            if np.ndim(taps) == 1:
+                filtered = _fir_filtering(taps, signal, fir_work)
+                power[:] = filtered
+                for _ in range(n-1):
+                    np.multiply(power, filtered, out=power)
+            else:
+                power[:] = _fir_filtering(taps[0], signal, fir_work)
+                for factor in taps[1:]:
+                    np.multiply(power, _fir_filtering(factor, signal,
+                                                      fir_work), out=power)
+            output_by_order[n-1] += weight * power
+
+    if by_order:
+        return output_by_order
+    else:
+        return np.sum(output_by_order, axis=0)
+
+
+def compute_projected_output(signal, kernels, orthogonal_basis,
+                             system_type='volterra', by_order=False):
+    """
+    Computes the output of a Volterra series from kernels on orthogonal bases.
+
+    Parameters
+    ----------
+    signal : array_like
+        Input signal; can be real or complex-valued.
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of kernels in vector form on the orthogonal bases (as
+        returned by identification methods used with `orthogonal_basis`),
+        where each key is the nonlinear order; missing orders are considered
+        null.
+    orthogonal_basis : (list of) basis object
+        Orthogonal basis unto which kernels are projected; can be specified
+        per kernel by a list of such basis. See module
+        :mod:`pyvi.utilities.orthogonal_basis` for precisions on what basis
+        object can be.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Type of the system.
+    by_order : boolean, optional (default=False)
+        If True, the output of each homogeneous order is returned separately.
+
+    Returns
+    -------
+    numpy.ndarray
+        Output signal, or array of shape ``(N, L)`` of the homogeneous orders
+        (with N the maximum nonlinear order) if `by_order` is True.
+
+    Notes
+    -----
+    The output is the same as the dot product of the combinatorial basis
+    created by :func:`pyvi.volterra.combinatorial_basis.\
+compute_combinatorial_basis` with the kernels, but the combinatorial basis
+    is never created: for Volterra systems, products of projections are
+    computed by a depth-first walk on the (sorted) tuples of basis elements,
+    in the same order as the kernel coefficients, each product of n-1
+    projections being weighted by the dot product of the corresponding
+    coefficients with the remaining projections.
+    """
+
+    signal = np.asarray(signal)
+    N = max(kernels.keys())
+    bases = _projection_bases(kernels, N, orthogonal_basis, system_type)
+    nodes = _projected_nodes(kernels, [basis.K for basis in bases],
+                             system_type)
+    output_by_order = _projected_output(signal, kernels, N, bases, nodes,
+                                        system_type)
+    if by_order:
+        return output_by_order
+    else:
+        return np.sum(output_by_order, axis=0)
+
+
+def compute_hammerstein_output(signal, kernels, block_size=None,
+                               by_order=False):
+    """
+    Computes the output of a Hammerstein series using FFT convolution.
+
+    Powers of the input are filtered by the kernels using overlap-add FFT
+    convolution: the signal is cut into segments of length `block_size`, and
+    the FFTs of all segments of all powers are computed at once; the cost
+    per sample is thus O(N log(M)) instead of O(N M) for
+    :func:`compute_output`, which makes kernels with thousands of
+    coefficients usable.
+
+    Parameters
+    ----------
+    signal : array_like
+        Input signal; can be real or complex-valued.
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of kernels in vector form (i.e. vector of diagonal values
+        of the Volterra kernels), where each key is the nonlinear order;
+        missing orders are considered null.
+    block_size : int, optional (default=None)
+        Length of the segments convolved by FFT; FFTs are made on the
+        smallest power of 2 greater than ``block_size + M - 1`` (with M the
+        maximum memory length). If None, the FFT length is the smallest power
+        of 2 greater than ``2*M`` (and than 64).
+    by_order : boolean, optional (default=False)
+        If True, the output of each homogeneous order is returned separately.
+
+    Returns
+    -------
+    numpy.ndarray
+        Output signal, or array of shape ``(N, L)`` of the homogeneous orders
+        (with N the maximum nonlinear order) if `by_order` is True.
+    """
+
+    signal = np.asarray(signal)
+    N = max(kernels.keys())
+    _M = _memory_length(kernels, N, None, 'hammerstein')
+    block_size, nfft = _fft_sizes(max(_M), block_size)
+    orders = sorted(kernels.keys())
+    is_real = not (np.iscomplexobj(signal) or
+                   any(np.iscomplexobj(h) for h in kernels.values()))
+
+    spectra = _kernel_spectra(kernels, orders, nfft, is_real)
+    powers = _powers(signal, orders)
+    if by_order:
+        output, _ = _fft_convolution(powers, spectra, nfft, block_size,
+                                     is_real)
+        return _scatter_orders(output, orders, N)
+    else:
+        output, _ = _fft_convolution(powers, spectra, nfft, block_size,
+                                     is_real, sum_orders=True)
+        return output[0]
+
+
+def _time_first(signal):
+    """Returns a signal (or collection of signals) with time as first axis."""
+
+    signal = np.asarray(signal)
+    if signal.ndim > 1:
+        signal = np.ascontiguousarray(np.moveaxis(signal, -1, 0))
+    return signal
+
+
+def _time_last(array, nb_lead):
+    """
+    Moves first the axes of the collection in an array of shape
+    ``lead + (L,) + collection``, where ``len(lead) == nb_lead``.
+    """
+
+    axes = tuple(range(nb_lead+1))
+    return np.moveaxis(array, axes, tuple(range(-nb_lead-1, 0)))
+
+
+def _fft_sizes(max_memory, block_size):
+    """Returns the segment length and FFT length of FFT convolution."""
+
+    overlap = max(max_memory, 1) - 1
+    if block_size is None:
+        nfft = max(2**int(np.ceil(np.log2(2 * max(max_memory, 1)))), 64)
+        block_size = nfft - overlap
+    else:
+        if block_size < 1:
+            raise ValueError('Parameter `block_size` should be a positive ' +
+                             'integer.')
+        nfft = 2**int(np.ceil(np.log2(block_size + overlap)))
+    return block_size, nfft
+
+
+def _kernel_spectra(kernels, orders, nfft, is_real):
+    """Returns the spectra of the kernels, of shape ``(len(orders), F)``."""
+
+    fft = np.fft.rfft if is_real else np.fft.fft
+    return np.array([fft(kernels[n], n=nfft) for n in orders])
+
+
+def _powers(signal, orders):
+    """Returns the powers of `signal` for all `orders`."""
+
+    powers = np.empty((len(orders),) + signal.shape,
+                      dtype=np.result_type(signal, float))
+    power = np.array(signal, dtype=powers.dtype)
+    current = 1
+    for ind, n in enumerate(orders):
+        for _ in range(n - current):
+            power *= signal
+        current = n
+        powers[ind] = power
+    return powers
+
+
+def _scatter_orders(output, orders, N):
+    """Returns an array of shape ``(N, L)`` from the output of `orders`."""
+
+    output_by_order = np.zeros((N,) + output.shape[1:], dtype=output.dtype)
+    for ind, n in enumerate(orders):
+        output_by_order[n-1] = output[ind]
+    return output_by_order
+
+
+def _fft_convolution(signals, spectra, nfft, block_size, is_real, tail=None,
+                     sum_orders=False):
+    """
+    Overlap-add FFT convolution of each signal by the corresponding filter.
+
+    Array `signals` has shape ``(K, L)``, and `spectra` are the FFT of the
+    K filters (of length at most ``nfft - block_size + 1``). Array `tail`,
+    of shape ``(K, T)`` with T the maximum filter length minus one, is the
+    end of previous convolutions, added at the start of the output. If
+    `sum_orders` is True, the K filtered signals are summed (in the
+    frequency domain) and only one output is returned. Returns the output
+    and the new `tail`.
+    """
+
+    K, L = signals.shape
+    B = block_size
+    T = 0 if tail is None else tail.shape[1]
+    nb_blocks = -(-L // B)
+    nb_pieces = -(-nfft // B)
+
+    segments = np.zeros((K, nb_blocks * B), dtype=signals.dtype)
+    segments[:, :L] = signals
+    segments = segments.reshape((K, nb_blocks, B))
+    if is_real:
+        spectrum = np.fft.rfft(segments, n=nfft, axis=-1)
+    else:
+        spectrum = np.fft.fft(segments, n=nfft, axis=-1)
+    spectrum *= spectra[:, np.newaxis, :]
+    if sum_orders:
+        spectrum = np.sum(spectrum, axis=0, keepdims=True)
+    if is_real:
+        filtered = np.fft.irfft(spectrum, n=nfft, axis=-1)
+    else:
+        filtered = np.fft.ifft(spectrum, n=nfft, axis=-1)
+
+    # Overlap-add, made by pieces of length B of the filtered segments
+    pieces = np.zeros(filtered.shape[:2] + (nb_pieces * B,),
+                      dtype=filtered.dtype)
+    pieces[..., :nfft] = filtered
+    pieces = pieces.reshape(filtered.shape[:2] + (nb_pieces, B))
+    output = np.zeros((filtered.shape[0], nb_blocks + nb_pieces - 1, B),
+                      dtype=np.result_type(filtered, *([] if tail is None
+                                                       else [tail])))
+    for ind in range(nb_pieces):
+        output[:, ind:ind+nb_blocks] += pieces[:, :, ind]
+    output = output.reshape((output.shape[0], -1))
+    if tail is not None:
+        output[:, :T] += tail
+        tail = output[:, L:L+T].copy()
+    return output[:, :L], tail
+
+
+def _memory_length(kernels, N, M, system_type):
+    """Returns (and checks) the memory length of each kernel."""
+
+    def _nb_coeff(n, m):
+        if system_type in _STRING_HAMMERSTEIN:
+            return m
+        return kernel_nb_coeff(n, m, form='tri')
+
+    if M is None:
+        _M = [0] * N
+        for n, h in kernels.items():
+            m = 0
+            while _nb_coeff(n, m) < len(h):
+                m += 1
+            _M[n-1] = m
+    else:
+        _M = _as_list(M, N)
+
+    for n, h in kernels.items():
+        if np.ndim(h) != 1 or len(h) != _nb_coeff(n, _M[n-1]):
+            raise ValueError('Kernel of order {} '.format(n) +
+                             'has shape {}, '.format(np.shape(h)) +
+                             'which does not correspond to the vector form ' +
+                             'with memory length {}.'.format(_M[n-1]))
+    return _M
+
+
+def _volterra_nodes(kernels, N, M):
+    """
+    Returns the walk on sorted delay tuples used to compute the output.
+
+    Each node is given as a tuple ``(depth, delay, n, taps)``, where `depth`
+    is the number of delayed inputs in the product (the last one being
+    delayed by `delay`), and `taps` are the coefficients of order `n` (with
+    ``n = depth + 1``) weighting this product, or None if there is none.
+    Nodes are given in depth-first order, which is the order of the kernel
+    coefficients.
+    """
+
+    max_memory = [max(M[n:]) for n in range(N)]
+    index = [0] * (N+1)
+    nodes = []
+
+    def _walk(first, depth):
+        n = depth + 1
+        nb_coeff = max(M[n-1] - first, 0)
+        taps = None
+        if n in kernels and nb_coeff:
+            taps = np.zeros((M[n-1],), dtype=kernels[n].dtype)
+            taps[first:] = kernels[n][index[n]:index[n]+nb_coeff]
+        index[n] += nb_coeff
+        nodes.append((depth, first, n, taps))
+        if n < N:
+            for delay in range(first, max_memory[n]):
+                _walk(delay, n)
+
+    _walk(0, 0)
+    return nodes
+
+
+def _block_plans(kernels, M):
+    """
+    Returns, for each order, the delay tuples used by :class:`VolterraFilter`.
+
+    Each plan is a tuple ``(n, prefixes, taps, counts, order)``, where
+    `prefixes` is the array of shape ``(P, n-1)`` of sorted tuples of the
+    first n-1 delays, sorted by their last delay, and `taps` the array of
+    shape ``(M[n-1], P)`` of the coefficients weighting the product of each
+    prefix with the input delayed by each last delay; only the first
+    ``counts[k]`` prefixes have a coefficient for last delay k. Array
+    `order` gives the prefixes in the order of the walk of
+    :func:`_volterra_nodes`.
+    """
+
+    plans = []
+    for n, h in sorted(kernels.items()):
+        m = M[n-1]
+        if not m:
+            continue
+        prefixes = _sorted_tuples(n-1, m) if n > 1 else \
+            np.zeros((1, 0), dtype=int)
+        first = prefixes[:, -1] if n > 1 else np.zeros((1,), dtype=int)
+        taps = np.zeros((len(prefixes), m), dtype=h.dtype)
+        taps[np.arange(m)[np.newaxis, :] >= first[:, np.newaxis]] = h
+        perm = np.argsort(first, kind='mergesort')
+        counts = np.searchsorted(first[perm], np.arange(m), side='right')
+        plans.append((n, prefixes[perm], taps[perm].T.copy(), counts,
+                      np.argsort(perm)))
+    return plans
+
+
+def _block_work(plans, size, dtype, out_dtype):
+    """Allocate buffers of :func:`_block_output` for blocks of `size`."""
+
+    nb_max = max([len(plan[1]) for plan in plans] + [1])
+    C = max(1, min(size, _BLOCK_BUDGET // nb_max))
+    return {'products': np.empty((C, nb_max), dtype=dtype),
+            'taken': np.empty((C, nb_max), dtype=dtype),
+            'filtered': np.empty((C, nb_max), dtype=out_dtype),
+            'tmp': np.empty((C, nb_max), dtype=out_dtype)}
+
+
+def _block_output(signal, H, plans, output_by_order, block_work):
+    """
+    Add the output of each homogeneous order to `output_by_order`.
+
+    Only the output for the last ``len(signal) - H`` samples is computed.
+    Operations are those of :func:`_volterra_output` made in the same order
+    (products of delayed inputs, FIR filtering over the last delay, and
+    accumulation over the prefixes in the order of the walk), but for all
+    prefixes at once, so that results are bit for bit the same.
+    """
+
+    B = signal.shape[0] - H
+    C = block_work['products'].shape[0]
+    stride = signal.strides[0]
+    for start in range(0, B, C):
+        c = min(C, B-start)
+        # View such that delayed[t, k] = signal[H+start+t-k]
+        delayed = np.lib.stride_tricks.as_strided(
+            signal[start+H:], shape=(c, H+1), strides=(stride, -stride))
+        for n, prefixes, taps, counts, order in plans:
+            P = len(prefixes)
+            products = block_work['products'][:c, :P]
+            taken = block_work['taken'][:c, :P]
+            filtered = block_work['filtered'][:c, :P]
+            tmp = block_work['tmp'][:c, :P]
+            if n > 1:
+                np.take(delayed, prefixes[:, 0], axis=1, out=products)
+                for depth in range(1, n-1):
+                    np.take(delayed, prefixes[:, depth], axis=1, out=taken)
+                    np.multiply(products, taken, out=products)
+            filtered.fill(0)
+            for delay, count in enumerate(counts):
+                np.multiply(delayed[:, delay:delay+1], taps[delay, :count],
+                            out=tmp[:, :count])
+                filtered[:, :count] += tmp[:, :count]
+            if n > 1:
+                np.multiply(products, filtered, out=filtered)
+            np.take(filtered, order, axis=1, out=tmp)
+            np.add.accumulate(tmp, axis=1, out=tmp)
+            output_by_order[n-1, start:start+c] += tmp[:, -1]
+
+
+def _projection_bases(kernels, N, orthogonal_basis, system_type):
+    """Returns the orthogonal basis of each kernel (and checks kernels)."""
+
+    _, is_list = _check_parameters(N, system_type, None, orthogonal_basis)
+    bases = _as_list(orthogonal_basis, N) if is_list else \
+        [orthogonal_basis] * N
+
+    for n, h in kernels.items():
+        K = bases[n-1].K
+        nb_coeff = K if system_type in _STRING_HAMMERSTEIN else \
+            kernel_nb_coeff(n, K, form='tri')
+        if np.ndim(h) != 1 or len(h) != nb_coeff:
+            raise ValueError('Kernel of order {} '.format(n) +
+                             'has shape {}, '.format(np.shape(h)) +
+                             'which does not correspond to the vector form ' +
+                             'on a basis of {} elements.'.format(K))
+    return bases
+
+
+def _projected_nodes(kernels, K, system_type):
+    """
+    Returns, for each order, the walk on sorted tuples of basis elements.
+
+    Each node is given as a tuple ``(depth, element, coeffs)``, where `depth`
+    is the number of projections in the product (the last one being that on
+    basis element `element`), and `coeffs` are the coefficients of the
+    products of this product with the projections on elements
+    ``element, ..., K-1``, or None if the node is not a leaf. Nodes are given
+    in depth-first order, which is the order of the kernel coefficients.
+    """
+
+    if system_type in _STRING_HAMMERSTEIN:
+        return None
+
+    nodes = dict()
+    for n, h in kernels.items():
+        m = K[n-1]
+        index = [0]
+        nodes[n] = []
+
+        def _walk(first, depth):
+            coeffs = None
+            if depth == n-1:
+                coeffs = h[index[0]:index[0]+m-first]
+                index[0] += m - first
+            nodes[n].append((depth, first, coeffs))
+            if depth < n-1:
+                for element in range(first, m):
+                    _walk(element, depth+1)
+
+        _walk(0, 0)
+    return nodes
+
+
+def _projected_output(signal, kernels, N, bases, nodes, system_type):
+    """Returns the output of each homogeneous order on orthogonal bases."""
+
+    dtype = np.result_type(signal, *kernels.values(), float)
+    output_by_order = np.zeros((N,) + signal.shape, dtype=dtype)
+
+    if system_type in _STRING_HAMMERSTEIN:
+        power = signal.astype(np.result_type(signal, float))
+        for n in range(1, N+1):
+            if n > 1:
+                power = power * signal
+            if n in kernels:
+                output_by_order[n-1] = np.dot(kernels[n],
+                                              bases[n-1].projection(power))
+        return output_by_order
+
+    projections = dict()
+    for n in sorted(kernels.keys()):
+        key = id(bases[n-1])
+        if key not in projections:
+            projections[key] = bases[n-1].projection(signal)
+        proj = projections[key]
+        work = np.empty((n,) + signal.shape, dtype=proj.dtype)
+        for depth, element, coeffs in nodes[n]:
+            if depth == 1:
+                work[1] = proj[element]
+            elif depth:
+                np.multiply(work[depth-1], proj[element], out=work[depth])
+            if coeffs is not None:
+                term = np.dot(coeffs, proj[element:])
+                if depth:
+                    term *= work[depth]
+                output_by_order[n-1] += term
+    return output_by_order
+
+
+def _volterra_output(signal, nodes, output_by_order, work, fir_work):
+    """
+    Add the output of each homogeneous order to `output_by_order`.
+
+    Array `work` has shape ``(N, L)``; its first row stores delayed inputs,
+    and row d stores the current product of d delayed inputs. Array
+    `fir_work` has shape ``(2, L)`` and is used for FIR filtering.
+    """
+
+    L = signal.shape[0]
+    for depth, delay, n, taps in nodes:
+        if depth:
+            work[0, :delay] = 0
+            work[0, delay:] = signal[:L-delay]
+            if depth == 1:
+                work[1] = work[0]
+            else:
+                np.multiply(work[depth-1], work[0], out=work[depth])
+        if taps is not None:
+            filtered = _fir_filtering(taps, signal, fir_work)
+            if depth:
+                np.multiply(work[depth], filtered, out=filtered)
+            output_by_order[n-1] += filtered
+
+
+def _hammerstein_output(signal, kernels, output_by_order, work, fir_work):
+    """Add the output of each homogeneous order to `output_by_order`."""
+
+    power = work[0]
+    power[:] = signal
+    for n in range(1, output_by_order.shape[0]+1):
+        if n > 1:
+            np.multiply(power, signal, out=power)
+        if n in kernels:
+            output_by_order[n-1] += _fir_filtering(kernels[n], power,
+                                                   fir_work)
+
+
+def _fir_filtering(taps, signal, fir_work):
+    """
+    Filter `signal` by FIR filter `taps`, using buffers `fir_work`.
+
+    Delayed and weighted inputs are accumulated one tap at a time, so that
+    the rounding of each output sample only depends on the input samples
+    (contrary to :func:`scipy.signal.lfilter` or :func:`numpy.convolve`).
+    Returned array is the first row of `fir_work`.
+    """
+
+    L = signal.shape[0]
+    filtered, tmp = fir_work[0], fir_work[1]
+    filtered.fill(0)
+    for delay, coeff in enumerate(taps):
+        if coeff == 0 or delay >= L:
+            continue
+        np.multiply(signal[:L-delay], coeff, out=tmp[delay:])
+        filtered[delay:] += tmp[delay:]
+    return filtered
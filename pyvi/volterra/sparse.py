@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Module for pruning Volterra kernels into sparse models.
+
+Identified kernels are often dominated by a small fraction of their
+coefficients. A sparse model of order n is given as a tuple
+``(indexes, values)``, where `indexes` is an integer array of shape
+``(K, n)`` of delay tuples, and `values` the corresponding K coefficients
+(i.e. the coefficients of the vector form for sorted delay tuples, see
+:mod:`pyvi.volterra.tools`). The output of a sparse model is computed by
+evaluating only the products of delayed inputs appearing in it.
+
+Functions
+---------
+prune_kernels :
+    Returns sparse models keeping only the largest kernel coefficients.
+compute_sparse_output :
+    Computes the output of a Volterra series from sparse models of kernels.
+evaluate_pruning :
+    Returns the evaluation speedup and output error due to pruning.
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+__all__ = ['prune_kernels', 'compute_sparse_output', 'evaluate_pruning']
+
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import time
+import numpy as np
+from .combinatorial_basis import _STRING_VOLTERRA, _STRING_HAMMERSTEIN
+from .simulation import (compute_output, _memory_length, _volterra_output,
+                         _time_first, _time_last)
+from .tools import _sorted_tuples
+from ..utilities.measures import evaluation_error
+from ..utilities.tools import _as_list
+
+
+#==============================================================================
+# Functions
+#==============================================================================
+
+def prune_kernels(kernels, M=None, threshold=None, energy=None,
+                  system_type='volterra'):
+    """
+    Returns sparse models keeping only the largest kernel coefficients.
+
+    Parameters
+    ----------
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of kernels in vector form, where each key is the nonlinear
+        order. See module :mod:`pyvi.volterra.tools` for more precisions.
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples); if None, it is deduced
+        from the number of coefficients of each kernel.
+    threshold : float or list(float), optional (default=None)
+        If given, only coefficients whose magnitude is greater than or equal
+        to `threshold` are kept; can be given for each order.
+    energy : float or list(float), optional (default=None)
+        If given, the fewest largest coefficients of each kernel whose energy
+        (sum of squared magnitudes) is at least `energy` times that of the
+        kernel are kept; should be between 0 and 1, and can be given for each
+        order.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Type of the system; for Hammerstein systems, coefficient of index i
+        of the kernel of order n corresponds to delay tuple ``(i,)*n``.
+
+    Returns
+    -------
+    dict(int: (numpy.ndarray, numpy.ndarray))
+        Dictionary of sparse models ``(indexes, values)``, where each key is
+        the nonlinear order; delay tuples are sorted, and given in the order
+        of the vector form.
+    """
+
+    if (threshold is None) == (energy is None):
+        raise ValueError('Exactly one of parameters `threshold` and ' +
+                         '`energy` should be given.')
+    if system_type not in _STRING_VOLTERRA | _STRING_HAMMERSTEIN:
+        raise ValueError("Unknown system_type '{}'.".format(system_type))
+    N = max(kernels.keys())
+    _M = _memory_length(kernels, N, M, system_type)
+
+    sparse_kernels = dict()
+    for n, h in kernels.items():
+        h = np.asarray(h)
+        if threshold is not None:
+            kept = np.flatnonzero(np.abs(h) >= _as_list(threshold, N)[n-1])
+        else:
+            kept = _energy_support(h, _as_list(energy, N)[n-1])
+        if system_type in _STRING_HAMMERSTEIN:
+            indexes = np.repeat(kept[:, np.newaxis], n, axis=1)
+        else:
+            indexes = _sorted_tuples(n, _M[n-1])[kept]
+        sparse_kernels[n] = (indexes, h[kept])
+    return sparse_kernels
+
+
+def compute_sparse_output(signal, sparse_kernels, by_order=False):
+    """
+    Computes the output of a Volterra series from sparse models of kernels.
+
+    Parameters
+    ----------
+    signal : array_like
+        Input signal; can be real or complex-valued. A collection of signals
+        can also be given as an array of shape ``(K, L)``, all signals being
+        processed at once.
+    sparse_kernels : dict(int: (numpy.ndarray, numpy.ndarray))
+        Dictionary of sparse models ``(indexes, values)``, where each key is
+        the nonlinear order (see :func:`prune_kernels`); missing orders are
+        considered null. Delay tuples need not be sorted, nor be unique.
+    by_order : boolean, optional (default=False)
+        If True, the output of each homogeneous order is returned separately.
+
+    Returns
+    -------
+    numpy.ndarray
+        Output signal, or array of shape ``(N, L)`` of the homogeneous orders
+        (with N the maximum nonlinear order) if `by_order` is True; for a
+        collection of signals, the first axis is that of the collection.
+
+    Notes
+    -----
+    Sparse models are first compiled into the depth-first walk used by
+    :func:`pyvi.volterra.simulation.compute_output`, restricted to the
+    products of delayed inputs that are prefixes of a kept delay tuple; the
+    cost is thus of one product per distinct prefix and of one
+    multiply-accumulate per kept coefficient (for each sample).
+    """
+
+    signal = _time_first(signal)
+    N = max(sparse_kernels.keys())
+    values = [model[1] for model in sparse_kernels.values()]
+    dtype = np.result_type(signal, *values, float)
+    output_by_order = np.zeros((N,) + signal.shape, dtype=dtype)
+
+    work = np.empty((N,) + signal.shape, dtype=np.result_type(signal, float))
+    fir_work = np.empty((2,) + signal.shape, dtype=dtype)
+    _volterra_output(signal, _sparse_nodes(sparse_kernels), output_by_order,
+                     work, fir_work)
+
+    output_by_order = _time_last(output_by_order, 1)
+    if by_order:
+        return output_by_order
+    else:
+        return np.sum(output_by_order, axis=-2)
+
+
+def evaluate_pruning(signal, kernels, sparse_kernels, M=None,
+                     system_type='volterra', nb_runs=3, db=True):
+    """
+    Returns the evaluation speedup and output error due to pruning.
+
+    Parameters
+    ----------
+    signal : array_like
+        Input signal used for the evaluation.
+    kernels : dict(int: numpy.ndarray)
+        Dictionary of (full) kernels in vector form.
+    sparse_kernels : dict(int: (numpy.ndarray, numpy.ndarray))
+        Dictionary of sparse models of the kernels (see
+        :func:`prune_kernels`).
+    M : int or list(int), optional (default=None)
+        Memory length for each kernels (in samples); if None, it is deduced
+        from the number of coefficients of each kernel.
+    system_type : {'volterra', 'hammerstein'}, optional (default='volterra')
+        Type of the system.
+    nb_runs : int, optional (default=3)
+        Number of runs of each simulation; the fastest one is kept.
+    db : boolean, optional (default=True)
+        Whether the output error is given in dB or not.
+
+    Returns
+    -------
+    dict(str: float)
+        Dictionary with keys 'nb_coeff' and 'nb_kept' (total number of
+        coefficients of the full and sparse kernels), 'speedup' (ratio of
+        the computation time of :func:`compute_output` on that of
+        :func:`compute_sparse_output`) and 'error' (relative RMS error on
+        the output, see :func:`pyvi.utilities.measures.evaluation_error`).
+    """
+
+    def _timed(func, *args, **kwargs):
+        durations = []
+        for run in range(nb_runs):
+            start = time.perf_counter()
+            output = func(*args, **kwargs)
+            durations.append(time.perf_counter() - start)
+        return output, min(durations)
+
+    output, duration = _timed(compute_output, signal, kernels, M=M,
+                              system_type=system_type)
+    output_sparse, duration_sparse = _timed(compute_sparse_output, signal,
+                                            sparse_kernels)
+    return {'nb_coeff': sum(len(h) for h in kernels.values()),
+            'nb_kept': sum(len(model[1])
+                           for model in sparse_kernels.values()),
+            'speedup': duration / duration_sparse,
+            'error': evaluation_error(output, output_sparse, db=db)}
+
+
+def _energy_support(h, energy):
+    """Returns the indexes of the fewest coefficients with given energy."""
+
+    if not 0 <= energy <= 1:
+        raise ValueError('Parameter `energy` should be between 0 and 1 ' +
+                         '(got {}).'.format(energy))
+    squared = np.abs(h)**2
+    order = np.argsort(-squared, kind='mergesort')
+    cumulated = np.cumsum(squared[order])
+    if not len(h) or cumulated[-1] == 0:
+        return np.zeros((0,), dtype=int)
+    nb_kept = np.searchsorted(cumulated, energy * cumulated[-1]) + 1
+    return np.sort(order[:min(nb_kept, len(h))])
+
+
+def _sparse_nodes(sparse_kernels):
+    """
+    Returns the walk on delay tuples of sparse models.
+
+    Nodes are as in :func:`pyvi.volterra.simulation._volterra_nodes`, but
+    only prefixes of kept delay tuples (and their own prefixes) are walked
+    through, in lexicographic order; the coefficients of delay tuples
+    sharing all but their last delay are gathered in the taps of the node of
+    their common prefix.
+    """
+
+    taps = dict()
+    for n, (indexes, values) in sparse_kernels.items():
+        indexes = np.sort(np.reshape(indexes, (-1, n)), axis=1)
+        for index, value in zip(indexes, values):
+            if value == 0:
+                continue
+            prefix = tuple(int(k) for k in index[:-1])
+            if prefix not in taps:
+                taps[prefix] = dict()
+            delay = int(index[-1])
+            taps[prefix][delay] = taps[prefix].get(delay, 0) + value
+
+    prefixes = set(taps.keys())
+    for prefix in taps.keys():
+        prefixes.update(prefix[:depth] for depth in range(len(prefix)))
+
+    dtype = np.result_type(*[model[1] for model in sparse_kernels.values()])
+    nodes = []
+    for prefix in sorted(prefixes):
+        depth = len(prefix)
+        node_taps = None
+        if prefix in taps:
+            node_taps = np.zeros((max(taps[prefix].keys())+1,), dtype=dtype)
+            for delay, value in taps[prefix].items():
+                node_taps[delay] = value
+        nodes.append((depth, prefix[-1] if depth else 0, depth+1, node_taps))
+    return nodes
@@ -268,3 +268,24 @@ def kernel2vec(kernel, form=None):
         current_ind += 1
 
     return vec
+
+
+def _sorted_tuples(n, m):
+    """
+    Returns all sorted tuples of n indexes lower than m.
+
+    Tuples are given as an array of shape ``(binomial(m+n-1, n), n)``, in
+    the order of :func:`itertools.combinations_with_replacement`.
+    """
+
+    # Each tuple of length d is extended by all indexes greater than or equal
+    # to its last one, which keeps the lexicographic order
+    tuples = np.arange(m)[:, np.newaxis]
+    for d in range(1, n):
+        nb_next = m - tuples[:, -1]
+        starts = np.cumsum(nb_next) - nb_next
+        last = np.repeat(tuples[:, -1] - starts, nb_next) + \
+            np.arange(np.sum(nb_next))
+        tuples = np.concatenate((np.repeat(tuples, nb_next, axis=0),
+                                 last[:, np.newaxis]), axis=1)
+    return tuples
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/identification/diagnostics.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import itertools as itr
+import unittest
+import numpy as np
+from pyvi.identification.diagnostics import IdentificationDiagnostics, _energy
+from pyvi.identification.methods import direct_method
+from pyvi.volterra.combinatorial_basis import compute_combinatorial_basis
+from pyvi.utilities.measures import evaluation_error
+import tests.identification.test_methods as test_methods
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class _DiagnosticsTest():
+
+    solvers = {'LS', 'QR'}
+    keys = {(1,), (2,), (3,), (4,)}
+    rtol_error = 1e-10
+
+    def _identification(self):
+        list_kernels_est = dict()
+        self.list_diagnostics = dict()
+        for solver, cast_mode in itr.product(self.solvers, self.cast_modes):
+            kernels, diagnostics = \
+                self.method(self.input_sig, self.output_data, self.N,
+                            solver=solver, cast_mode=cast_mode,
+                            diagnostics=True, **self.kwargs)
+            list_kernels_est[(solver, cast_mode)] = kernels
+            self.list_diagnostics[(solver, cast_mode)] = diagnostics
+        return list_kernels_est
+
+    def _fitted_output_ref(self):
+        return self.output_data
+
+    def test_type(self):
+        for key, diagnostics in self.list_diagnostics.items():
+            with self.subTest(i=key):
+                self.assertIsInstance(diagnostics, IdentificationDiagnostics)
+
+    def test_keys(self):
+        for key, diagnostics in self.list_diagnostics.items():
+            with self.subTest(i=key):
+                for attr in ['residual_energy', 'output_energy', 'rank',
+                             'condition', 'solver_info']:
+                    self.assertSetEqual(set(getattr(diagnostics, attr)),
+                                        self.keys)
+
+    def test_relative_error(self):
+        for key, diagnostics in self.list_diagnostics.items():
+            for system, error in diagnostics.relative_error(db=False).items():
+                with self.subTest(i=(key, system)):
+                    self.assertLess(error, self.rtol_error)
+
+    def test_rank(self):
+        for key, diagnostics in self.list_diagnostics.items():
+            for system, rank in diagnostics.rank.items():
+                with self.subTest(i=(key, system)):
+                    self.assertEqual(rank, sum(self.length[n-1]
+                                               for n in system))
+
+    def test_condition(self):
+        for key, diagnostics in self.list_diagnostics.items():
+            for system, cond in diagnostics.condition.items():
+                with self.subTest(i=(key, system)):
+                    self.assertTrue(1 <= cond < np.inf)
+
+    def test_fitted_output(self):
+        ref = self._fitted_output_ref()
+        for key, diagnostics in self.list_diagnostics.items():
+            fitted = diagnostics.fitted_output
+            if isinstance(ref, dict):
+                list_pairs = [(ref[term], fitted[term]) for term in ref]
+            else:
+                list_pairs = [(ref, fitted)]
+            for ind, (val_ref, val) in enumerate(list_pairs):
+                # Fitted data scale with the output, unlike kernels
+                atol = self.atol * max(np.max(np.abs(val_ref)), 1.)
+                with self.subTest(i=(key, ind)):
+                    self.assertTrue(np.allclose(val, val_ref, rtol=0,
+                                                atol=atol))
+
+
+class DirectMethodDiagnosticsTest(_DiagnosticsTest,
+                                  test_methods.DirectMethodTest):
+
+    keys = {(1, 2, 3, 4)}
+
+
+class OrderMethodDiagnosticsTest(_DiagnosticsTest,
+                                 test_methods.OrderMethodTest):
+    pass
+
+
+class TermMethodDiagnosticsTest(_DiagnosticsTest, test_methods.TermMethodTest):
+    pass
+
+
+class IterMethodDiagnosticsTest(_DiagnosticsTest, test_methods.IterMethodTest):
+
+    def _fitted_output_ref(self):
+        return self.output_data[:self.N+1]
+
+    def test_output_energy(self):
+        phi = compute_combinatorial_basis(self.input_sig, self.N,
+                                          sorted_by='term', **self.kwargs)
+        for (solver, cast_mode), diagnostics in self.list_diagnostics.items():
+            for n in range(1, self.N+1):
+                # Noiseless deflated phases are the contributions of order n
+                energy = _energy(np.dot(phi[(n, 0)], self.kernels_vec[n]),
+                                 cast_mode)
+                if n == 2:
+                    energy += _energy(2 * np.dot(phi[(2, 1)],
+                                                 self.kernels_vec[2]),
+                                      cast_mode, True)
+                with self.subTest(i=(solver, cast_mode, n)):
+                    self.assertTrue(np.isclose(
+                        diagnostics.output_energy[(n,)], energy, rtol=1e-8,
+                        atol=0))
+
+
+class PhaseMethodDiagnosticsTest(_DiagnosticsTest,
+                                 test_methods.PhaseMethodTest):
+
+    keys = {(1, 3), (2, 4)}
+
+    def _fitted_output_ref(self):
+        return self.output_data[:self.N+1]
+
+
+class NoisyDiagnosticsTest(unittest.TestCase):
+
+    N = 3
+    L = 300
+    M = 4
+    sigma_noise = 0.1
+    rtol = 1e-10
+
+    def setUp(self):
+        kernels_vec, _ = test_methods.generate_kernels(self.N, M=self.M)
+        self.input_sig = np.random.normal(size=(self.L,))
+        self.output_sig = test_methods.generate_output(self.input_sig,
+                                                       kernels_vec, self.N,
+                                                       M=self.M)
+        self.output_sig += self.sigma_noise * np.random.normal(size=(self.L,))
+        self.kernels, self.diagnostics = direct_method(
+            self.input_sig, self.output_sig, self.N, M=self.M,
+            diagnostics=True)
+        self.output_est = test_methods.generate_output(self.input_sig,
+                                                       self.kernels, self.N,
+                                                       M=self.M)
+
+    def test_fitted_output_is_simulated_output(self):
+        self.assertTrue(np.allclose(self.diagnostics.fitted_output,
+                                    self.output_est, rtol=self.rtol, atol=0))
+
+    def test_residual_energy(self):
+        energy = np.sum((self.output_sig - self.output_est)**2)
+        result = self.diagnostics.residual_energy[tuple(range(1, self.N+1))]
+        self.assertTrue(np.isclose(result, energy, rtol=self.rtol, atol=0))
+
+    def test_relative_error_is_evaluation_error(self):
+        for db in [True, False]:
+            with self.subTest(i=db):
+                error = evaluation_error(self.output_sig, self.output_est,
+                                         db=db)
+                result = list(self.diagnostics.relative_error(db=db).values())
+                self.assertTrue(np.isclose(result[0], error, rtol=1e-8,
+                                           atol=0))
+
+    def test_same_kernels_as_without_diagnostics(self):
+        kernels = direct_method(self.input_sig, self.output_sig, self.N,
+                                M=self.M)
+        for n, h in kernels.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.all(h == self.kernels[n]))
+
+    def test_given_phi(self):
+        phi = compute_combinatorial_basis(self.input_sig, self.N, M=self.M)
+        _, diagnostics = direct_method(self.input_sig, self.output_sig, self.N,
+                                       M=self.M, phi=phi, diagnostics=True)
+        self.assertTrue(np.allclose(diagnostics.fitted_output,
+                                    self.diagnostics.fitted_output,
+                                    rtol=self.rtol, atol=0))
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/identification/low_rank.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import unittest
+import numpy as np
+from pyvi.identification.low_rank import cp_method
+from pyvi.volterra.simulation import compute_output, compute_cp_output
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class CPMethodTest(unittest.TestCase):
+
+    N = 3
+    M = 6
+    L = 500
+    rank = 1
+    seed = 0
+    atol_error = 1e-8
+
+    def setUp(self):
+        self.cp_kernels = {1: (np.ones((1,)),
+                               np.random.normal(size=(1, 1, self.M)))}
+        for n in range(2, self.N+1):
+            filters = np.random.normal(size=(self.rank, n, self.M))
+            self.cp_kernels[n] = (np.ones((self.rank,)),
+                                  filters / np.sqrt(self.M))
+        self.input_sig = np.random.normal(size=(self.L,))
+        self.output_sig = compute_cp_output(self.input_sig, self.cp_kernels)
+        self.kernels, self.error = cp_method(self.input_sig, self.output_sig,
+                                             self.N, self.M, rank=self.rank,
+                                             seed=self.seed, return_error=True)
+
+    def test_error(self):
+        self.assertLess(self.error, self.atol_error)
+
+    def test_returned_error(self):
+        output_est = compute_cp_output(self.input_sig, self.kernels)
+        error = np.linalg.norm(output_est - self.output_sig) / \
+            np.linalg.norm(self.output_sig)
+        self.assertAlmostEqual(error, self.error)
+
+    def test_shapes(self):
+        for n, (weights, filters) in self.kernels.items():
+            R = 1 if n == 1 else self.rank
+            with self.subTest(i=n):
+                self.assertEqual(weights.shape, (R,))
+                self.assertEqual(filters.shape, (R, n, self.M))
+                self.assertTrue(np.allclose(np.linalg.norm(filters, axis=2),
+                                            1.))
+
+    def test_vec_form(self):
+        kernels_vec = cp_method(self.input_sig, self.output_sig, self.N,
+                                self.M, rank=self.rank, seed=self.seed,
+                                out_form='vec')
+        output_vec = compute_output(self.input_sig, kernels_vec, M=self.M)
+        output_cp = compute_cp_output(self.input_sig, self.kernels)
+        self.assertTrue(np.allclose(output_vec, output_cp, rtol=0,
+                                    atol=1e-10))
+
+    def test_seed(self):
+        kernels = cp_method(self.input_sig, self.output_sig, self.N, self.M,
+                            rank=self.rank, seed=self.seed)
+        for n, (weights, filters) in kernels.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.array_equal(weights, self.kernels[n][0]))
+                self.assertTrue(np.array_equal(filters, self.kernels[n][1]))
+
+
+class CPMethodLargeMemoryTest(unittest.TestCase):
+
+    N = 3
+    M = 100
+    L = 2000
+    max_iter = 30
+
+    def test_wiener_system(self):
+        taps = np.random.normal(size=(self.M,)) / np.sqrt(self.M)
+        cp_kernels = {n: (np.ones((1,)), np.tile(taps, (1, n, 1)))
+                      for n in range(1, self.N+1)}
+        input_sig = np.random.normal(size=(self.L,))
+        output_sig = compute_cp_output(input_sig, cp_kernels)
+        _, error = cp_method(input_sig, output_sig, self.N, self.M, seed=0,
+                             max_iter=self.max_iter, return_error=True)
+        _, linear_error = cp_method(input_sig, output_sig, 1, self.M,
+                                    return_error=True)
+        self.assertLess(error, 2e-2)
+        self.assertLess(error, 0.1 * linear_error)
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
@@ -14,14 +14,17 @@ Developed for Python 3.6
 
 import itertools as itr
 import unittest
+from unittest import mock
 import numpy as np
+import pyvi.identification.methods as methods
 from pyvi.identification.methods import (direct_method, order_method,
                                          term_method, iter_method,
                                          phase_method)
 from pyvi.separation.methods import HPS, PS
 from pyvi.volterra.combinatorial_basis import (_check_parameters,
-                                               _compute_list_nb_coeff,
-                                               compute_combinatorial_basis)
+                                               _compute_list_nb_coeff)
+from pyvi.volterra.simulation import (compute_output,
+                                      compute_projected_output)
 from pyvi.utilities.orthogonal_basis import LaguerreBasis
 
 
@@ -36,9 +39,10 @@ class DirectMethodTest(unittest.TestCase):
     rtol = 0
     atol = 1e-12
     method = staticmethod(direct_method)
-    solvers = {'LS', 'QR'}
+    solvers = {'LS', 'QR', 'sketch', 'tsqr'}
     cast_modes = {'real', 'imag', 'real-imag'}
     sigma = 1.
+    seed = None
 
     def _set_kwargs(self):
         return {'M': 3}
@@ -58,7 +62,8 @@ class DirectMethodTest(unittest.TestCase):
         for solver, cast_mode in itr.product(self.solvers, self.cast_modes):
             list_kernels_est[(solver, cast_mode)] = \
                 self.method(self.input_sig, self.output_data, self.N,
-                            solver=solver, cast_mode=cast_mode, **self.kwargs)
+                            solver=solver, cast_mode=cast_mode, seed=self.seed,
+                            **self.kwargs)
         return list_kernels_est
 
     def setUp(self):
@@ -143,6 +148,129 @@ class PhaseMethodTest(IterMethodTest):
     method = staticmethod(phase_method)
 
 
+class DirectMethodSketchTest(DirectMethodTest):
+
+    L = 1000
+    solvers = {'sketch'}
+    atol = 1e-10
+    seed = 0
+
+
+class OrderMethodSketchTest(OrderMethodTest, DirectMethodSketchTest):
+    pass
+
+
+class TermMethodSketchTest(TermMethodTest, DirectMethodSketchTest):
+    pass
+
+
+class IterMethodSketchTest(IterMethodTest, DirectMethodSketchTest):
+    pass
+
+
+class PhaseMethodSketchTest(PhaseMethodTest, DirectMethodSketchTest):
+    pass
+
+
+class _ThreadedTest():
+
+    solvers = {'LS', 'QR'}
+    n_jobs = 2
+
+    def _identification(self):
+        list_kernels_est = dict()
+        for solver, cast_mode in itr.product(self.solvers, self.cast_modes):
+            list_kernels_est[(solver, cast_mode)] = \
+                self.method(self.input_sig, self.output_data, self.N,
+                            solver=solver, cast_mode=cast_mode,
+                            n_jobs=self.n_jobs, **self.kwargs)
+        return list_kernels_est
+
+
+class _SolverByOrderTest(_ThreadedTest):
+
+    solvers = [{1: 'QR', 2: 'tsqr', 4: 'QR'}]
+
+    def _identification(self):
+        list_kernels_est = dict()
+        for cast_mode in self.cast_modes:
+            list_kernels_est[cast_mode] = \
+                self.method(self.input_sig, self.output_data, self.N,
+                            solver=self.solvers[0], cast_mode=cast_mode,
+                            n_jobs=self.n_jobs, **self.kwargs)
+        return list_kernels_est
+
+    def test_serial_solvers(self):
+        list_n_jobs = []
+        original_solver = methods._solver
+
+        def solver(*args, **kwargs):
+            list_n_jobs.append(kwargs['n_jobs'])
+            return original_solver(*args, **kwargs)
+
+        with mock.patch.object(methods, '_solver', solver):
+            self.method(self.input_sig, self.output_data, self.N,
+                        solver=self.solvers[0], n_jobs=self.n_jobs,
+                        **self.kwargs)
+        self.assertEqual(list_n_jobs, [None]*self.N)
+
+
+class _AutoSolverTest():
+
+    solvers = {'auto'}
+    seed = 0
+    info_keys = {(1,), (2,), (3,), (4,)}
+
+    def test_solver_info(self):
+        _, diagnostics = self.method(self.input_sig, self.output_data,
+                                     self.N, solver='auto', seed=self.seed,
+                                     diagnostics=True, **self.kwargs)
+        solver_info = diagnostics.solver_info
+        self.assertSetEqual(set(solver_info.keys()), self.info_keys)
+        for key, info in solver_info.items():
+            with self.subTest(i=key):
+                self.assertIn(info['solver'], {'QR', 'cholesky', 'sketch'})
+                self.assertEqual(info['regularization'], 0.)
+
+
+class DirectMethodAutoSolverTest(_AutoSolverTest, DirectMethodTest):
+
+    info_keys = {(1, 2, 3, 4)}
+
+
+class OrderMethodAutoSolverTest(_AutoSolverTest, OrderMethodTest):
+    pass
+
+
+class TermMethodAutoSolverTest(_AutoSolverTest, TermMethodTest):
+    pass
+
+
+class IterMethodAutoSolverTest(_AutoSolverTest, IterMethodTest):
+    pass
+
+
+class PhaseMethodAutoSolverTest(_AutoSolverTest, PhaseMethodTest):
+
+    info_keys = {(1, 3), (2, 4)}
+
+
+class OrderMethodThreadedTest(_ThreadedTest, OrderMethodTest):
+    pass
+
+
+class TermMethodThreadedTest(_ThreadedTest, TermMethodTest):
+    pass
+
+
+class OrderMethodSolverByOrderTest(_SolverByOrderTest, OrderMethodTest):
+    pass
+
+
+class TermMethodSolverByOrderTest(_SolverByOrderTest, TermMethodTest):
+    pass
+
+
 class DirectMethod_ListM_Test(DirectMethodTest):
 
     def _set_kwargs(self):
@@ -293,23 +421,31 @@ class HammersteinWarningTest(unittest.TestCase):
                          system_type='hammerstein')
 
 
+class SolverByOrderErrorTest(unittest.TestCase):
+
+    def test_error(self):
+        input_sig = np.random.normal(size=(100,))
+        output_by_phase = np.random.normal(size=(3, 100))
+        for method, output_data in [(direct_method, input_sig),
+                                    (iter_method, output_by_phase),
+                                    (phase_method, output_by_phase)]:
+            with self.subTest(i=method.__name__):
+                self.assertRaises(ValueError, method, input_sig, output_data,
+                                  2, M=3, solver={1: 'QR'})
+
+
 #==============================================================================
 # Functions
 #==============================================================================
 
 def generate_output(input_sig, kernels_vec, N, M=None, orthogonal_basis=None,
                     system_type='volterra', by_order=False):
-    phi = compute_combinatorial_basis(input_sig, N, system_type=system_type,
-                                      M=M, orthogonal_basis=orthogonal_basis,
-                                      sorted_by='order')
-    L = phi[1].shape[0]
-    output_by_order = np.zeros((N, L))
-    for n in range(N):
-        output_by_order[n, :] = np.dot(phi[n+1], kernels_vec[n+1])
-    if by_order:
-        return output_by_order
-    else:
-        return np.sum(output_by_order, axis=0)
+    if orthogonal_basis is None:
+        return compute_output(input_sig, kernels_vec, M=M,
+                              system_type=system_type, by_order=by_order)
+    return compute_projected_output(input_sig, kernels_vec, orthogonal_basis,
+                                    system_type=system_type,
+                                    by_order=by_order)
 
 
 def generate_kernels(N, M=None, orthogonal_basis=None, system_type='volterra'):
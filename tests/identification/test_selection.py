@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/identification/selection.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import itertools as itr
+import unittest
+import numpy as np
+from pyvi.identification.selection import (regularization_path,
+                                           cross_validation,
+                                           model_order_selection)
+from pyvi.identification.methods import direct_method, order_method
+from pyvi.volterra.combinatorial_basis import compute_combinatorial_basis
+from pyvi.utilities.measures import evaluation_error
+from tests.identification.test_methods import generate_kernels, generate_output
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class _SelectionTest():
+
+    N = 3
+    L = 200
+    atol = 1e-10
+    method = 'direct'
+    ref_method = staticmethod(direct_method)
+    by_order = False
+
+    def _set_kwargs(self):
+        return {'M': 4}
+
+    def _generate_data(self):
+        self.kwargs = self._set_kwargs()
+        self.kernels_vec, _ = generate_kernels(self.N, **self.kwargs)
+        self.input_sig = np.random.normal(size=(self.L,))
+        self.output_data = generate_output(self.input_sig, self.kernels_vec,
+                                           self.N, by_order=self.by_order,
+                                           **self.kwargs)
+        self.output_data += 0.1 * np.random.normal(size=self.output_data.shape)
+        self.systems = self._systems()
+
+    def _systems(self):
+        phi = compute_combinatorial_basis(self.input_sig, self.N,
+                                          **self.kwargs)
+        if self.by_order:
+            return [(phi[n], self.output_data[n-1])
+                    for n in range(1, self.N+1)]
+        else:
+            mat = np.concatenate([phi[n] for n in range(1, self.N+1)], axis=1)
+            return [(mat, self.output_data)]
+
+
+class RegularizationPathTest(_SelectionTest, unittest.TestCase):
+
+    decomposition = 'svd'
+    lambdas = [0., 1e-3, 1e-1, 1., 10.]
+
+    def setUp(self):
+        self._generate_data()
+        self.kernels, self.scores = regularization_path(
+            self.input_sig, self.output_data, self.N, self.lambdas,
+            method=self.method, decomposition=self.decomposition,
+            **self.kwargs)
+
+    def _ridge_solutions(self, A, y):
+        P = A.shape[1]
+        gram = np.dot(A.T, A)
+        return [np.linalg.solve(gram + lam * np.eye(P), np.dot(A.T, y))
+                for lam in self.lambdas]
+
+    def _kernels_as_vec(self, ind):
+        return [np.concatenate([self.kernels[n][ind]
+                                for n in range(1, self.N+1)])]
+
+    def test_shapes(self):
+        nb_lambda = len(self.lambdas)
+        for n, h in self.kernels.items():
+            with self.subTest(i=n):
+                self.assertEqual(h.shape[0], nb_lambda)
+        for key in ('residual_norm', 'solution_norm', 'gcv'):
+            with self.subTest(i=key):
+                self.assertEqual(self.scores[key].shape[-1], nb_lambda)
+
+    def test_zero_lambda_is_least_squares(self):
+        kernels_ls = self.ref_method(self.input_sig, self.output_data, self.N,
+                                     **self.kwargs)
+        for n, h in kernels_ls.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.allclose(self.kernels[n][0], h, rtol=0,
+                                            atol=self.atol))
+
+    def test_correct_ridge_solutions(self):
+        for ind_sys, (A, y) in enumerate(self.systems):
+            solutions = self._ridge_solutions(A, y)
+            for ind, x in enumerate(solutions):
+                if self.by_order:
+                    x_est = self.kernels[ind_sys+1][ind]
+                else:
+                    x_est = self._kernels_as_vec(ind)[0]
+                with self.subTest(i=(ind_sys, ind)):
+                    self.assertTrue(np.allclose(x_est, x, rtol=0,
+                                                atol=self.atol))
+
+    def test_correct_scores(self):
+        for ind_sys, (A, y) in enumerate(self.systems):
+            L, P = A.shape
+            for ind, (lam, x) in enumerate(zip(self.lambdas,
+                                               self._ridge_solutions(A, y))):
+                hat = np.dot(A, np.linalg.solve(np.dot(A.T, A) +
+                                                lam * np.eye(P), A.T))
+                res = np.linalg.norm(y - np.dot(A, x))
+                gcv = L * res**2 / (L - np.trace(hat))**2
+                if self.by_order:
+                    scores = {key: val[ind_sys, ind]
+                              for key, val in self.scores.items()
+                              if key != 'best_lambda'}
+                else:
+                    scores = {key: val[ind]
+                              for key, val in self.scores.items()
+                              if key != 'best_lambda'}
+                with self.subTest(i=(ind_sys, ind)):
+                    self.assertTrue(np.isclose(scores['residual_norm'], res))
+                    self.assertTrue(np.isclose(scores['solution_norm'],
+                                               np.linalg.norm(x)))
+                    self.assertTrue(np.isclose(scores['gcv'], gcv))
+
+    def test_best_lambda(self):
+        ind = np.argmin(self.scores['gcv'], axis=-1)
+        self.assertTrue(np.all(self.scores['best_lambda'] ==
+                               np.array(self.lambdas)[ind]))
+
+    def test_wrong_decomposition_error(self):
+        self.assertRaises(ValueError, regularization_path, self.input_sig,
+                          self.output_data, self.N, self.lambdas,
+                          method=self.method, decomposition='',
+                          **self.kwargs)
+
+
+class RegularizationPathOrderTest(RegularizationPathTest):
+
+    method = 'order'
+    ref_method = staticmethod(order_method)
+    by_order = True
+
+
+class RegularizationPathGramTest(RegularizationPathTest):
+
+    decomposition = 'gram'
+    atol = 1e-8
+
+
+class RegularizationPathOrderGramTest(RegularizationPathOrderTest):
+
+    decomposition = 'gram'
+    atol = 1e-8
+
+
+class CrossValidationTest(_SelectionTest, unittest.TestCase):
+
+    nb_folds = 4
+    lam = 0.
+
+    def setUp(self):
+        self._generate_data()
+        self.errors, self.kernels = cross_validation(
+            self.input_sig, self.output_data, self.N, nb_folds=self.nb_folds,
+            method=self.method, lam=self.lam, return_kernels=True,
+            **self.kwargs)
+
+    def _naive_cross_validation(self):
+        bounds = np.linspace(0, self.L, self.nb_folds+1).astype(int)
+        errors = []
+        kernels = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            mask = np.ones((self.L,), dtype=bool)
+            mask[start:end] = False
+            output_ref = 0
+            output_est = 0
+            vec_list = []
+            for A, y in self.systems:
+                P = A.shape[1]
+                gram = np.dot(A[mask].T, A[mask]) + self.lam * np.eye(P)
+                vec = np.linalg.solve(gram, np.dot(A[mask].T, y[mask]))
+                output_ref = output_ref + y[~mask]
+                output_est = output_est + np.dot(A[~mask], vec)
+                vec_list.append(vec)
+            errors.append(evaluation_error(output_ref, output_est))
+            kernels.append(np.concatenate(vec_list))
+        return np.array(errors), kernels
+
+    def test_correct_errors(self):
+        errors, _ = self._naive_cross_validation()
+        self.assertTrue(np.allclose(self.errors, errors, rtol=1e-6, atol=0))
+
+    def test_correct_kernels(self):
+        _, kernels = self._naive_cross_validation()
+        for ind, vec in enumerate(kernels):
+            vec_est = np.concatenate([self.kernels[ind][n]
+                                      for n in range(1, self.N+1)])
+            with self.subTest(i=ind):
+                self.assertTrue(np.allclose(vec_est, vec, rtol=0,
+                                            atol=self.atol))
+
+    def test_shapes(self):
+        self.assertEqual(self.errors.shape, (self.nb_folds,))
+        self.assertEqual(len(self.kernels), self.nb_folds)
+
+    def test_wrong_nb_folds_error(self):
+        self.assertRaises(ValueError, cross_validation, self.input_sig,
+                          self.output_data, self.N, nb_folds=1,
+                          method=self.method, **self.kwargs)
+
+
+class CrossValidationOrderTest(CrossValidationTest):
+
+    method = 'order'
+    by_order = True
+
+
+class CrossValidationRegularizedTest(CrossValidationTest):
+
+    lam = 0.5
+
+
+class ModelOrderSelectionTest(_SelectionTest, unittest.TestCase):
+
+    N = 3
+    M = 4
+    L = 300
+    criteria = ['aic', 'bic', 'validation']
+
+    def setUp(self):
+        self._generate_data()
+        input_val = np.random.normal(size=(self.L,))
+        output_val = generate_output(input_val, self.kernels_vec, self.N,
+                                     by_order=self.by_order, **self.kwargs)
+        self.validation_data = (input_val, output_val)
+        self.results = dict()
+        for criterion in self.criteria:
+            self.results[criterion] = model_order_selection(
+                self.input_sig, self.output_data, self.N, M_max=self.M,
+                method=self.method, criterion=criterion,
+                validation_data=self.validation_data)
+
+    def _set_kwargs(self):
+        return {'M': self.M}
+
+    def _brute_force_kernels(self, N, M):
+        if self.by_order:
+            return self.ref_method(self.input_sig, self.output_data[:N], N,
+                                   M=M)
+        else:
+            return self.ref_method(self.input_sig, self.output_data, N, M=M)
+
+    def _brute_force_criterion(self, N, M, criterion):
+        kernels = self._brute_force_kernels(N, M)
+        if criterion == 'validation':
+            input_sig, output_data = self.validation_data
+        else:
+            input_sig, output_data = self.input_sig, self.output_data
+        output_est = generate_output(input_sig, kernels, N, M=M,
+                                     by_order=self.by_order)
+        if self.by_order:
+            output_data, output_est = output_data[N-1], output_est[N-1]
+        if criterion == 'validation':
+            return evaluation_error(output_data, output_est)
+        nb_param = sum(h.size for n, h in kernels.items()
+                       if not self.by_order or n == N)
+        rss = np.sum((output_data - output_est)**2)
+        penalty = 2 if criterion == 'aic' else np.log(self.L)
+        return self.L * np.log(rss / self.L) + penalty * nb_param
+
+    def test_shapes(self):
+        for criterion, (table, _) in self.results.items():
+            with self.subTest(i=criterion):
+                self.assertEqual(table.shape, (self.N, self.M))
+
+    def test_correct_table(self):
+        for criterion, (table, _) in self.results.items():
+            for N, M in itr.product(range(1, self.N+1), range(1, self.M+1)):
+                value = self._brute_force_criterion(N, M, criterion)
+                with self.subTest(i=(criterion, N, M)):
+                    self.assertTrue(np.isclose(table[N-1, M-1], value,
+                                               rtol=1e-6, atol=1e-6))
+
+    def test_best_model(self):
+        table, best = self.results['bic']
+        if self.by_order:
+            self.assertEqual(best, list(np.argmin(table, axis=1) + 1))
+        else:
+            self.assertEqual(table[best[0]-1, best[1]-1], np.min(table))
+
+    def test_wrong_criterion_error(self):
+        self.assertRaises(ValueError, model_order_selection, self.input_sig,
+                          self.output_data, self.N, M_max=self.M,
+                          method=self.method, criterion='')
+
+    def test_missing_validation_data_error(self):
+        self.assertRaises(ValueError, model_order_selection, self.input_sig,
+                          self.output_data, self.N, M_max=self.M,
+                          method=self.method, criterion='validation')
+
+
+class ModelOrderSelectionOrderTest(ModelOrderSelectionTest):
+
+    method = 'order'
+    ref_method = staticmethod(order_method)
+    by_order = True
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/identification/streaming.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyvi.identification.streaming import (stream_identification,
+                                           multi_record_identification,
+                                           progressive_identification)
+from pyvi.identification.methods import direct_method, order_method
+from pyvi.volterra.combinatorial_basis import compute_combinatorial_basis
+from tests.identification.test_methods import generate_kernels, generate_output
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class StreamIdentificationTest(unittest.TestCase):
+
+    N = 3
+    L = 500
+    atol = 1e-10
+    method = 'direct'
+    ref_method = staticmethod(direct_method)
+    by_order = False
+    chunk_sizes = [50, 77, 500, 1000]
+
+    def _set_kwargs(self):
+        return {'M': 4}
+
+    def setUp(self):
+        self.kwargs = self._set_kwargs()
+        self.kernels_vec, _ = generate_kernels(self.N, **self.kwargs)
+        self.input_sig = np.random.normal(size=(self.L,))
+        self.output_data = generate_output(self.input_sig, self.kernels_vec,
+                                           self.N, by_order=self.by_order,
+                                           **self.kwargs)
+        self.kernels_ref = self.ref_method(self.input_sig, self.output_data,
+                                           self.N, solver='QR', **self.kwargs)
+
+    def _check_kernels(self, kernels_est):
+        self.assertSetEqual(set(kernels_est.keys()), set(self.kernels_ref))
+        for n, h in kernels_est.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.allclose(h, self.kernels_ref[n],
+                                            rtol=0, atol=self.atol))
+
+    def test_arrays(self):
+        for chunk_size in self.chunk_sizes:
+            with self.subTest(i=chunk_size):
+                kernels_est = stream_identification(
+                    self.input_sig, self.output_data, self.N,
+                    method=self.method, chunk_size=chunk_size, **self.kwargs)
+                self._check_kernels(kernels_est)
+
+    def test_npy_files(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            input_path = os.path.join(dirname, 'input.npy')
+            output_path = os.path.join(dirname, 'output.npy')
+            np.save(input_path, self.input_sig)
+            np.save(output_path, self.output_data)
+            kernels_est = stream_identification(
+                input_path, output_path, self.N, method=self.method,
+                chunk_size=64, **self.kwargs)
+        self._check_kernels(kernels_est)
+
+    def test_iterator_of_chunks(self):
+        bounds = [0, 3, 100, 101, 250, self.L]
+        chunks = ((self.input_sig[start:end],
+                   self.output_data[..., start:end])
+                  for start, end in zip(bounds[:-1], bounds[1:]))
+        kernels_est = stream_identification(chunks, None, self.N,
+                                            method=self.method, **self.kwargs)
+        self._check_kernels(kernels_est)
+
+    def test_not_enough_data_error(self):
+        self.assertRaises(ValueError, stream_identification,
+                          self.input_sig[:3], self.output_data[..., :3],
+                          self.N, method=self.method, **self.kwargs)
+
+    def test_misaligned_chunks_error(self):
+        chunks = [(self.input_sig[:10], self.output_data[..., :9])]
+        with self.assertRaises(ValueError):
+            stream_identification(chunks, None, self.N, method=self.method,
+                                  **self.kwargs)
+
+    def test_wrong_method_error(self):
+        self.assertRaises(ValueError, stream_identification, self.input_sig,
+                          self.output_data, self.N, method='', **self.kwargs)
+
+
+class StreamIdentificationOrderTest(StreamIdentificationTest):
+
+    method = 'order'
+    ref_method = staticmethod(order_method)
+    by_order = True
+
+
+class StreamIdentification_ListM_Test(StreamIdentificationTest):
+
+    def _set_kwargs(self):
+        return {'M': [5, 0, 3]}
+
+
+class StreamIdentificationOrder_ListM_Test(StreamIdentificationOrderTest,
+                                           StreamIdentification_ListM_Test):
+    pass
+
+
+class StreamIdentificationHammersteinTest(StreamIdentificationTest):
+
+    def _set_kwargs(self):
+        return {'M': 4, 'system_type': 'hammerstein'}
+
+
+class StreamIdentificationOrderHammersteinTest(
+        StreamIdentificationOrderTest, StreamIdentificationHammersteinTest):
+    pass
+
+
+class MultiRecordIdentificationTest(unittest.TestCase):
+
+    N = 3
+    lengths = [60, 200, 35, 150]
+    atol = 1e-10
+    method = 'direct'
+    by_order = False
+
+    def _set_kwargs(self):
+        return {'M': 4}
+
+    def setUp(self):
+        self.kwargs = self._set_kwargs()
+        self.kernels_vec, _ = generate_kernels(self.N, **self.kwargs)
+        self.records = []
+        for L in self.lengths:
+            input_sig = np.random.normal(size=(L,))
+            output_data = generate_output(input_sig, self.kernels_vec, self.N,
+                                          by_order=self.by_order,
+                                          **self.kwargs)
+            output_data += 0.01 * np.random.normal(size=output_data.shape)
+            self.records.append((input_sig, output_data))
+        self.kernels_ref = self._stacked_identification()
+
+    def _stacked_identification(self):
+        list_phi = []
+        list_out = []
+        for input_sig, output_data in self.records:
+            phi = compute_combinatorial_basis(input_sig, self.N,
+                                              **self.kwargs)
+            list_phi.append(phi)
+            list_out.append(output_data)
+        kernels = dict()
+        if self.by_order:
+            for n in range(1, self.N+1):
+                mat = np.concatenate([phi[n] for phi in list_phi], axis=0)
+                out = np.concatenate([out[n-1] for out in list_out], axis=0)
+                kernels[n] = np.linalg.lstsq(mat, out, rcond=None)[0]
+        else:
+            mat = np.concatenate(
+                [np.concatenate([phi[n] for n in range(1, self.N+1)], axis=1)
+                 for phi in list_phi], axis=0)
+            out = np.concatenate(list_out, axis=0)
+            vec = np.linalg.lstsq(mat, out, rcond=None)[0]
+            start = 0
+            for n in range(1, self.N+1):
+                nb_coeff = list_phi[0][n].shape[1]
+                kernels[n] = vec[start:start+nb_coeff]
+                start += nb_coeff
+        return kernels
+
+    def _check_kernels(self, kernels_est):
+        for n, h in kernels_est.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.allclose(h, self.kernels_ref[n],
+                                            rtol=0, atol=self.atol))
+
+    def test_correct_output(self):
+        kernels_est = multi_record_identification(self.records, self.N,
+                                                  method=self.method,
+                                                  chunk_size=64,
+                                                  **self.kwargs)
+        self._check_kernels(kernels_est)
+
+    def test_correct_output_with_processes(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            records = []
+            for ind, (input_sig, output_data) in enumerate(self.records):
+                input_path = os.path.join(dirname, 'input{}.npy'.format(ind))
+                output_path = os.path.join(dirname,
+                                           'output{}.npy'.format(ind))
+                np.save(input_path, input_sig)
+                np.save(output_path, output_data)
+                records.append((input_path, output_path))
+            kernels_est = multi_record_identification(records, self.N,
+                                                      method=self.method,
+                                                      n_jobs=2, chunk_size=64,
+                                                      **self.kwargs)
+        self._check_kernels(kernels_est)
+
+    def test_iterator_of_chunks(self):
+        input_sig, output_data = self.records[0]
+        chunks = ((input_sig[start:start+25], output_data[..., start:start+25])
+                  for start in range(0, input_sig.shape[0], 25))
+        records = [(chunks, None)] + self.records[1:]
+        kernels_est = multi_record_identification(records, self.N,
+                                                  method=self.method,
+                                                  **self.kwargs)
+        self._check_kernels(kernels_est)
+
+    def test_processes_without_paths_error(self):
+        input_sig, output_data = self.records[0]
+        chunks = iter([(input_sig, output_data)])
+        for records in [self.records, [(chunks, None)] + self.records[1:]]:
+            with self.subTest(i=type(records[0][0])):
+                self.assertRaises(ValueError, multi_record_identification,
+                                  records, self.N, method=self.method,
+                                  n_jobs=2, **self.kwargs)
+
+    def test_not_enough_data_error(self):
+        records = [(input_sig[:2], output_data[..., :2])
+                   for input_sig, output_data in self.records]
+        self.assertRaises(ValueError, multi_record_identification, records,
+                          self.N, method=self.method, **self.kwargs)
+
+
+class MultiRecordIdentificationOrderTest(MultiRecordIdentificationTest):
+
+    method = 'order'
+    by_order = True
+
+
+class ProgressiveIdentificationTest(unittest.TestCase):
+
+    N = 3
+    L = 20000
+    atol = 1e-10
+    method = 'direct'
+    by_order = False
+    chunk_size = 100
+    sigma_noise = 0.
+
+    def _set_kwargs(self):
+        return {'M': 4}
+
+    def setUp(self):
+        self.kwargs = self._set_kwargs()
+        self.kernels_vec, _ = generate_kernels(self.N, **self.kwargs)
+        self.input_sig = np.random.normal(size=(self.L,))
+        self.output_data = generate_output(self.input_sig, self.kernels_vec,
+                                           self.N, by_order=self.by_order,
+                                           **self.kwargs)
+        self.output_data += self.sigma_noise * \
+            np.random.normal(size=self.output_data.shape)
+
+    def _identification(self, **kwargs):
+        return progressive_identification(self.input_sig, self.output_data,
+                                          self.N, method=self.method,
+                                          chunk_size=self.chunk_size,
+                                          **kwargs, **self.kwargs)
+
+    def test_early_stop(self):
+        kernels_est, nb_samples = self._identification()
+        self.assertLess(nb_samples, self.L)
+        for n, h in kernels_est.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.allclose(h, self.kernels_vec[n], rtol=0,
+                                            atol=self.atol))
+
+    def test_same_as_stream_identification(self):
+        kernels_est, nb_samples = self._identification()
+        kernels_ref = stream_identification(
+            self.input_sig[:nb_samples], self.output_data[..., :nb_samples],
+            self.N, method=self.method, **self.kwargs)
+        for n, h in kernels_est.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.allclose(h, kernels_ref[n], rtol=0,
+                                            atol=self.atol))
+
+    def test_nb_samples_with_growth(self):
+        _, nb_samples = self._identification(growth=2.)
+        nb_chunks = np.log2(nb_samples / self.chunk_size + 1)
+        self.assertEqual(nb_chunks, int(nb_chunks))
+
+    def test_nb_samples_without_growth(self):
+        _, nb_samples = self._identification(growth=1.)
+        self.assertEqual(nb_samples % self.chunk_size, 0)
+
+    def test_residual_criterion(self):
+        _, nb_samples = self._identification(criterion='residual', tol=1e-2)
+        self.assertLess(nb_samples, self.L)
+
+    def test_patience(self):
+        _, nb_samples_1 = self._identification(patience=1, growth=1.)
+        _, nb_samples_3 = self._identification(patience=3, growth=1.)
+        self.assertEqual(nb_samples_3, nb_samples_1 + 2*self.chunk_size)
+
+    def test_not_converged_warning(self):
+        self.assertWarns(UserWarning, self._identification, tol=0.)
+
+    def test_wrong_criterion_error(self):
+        self.assertRaises(ValueError, self._identification, criterion='')
+
+    def test_not_enough_data_error(self):
+        self.assertRaises(ValueError, progressive_identification,
+                          self.input_sig[:5], self.output_data[..., :5],
+                          self.N, method=self.method, **self.kwargs)
+
+
+class ProgressiveIdentificationOrderTest(ProgressiveIdentificationTest):
+
+    method = 'order'
+    by_order = True
+
+
+class ProgressiveIdentificationNoisyTest(ProgressiveIdentificationTest):
+
+    atol = 0.1
+    sigma_noise = 0.01
+    chunk_size = 500
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/identification/studies.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pyvi.identification.studies import monte_carlo, separation_trial
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class MonteCarloTest(unittest.TestCase):
+
+    L = 400
+    nb_trials = 3
+    param_grid = {'N': [2, 3], 'M': [3], 'method': ['PS', 'PAS'],
+                  'noise_level': [0., 1e-3]}
+
+    def setUp(self):
+        self.input_sig = np.random.normal(size=(self.L,))
+        self.points, self.results = monte_carlo(self.param_grid,
+                                                self.nb_trials,
+                                                self.input_sig)
+
+    def test_points(self):
+        self.assertEqual(len(self.points), 8)
+        self.assertEqual(self.points[1], {'N': 2, 'M': 3, 'method': 'PS',
+                                          'noise_level': 1e-3})
+
+    def test_shapes(self):
+        for name in ['separation_error', 'identification_error']:
+            with self.subTest(i=name):
+                self.assertEqual(self.results[name].shape,
+                                 (len(self.points), self.nb_trials, 3))
+
+    def test_padding(self):
+        for ind, params in enumerate(self.points):
+            errors = self.results['separation_error'][ind]
+            with self.subTest(i=ind):
+                self.assertFalse(np.any(np.isnan(errors[:, :params['N']])))
+                self.assertTrue(np.all(np.isnan(errors[:, params['N']:])))
+
+    def test_noiseless_trials(self):
+        for ind, params in enumerate(self.points):
+            if not params['noise_level']:
+                errors = self.results['identification_error'][ind]
+                with self.subTest(i=ind):
+                    self.assertTrue(np.all(errors[:, :params['N']] < -200))
+
+    def test_parallel_is_deterministic(self):
+        _, results = monte_carlo(self.param_grid, self.nb_trials,
+                                 self.input_sig, n_jobs=2)
+        for name, val in self.results.items():
+            with self.subTest(i=name):
+                self.assertTrue(np.array_equal(results[name], val,
+                                               equal_nan=True))
+
+
+class MonteCarloCheckpointTest(unittest.TestCase):
+
+    param_grid = {'N': [1, 2, 3]}
+    nb_trials = 3
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.tmp_dir, 'study.npz')
+        self.input_sig = np.zeros((10,))
+        self.nb_calls = 0
+        self.interrupt_at = None
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _trial(self, params, input_sig, rng):
+        self.nb_calls += 1
+        if self.nb_calls == self.interrupt_at:
+            raise KeyboardInterrupt
+        return {'value': rng.normal(), 'order': np.ones((params['N'],))}
+
+    def test_resume(self):
+        self.interrupt_at = 5
+        with self.assertRaises(KeyboardInterrupt):
+            monte_carlo(self.param_grid, self.nb_trials, self.input_sig,
+                        trial=self._trial, checkpoint=self.checkpoint,
+                        checkpoint_every=2)
+        with np.load(self.checkpoint) as data:
+            self.assertEqual(np.sum(data['done']), 4)
+
+        self.interrupt_at = None
+        _, results = monte_carlo(self.param_grid, self.nb_trials,
+                                 self.input_sig, trial=self._trial,
+                                 checkpoint=self.checkpoint)
+        self.assertEqual(self.nb_calls, 5 + 5)
+        _, results_ref = monte_carlo(self.param_grid, self.nb_trials,
+                                     self.input_sig, trial=self._trial)
+        for name, val in results_ref.items():
+            with self.subTest(i=name):
+                self.assertTrue(np.array_equal(results[name], val,
+                                               equal_nan=True))
+
+    def test_other_study_error(self):
+        monte_carlo(self.param_grid, self.nb_trials, self.input_sig,
+                    trial=self._trial, checkpoint=self.checkpoint)
+        self.assertRaises(ValueError, monte_carlo, self.param_grid,
+                          self.nb_trials, self.input_sig, trial=self._trial,
+                          seed=1, checkpoint=self.checkpoint)
+
+
+class SeparationTrialTest(unittest.TestCase):
+
+    def test_unknown_method_error(self):
+        self.assertRaises(ValueError, separation_trial,
+                          {'N': 2, 'M': 3, 'method': 'HPS'},
+                          np.random.normal(size=(100,)),
+                          np.random.RandomState(0))
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
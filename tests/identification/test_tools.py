@@ -14,7 +14,10 @@ Developed for Python 3.6
 
 import unittest
 import numpy as np
-from pyvi.identification.tools import _solver, _complex2real
+from pyvi.identification.tools import (_solver, _qr_solver, _sketch_solver,
+                                       _tsqr_solver, _auto_solver,
+                                       _block_triangular_solver,
+                                       _complex2real, _complex2real_into)
 
 
 #==============================================================================
@@ -30,7 +33,7 @@ class SolverTest(unittest.TestCase):
                            [0.33, 2.]])
         self.x = np.ones((2,))
         self.y = np.dot(self.A, self.x)
-        self.list_solvers = ['LS', 'ls', 'QR', 'qr']
+        self.list_solvers = ['LS', 'ls', 'QR', 'qr', 'sketch', 'tsqr', 'auto']
 
     def test_correct_output(self):
         for solver in self.list_solvers:
@@ -46,6 +49,174 @@ class SolverTest(unittest.TestCase):
         self.assertRaises(ValueError, _solver, self.A, self.y, '')
 
 
+class SketchSolverTest(unittest.TestCase):
+
+    L = 5000
+    P = 40
+    atol = 1e-10
+
+    def setUp(self):
+        self.A = np.random.normal(size=(self.L, self.P))
+        self.y = np.random.normal(size=(self.L,))
+        self.x_ls = np.linalg.lstsq(self.A, self.y, rcond=None)[0]
+
+    def test_correct_output(self):
+        x_est = _sketch_solver(self.A, self.y, seed=0)
+        self.assertTrue(np.allclose(self.x_ls, x_est, atol=self.atol, rtol=0))
+
+    def test_reproducible(self):
+        x_est_1 = _solver(self.A, self.y, 'sketch', seed=1)
+        x_est_2 = _solver(self.A, self.y, 'sketch', seed=1)
+        self.assertTrue(np.all(x_est_1 == x_est_2))
+
+    def test_complex(self):
+        A = self.A + 1j * np.random.normal(size=(self.L, self.P))
+        x_ls = np.linalg.lstsq(A, self.y, rcond=None)[0]
+        x_est = _sketch_solver(A, self.y, seed=0)
+        self.assertTrue(np.allclose(x_ls, x_est, atol=self.atol, rtol=0))
+
+
+class TSQRSolverTest(unittest.TestCase):
+
+    L = 1000
+    P = 20
+    atol = 1e-12
+
+    def setUp(self):
+        self.A = np.random.normal(size=(self.L, self.P))
+        self.y = np.random.normal(size=(self.L,))
+        self.x_qr = _qr_solver(self.A, self.y)
+
+    def test_correct_output(self):
+        for chunk_size in [None, 21, 100, 333, self.L]:
+            with self.subTest(i=chunk_size):
+                x_est = _tsqr_solver(self.A, self.y, chunk_size=chunk_size)
+                self.assertTrue(np.allclose(self.x_qr, x_est, atol=self.atol,
+                                            rtol=0))
+
+    def test_correct_output_with_processes(self):
+        for chunk_size in [None, 21, 100]:
+            with self.subTest(i=chunk_size):
+                x_est = _tsqr_solver(self.A, self.y, n_jobs=2,
+                                     chunk_size=chunk_size)
+                self.assertTrue(np.allclose(self.x_qr, x_est, atol=self.atol,
+                                            rtol=0))
+
+    def test_deterministic(self):
+        x_serial = _tsqr_solver(self.A, self.y, chunk_size=21)
+        for n_jobs in [2, 3]:
+            with self.subTest(i=n_jobs):
+                x_est = _tsqr_solver(self.A, self.y, n_jobs=n_jobs,
+                                     chunk_size=21)
+                self.assertTrue(np.array_equal(x_serial, x_est))
+
+    def test_small_chunks(self):
+        x_est = _tsqr_solver(self.A, self.y, chunk_size=7)
+        self.assertTrue(np.allclose(self.x_qr, x_est, atol=self.atol, rtol=0))
+
+
+class AutoSolverTest(unittest.TestCase):
+
+    L = 2000
+    P = 10
+    atol = 1e-10
+
+    def setUp(self):
+        self.A = np.random.normal(size=(self.L, self.P))
+        self.y = np.random.normal(size=(self.L,))
+        self.x_ls = np.linalg.lstsq(self.A, self.y, rcond=None)[0]
+        self.small_budget = self.L * self.P
+
+    def _check(self, A, expected_solver, **kwargs):
+        y = self.y[:A.shape[0]]
+        x_ls = np.linalg.lstsq(A, y, rcond=None)[0]
+        x_est, decision = _auto_solver(A, y, seed=0, **kwargs)
+        self.assertEqual(decision['solver'], expected_solver)
+        self.assertEqual(decision['regularization'], 0.)
+        self.assertTrue(np.allclose(x_ls, x_est, atol=self.atol, rtol=0))
+
+    def test_qr(self):
+        self._check(self.A[:20*self.P], 'QR')
+
+    def test_cholesky(self):
+        self._check(self.A, 'cholesky', memory_budget=self.small_budget)
+
+    def test_sketch(self):
+        A = self.A * np.logspace(0, 5, self.P)
+        self._check(A, 'sketch', memory_budget=self.small_budget)
+
+    def test_lsqr(self):
+        self._check(self.A, 'lsqr', memory_budget=self.P**2)
+
+    def test_regularized(self):
+        A = np.concatenate((self.A, self.A[:, :1]), axis=1)
+        x_est, decision = _auto_solver(A, self.y, seed=0)
+        self.assertEqual(decision['solver'], 'regularized')
+        self.assertGreater(decision['regularization'], 0.)
+        self.assertTrue(np.all(np.isfinite(x_est)))
+        U, s, Vh = np.linalg.svd(A, full_matrices=False)
+        gains = s / (s**2 + decision['regularization'])
+        x_ridge = np.dot(Vh.T, gains * np.dot(U.T, self.y))
+        self.assertTrue(np.allclose(np.dot(A, x_est), np.dot(A, x_ridge),
+                                    atol=self.atol, rtol=0))
+
+    def test_condition_estimate(self):
+        _, decision = _auto_solver(self.A, self.y, seed=0)
+        cond = np.linalg.cond(self.A)
+        self.assertTrue(cond/10 < decision['condition'] < 10*cond)
+
+    def test_info(self):
+        info = dict()
+        _solver(self.A, self.y, 'auto', seed=0,
+                memory_budget=self.small_budget, info=info)
+        self.assertEqual(info['solver'], 'cholesky')
+        self.assertEqual(info['shape'], (self.L, self.P))
+        self.assertEqual(info['memory_budget'], self.small_budget)
+
+
+class BlockTriangularSolverTest(unittest.TestCase):
+
+    L = 50
+    col_sizes = [3, 0, 4, 2]
+    atol = 1e-12
+
+    def setUp(self):
+        nb_blocks = len(self.col_sizes)
+        self.row_blocks = []
+        dense_rows = []
+        list_y = []
+        for first in list(range(nb_blocks-1, -1, -1)) + [0]:
+            blocks = [np.random.normal(size=(self.L, size))
+                      for size in self.col_sizes[first:]]
+            y = np.random.normal(size=(self.L,))
+            self.row_blocks.append((first, np.concatenate(
+                blocks + [y[:, np.newaxis]], axis=1)))
+            zeros = [np.zeros((self.L, size))
+                     for size in self.col_sizes[:first]]
+            dense_rows.append(np.concatenate(zeros + blocks, axis=1))
+            list_y.append(y)
+        self.A = np.concatenate(dense_rows, axis=0)
+        self.y = np.concatenate(list_y, axis=0)
+        self.x_ls = np.linalg.lstsq(self.A, self.y, rcond=None)[0]
+
+    def test_correct_output(self):
+        for solver in ['LS', 'QR', 'tsqr']:
+            with self.subTest(i=solver):
+                x_est = _block_triangular_solver(self.row_blocks,
+                                                 self.col_sizes, solver)
+                self.assertTrue(np.allclose(self.x_ls, x_est, atol=self.atol,
+                                            rtol=0))
+
+    def test_row_blocks_as_generator(self):
+        x_est = _block_triangular_solver(iter(self.row_blocks),
+                                         self.col_sizes, 'QR')
+        self.assertTrue(np.allclose(self.x_ls, x_est, atol=self.atol, rtol=0))
+
+    def test_unordered_row_blocks_error(self):
+        self.assertRaises(ValueError, _block_triangular_solver,
+                          self.row_blocks[::-1], self.col_sizes, 'QR')
+
+
 class Complex2RealTest(unittest.TestCase):
 
     def setUp(self):
@@ -78,6 +249,40 @@ class Complex2RealTest(unittest.TestCase):
         self.assertWarns(UserWarning, _complex2real, self.val, cast_mode='')
 
 
+class Complex2RealIntoTest(unittest.TestCase):
+
+    factor = 3
+
+    def setUp(self):
+        self.val = np.array([1 + 2j, 3 + 4j])
+        self.real_imag = np.array([1, 3, 2, 4])
+
+    def _cast(self, cast_mode='real-imag'):
+        result = _complex2real(self.val, cast_mode=cast_mode)
+        out = np.zeros(result.shape, dtype=result.dtype)
+        returned = _complex2real_into(out, self.val, cast_mode=cast_mode,
+                                      factor=self.factor)
+        self.assertIs(returned, out)
+        return out
+
+    def test_same_as_complex2real(self):
+        for cast_mode in ['real', 'imag', 'real-imag', 'cplx']:
+            with self.subTest(i=cast_mode):
+                result = self.factor * _complex2real(self.val, cast_mode)
+                self.assertTrue(np.all(self._cast(cast_mode) == result))
+
+    def test_into_view(self):
+        out = np.zeros((4, 2))
+        _complex2real_into(out[:, 1], self.val, factor=self.factor)
+        self.assertTrue(np.all(out[:, 1] == self.factor * self.real_imag))
+        self.assertTrue(np.all(out[:, 0] == 0))
+
+    def test_warns(self):
+        out = np.zeros((4,))
+        self.assertWarns(UserWarning, _complex2real_into, out, self.val,
+                         cast_mode='')
+
+
 #==============================================================================
 # Main script
 #==============================================================================
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/identification/tracking.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import unittest
+import numpy as np
+from pyvi.identification.tracking import (SlidingWindowEstimator,
+                                          KalmanTracker)
+from pyvi.identification.streaming import _BasisStream
+from pyvi.utilities.orthogonal_basis import create_orthogonal_basis
+from pyvi.volterra.combinatorial_basis import compute_combinatorial_basis
+from tests.identification.test_methods import generate_kernels, generate_output
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class SlidingWindowEstimatorTest(unittest.TestCase):
+
+    N = 3
+    M = 4
+    L = 600
+    window = 150
+    chunk_sizes = [1, 23, 150, 600]
+    sigma_noise = 0.1
+    atol = 1e-9
+
+    def setUp(self):
+        self.input_sig = np.random.normal(size=(self.L,))
+        kernels_vec, _ = generate_kernels(self.N, M=self.M)
+        self.output_sig = generate_output(self.input_sig, kernels_vec, self.N,
+                                          M=self.M)
+        self.output_sig += self.sigma_noise * np.random.normal(size=(self.L,))
+        phi = compute_combinatorial_basis(self.input_sig, self.N, M=self.M)
+        self.mat = np.concatenate([val for n, val in sorted(phi.items())],
+                                  axis=1)
+
+    def _ref(self, end):
+        start = max(0, end - self.window)
+        mat = self.mat[start:end]
+        out = self.output_sig[start:end]
+        x = np.linalg.lstsq(mat, out, rcond=None)[0]
+        return x, np.linalg.norm(out - np.dot(mat, x))
+
+    def _est2vec(self, estimator):
+        kernels = estimator.get_kernels(out_form='vec')
+        return np.concatenate([val for n, val in sorted(kernels.items())])
+
+    def test_chunks(self):
+        for chunk_size in self.chunk_sizes:
+            estimator = SlidingWindowEstimator(self.N, self.M, self.window)
+            for start in range(0, self.L, chunk_size):
+                end = min(start + chunk_size, self.L)
+                estimator.update(self.input_sig[start:end],
+                                 self.output_sig[start:end])
+                if end < estimator.P:
+                    continue
+                x, res = self._ref(end)
+                with self.subTest(i=(chunk_size, end)):
+                    self.assertEqual(estimator.nb_rows,
+                                     min(end, self.window))
+                    self.assertTrue(np.allclose(self._est2vec(estimator), x,
+                                                rtol=0, atol=self.atol))
+                    self.assertTrue(np.isclose(estimator.residual_norm(), res,
+                                               rtol=0, atol=self.atol))
+
+    def test_update_rows(self):
+        estimator = SlidingWindowEstimator(self.N, self.M, self.window)
+        estimator.update_rows(self.mat, self.output_sig)
+        x, _ = self._ref(self.L)
+        self.assertTrue(np.allclose(self._est2vec(estimator), x, rtol=0,
+                                    atol=self.atol))
+
+    def test_no_refactorization(self):
+        estimator = SlidingWindowEstimator(self.N, self.M, self.window)
+        estimator.update(self.input_sig, self.output_sig)
+        self.assertEqual(estimator.nb_refactorizations, 0)
+
+    def test_out_form(self):
+        estimator = SlidingWindowEstimator(self.N, self.M, self.window)
+        estimator.update(self.input_sig, self.output_sig)
+        kernels = estimator.get_kernels(out_form='sym')
+        for n, h in kernels.items():
+            with self.subTest(i=n):
+                self.assertEqual(h.shape, (self.M,)*n)
+
+    def test_window_too_small(self):
+        self.assertRaises(ValueError, SlidingWindowEstimator, self.N, self.M,
+                          10)
+
+    def test_not_enough_samples(self):
+        estimator = SlidingWindowEstimator(self.N, self.M, self.window)
+        estimator.update(self.input_sig[:10], self.output_sig[:10])
+        self.assertRaises(ValueError, estimator.get_kernels)
+
+
+class SlidingWindowTimeVaryingTest(unittest.TestCase):
+
+    N = 2
+    M = 3
+    L = 1000
+    window = 200
+    atol = 1e-8
+
+    def test_tracks_last_system(self):
+        input_sig = np.random.normal(size=(self.L,))
+        kernels_1, _ = generate_kernels(self.N, M=self.M)
+        kernels_2, _ = generate_kernels(self.N, M=self.M)
+        output_1 = generate_output(input_sig, kernels_1, self.N, M=self.M)
+        output_2 = generate_output(input_sig, kernels_2, self.N, M=self.M)
+        output_sig = np.concatenate((output_1[:self.L//2],
+                                     output_2[self.L//2:]))
+        estimator = SlidingWindowEstimator(self.N, self.M, self.window)
+        estimator.update(input_sig[:self.L//2], output_sig[:self.L//2])
+        kernels = estimator.get_kernels()
+        for n, h in kernels.items():
+            with self.subTest(i=(1, n)):
+                self.assertTrue(np.allclose(h, kernels_1[n], rtol=0,
+                                            atol=self.atol))
+        estimator.update(input_sig[self.L//2:], output_sig[self.L//2:])
+        kernels = estimator.get_kernels()
+        for n, h in kernels.items():
+            with self.subTest(i=(2, n)):
+                self.assertTrue(np.allclose(h, kernels_2[n], rtol=0,
+                                            atol=self.atol))
+
+
+class SlidingWindowRefactorizationTest(unittest.TestCase):
+
+    N = 1
+    M = 3
+    window = 5
+
+    def test_refactorization(self):
+        estimator = SlidingWindowEstimator(self.N, self.M, self.window)
+        rows = np.random.normal(size=(8, self.M))
+        rows[1:, 0] = 0
+        out = np.random.normal(size=(8,))
+        estimator.update_rows(rows, out)
+        self.assertGreater(estimator.nb_refactorizations, 0)
+        mat = np.concatenate((rows[-self.window:],
+                              out[-self.window:, np.newaxis]), axis=1)
+        self.assertTrue(np.allclose(np.dot(estimator.r_aug.T,
+                                           estimator.r_aug),
+                                    np.dot(mat.T, mat), rtol=0, atol=1e-10))
+
+
+class KalmanTrackerTest(unittest.TestCase):
+
+    N = 3
+    L = 400
+    block_sizes = [1, 7, 64]
+    chunk_size = 33
+    measurement_noise = 0.5
+    initial_covariance = 2.
+    sigma_noise = 0.1
+    atol = 1e-9
+
+    def _set_kwargs(self):
+        return {'M': 4}
+
+    def setUp(self):
+        self.kwargs = self._set_kwargs()
+        self.input_sig = np.random.normal(size=(self.L,))
+        phi = compute_combinatorial_basis(self.input_sig, self.N,
+                                          **self.kwargs)
+        mat = np.concatenate([val for n, val in sorted(phi.items())], axis=1)
+        self.output_sig = np.dot(mat, np.random.normal(size=mat.shape[1]))
+        self.output_sig += self.sigma_noise * np.random.normal(size=(self.L,))
+        lam = self.measurement_noise / self.initial_covariance
+        self.ridge = np.linalg.solve(
+            np.dot(mat.T, mat) + lam * np.identity(mat.shape[1]),
+            np.dot(mat.T, self.output_sig))
+
+    def _tracker(self, block_size):
+        tracker = KalmanTracker(self.N, process_noise=0.,
+                                measurement_noise=self.measurement_noise,
+                                initial_covariance=self.initial_covariance,
+                                block_size=block_size, **self.kwargs)
+        for start in range(0, self.L, self.chunk_size):
+            end = start + self.chunk_size
+            tracker.update(self.input_sig[start:end],
+                           self.output_sig[start:end])
+        return tracker
+
+    def test_null_process_noise_is_ridge(self):
+        for block_size in self.block_sizes:
+            tracker = self._tracker(block_size)
+            tracker.flush()
+            kernels = tracker.get_kernels()
+            result = np.concatenate([kernels[n] for n in sorted(kernels)])
+            with self.subTest(i=block_size):
+                self.assertEqual(tracker.nb_samples, self.L)
+                self.assertTrue(np.allclose(result, self.ridge, rtol=0,
+                                            atol=self.atol))
+
+    def test_empty_chunks(self):
+        tracker = self._tracker(self.block_sizes[0])
+        kernels = tracker.get_kernels()
+        tracker.update(self.input_sig[:0], self.output_sig[:0])
+        self.assertEqual(tracker.nb_samples, self.L)
+        for n, h in tracker.get_kernels().items():
+            with self.subTest(i=n):
+                self.assertTrue(np.array_equal(h, kernels[n]))
+
+    def test_incomplete_block_is_pending(self):
+        block_size = self.block_sizes[-1]
+        tracker = self._tracker(block_size)
+        self.assertEqual(tracker.nb_samples,
+                         (self.L // block_size) * block_size)
+
+    def test_covariance_is_symmetric(self):
+        for block_size in self.block_sizes:
+            tracker = self._tracker(block_size)
+            with self.subTest(i=block_size):
+                self.assertTrue(np.all(tracker.covariance ==
+                                       tracker.covariance.T))
+
+
+class KalmanTrackerProjectedTest(KalmanTrackerTest):
+
+    def _set_kwargs(self):
+        return {'orthogonal_basis': create_orthogonal_basis(0.5, K=3)}
+
+
+class KalmanTrackerProjectedListTest(KalmanTrackerTest):
+
+    def _set_kwargs(self):
+        return {'orthogonal_basis': [create_orthogonal_basis(0.5, K=3),
+                                     create_orthogonal_basis(0.5 + 0.1j, K=2),
+                                     create_orthogonal_basis([0.2, 0.4])]}
+
+
+class KalmanTrackerTimeVaryingTest(unittest.TestCase):
+
+    N = 2
+    M = 3
+    L = 4000
+    process_noise = 1e-4
+    rtol = 0.1
+
+    def _error(self, kernels, kernels_ref):
+        error = np.concatenate([kernels[n] - kernels_ref[n] for n in kernels])
+        ref = np.concatenate(list(kernels_ref.values()))
+        return np.linalg.norm(error) / np.linalg.norm(ref)
+
+    def test_tracks_last_system(self):
+        input_sig = np.random.normal(size=(self.L,))
+        kernels_1, _ = generate_kernels(self.N, M=self.M)
+        kernels_2, _ = generate_kernels(self.N, M=self.M)
+        output_1 = generate_output(input_sig, kernels_1, self.N, M=self.M)
+        output_2 = generate_output(input_sig, kernels_2, self.N, M=self.M)
+        output_sig = np.concatenate((output_1[:self.L//2],
+                                     output_2[self.L//2:]))
+        output_sig += 0.01 * np.random.normal(size=(self.L,))
+        tracker = KalmanTracker(self.N, M=self.M, block_size=16,
+                                process_noise=self.process_noise,
+                                measurement_noise=1e-4)
+        tracker.update(input_sig[:self.L//2], output_sig[:self.L//2])
+        self.assertLess(self._error(tracker.get_kernels(), kernels_1),
+                        self.rtol)
+        tracker.update(input_sig[self.L//2:], output_sig[self.L//2:])
+        self.assertLess(self._error(tracker.get_kernels(), kernels_2),
+                        self.rtol)
+
+
+class KalmanTrackerParametersTest(unittest.TestCase):
+
+    def test_process_noise_forms(self):
+        P = KalmanTracker(2, M=3).P
+        for process_noise in [1e-3, 1e-3 * np.ones((P,)),
+                              1e-3 * np.identity(P)]:
+            tracker = KalmanTracker(2, M=3, process_noise=process_noise)
+            with self.subTest(i=np.shape(process_noise)):
+                self.assertTrue(np.all(tracker._process_noise ==
+                                       1e-3 * np.identity(P)))
+
+    def test_wrong_process_noise_shape(self):
+        self.assertRaises(ValueError, KalmanTracker, 2, M=3,
+                          process_noise=np.ones((2,)))
+
+    def test_out_form(self):
+        tracker = KalmanTracker(2, M=3)
+        tracker.update(np.random.normal(size=(50,)),
+                       np.random.normal(size=(50,)))
+        kernels = tracker.get_kernels(out_form='sym')
+        for n, h in kernels.items():
+            with self.subTest(i=n):
+                self.assertEqual(h.shape, (3,)*n)
+
+
+class BasisStreamProjectedTest(unittest.TestCase):
+
+    N = 3
+    L = 300
+    chunk_size = 37
+
+    def test_same_as_whole_signal(self):
+        input_sig = np.random.normal(size=(self.L,))
+        for system_type in ['volterra', 'hammerstein']:
+            for basis in [create_orthogonal_basis(0.5, K=3),
+                          [create_orthogonal_basis(0.3, K=3),
+                           create_orthogonal_basis([0.5 + 0.2j, 0.1]),
+                           create_orthogonal_basis(0.5 + 0.1j, K=2)]]:
+                phi_ref = compute_combinatorial_basis(
+                    input_sig, self.N, system_type=system_type,
+                    orthogonal_basis=basis)
+                basis_stream = _BasisStream(self.N, None, system_type,
+                                            orthogonal_basis=basis)
+                list_phi = [basis_stream(input_sig[ind:ind+self.chunk_size])
+                            for ind in range(0, self.L, self.chunk_size)]
+                for n, val in phi_ref.items():
+                    result = np.concatenate([phi[n] for phi in list_phi])
+                    with self.subTest(i=(system_type, type(basis), n)):
+                        self.assertTrue(np.allclose(result, val, rtol=0,
+                                                    atol=1e-12))
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
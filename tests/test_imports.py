@@ -48,7 +48,8 @@ class UtilitiesTestCase(PyviTestCase):
                          'GeneralizedBasis', 'create_orthogonal_basis',
                          'is_valid_basis_instance']
     should_be_absent_properties = ['_AbstractOrthogonalBasis',
-                                   'inherint_docstring', '_as_list']
+                                   'inherint_docstring', '_as_list',
+                                   '_ProjectionStream']
 
 
 class VolterraTestCase(PyviTestCase):
@@ -56,11 +57,28 @@ class VolterraTestCase(PyviTestCase):
     module = pyvi.volterra
     needed_properties = ['kernel_nb_coeff', 'series_nb_coeff', 'vec2kernel',
                          'vec2series', 'kernel2vec',
-                         'compute_combinatorial_basis']
+                         'compute_combinatorial_basis', 'compute_output',
+                         'VolterraFilter', 'compute_cp_output',
+                         'cp_decomposition', 'cp2kernel',
+                         'ProjectedVolterraFilter',
+                         'compute_projected_output',
+                         'compute_ground_truth', 'HammersteinFilter',
+                         'compute_hammerstein_output', 'compute_gfrf',
+                         'compute_gfrf_diagonal',
+                         'compute_gfrf_intermodulation', 'prune_kernels',
+                         'compute_sparse_output', 'evaluate_pruning']
     should_be_absent_properties = ['_vec2dict_of_vec', '_check_parameters',
                                    '_compute_list_nb_coeff',
                                    '_phi_by_order_post_processing',
-                                   '_combinatorial_mat_diag_terms']
+                                   '_combinatorial_mat_diag_terms',
+                                   '_volterra_output', '_memory_length',
+                                   '_fir_filtering', '_symmetric_cp',
+                                   '_best_rank_one', '_projected_output',
+                                   '_projection_bases', '_volterra_terms',
+                                   '_time_first', '_fft_convolution',
+                                   '_fft_sizes', '_symmetric_sector',
+                                   '_sorted_tuples', '_sparse_nodes',
+                                   '_energy_support']
 
 
 class SeparationTestCase(PyviTestCase):
@@ -76,10 +94,24 @@ class IdentificationTestCase(PyviTestCase):
 
     module = pyvi.identification
     needed_properties = ['direct_method', 'order_method', 'term_method',
-                         'iter_method', 'phase_method']
+                         'iter_method', 'phase_method',
+                         'stream_identification',
+                         'multi_record_identification',
+                         'progressive_identification',
+                         'regularization_path', 'cross_validation',
+                         'model_order_selection', 'IdentificationDiagnostics',
+                         'SlidingWindowEstimator', 'KalmanTracker',
+                         'cp_method', 'monte_carlo', 'separation_trial']
     should_be_absent_properties = ['_solver', '_ls_solver', '_qr_solver',
-                                   '_complex2real', '_identification',
-                                   '_cast_complex2real', '_kwargs_for_KLS']
+                                   '_sketch_solver', '_tsqr_solver',
+                                   '_RFactorAccumulator', '_complex2real',
+                                   '_identification', '_cast_complex2real',
+                                   '_kwargs_for_KLS', '_stream_basis',
+                                   '_ridge_path', '_linear_systems',
+                                   '_auto_solver', '_fitted_by_phase',
+                                   '_givens_update', '_BasisStream',
+                                   '_FFTFilter', '_update_modes',
+                                   '_run_trial', '_save_checkpoint']
 
 
 #==============================================================================
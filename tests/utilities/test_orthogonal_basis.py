@@ -18,7 +18,8 @@ from pyvi.utilities.orthogonal_basis import (_OrthogonalBasis, LaguerreBasis,
                                              KautzBasis, GeneralizedBasis,
                                              create_orthogonal_basis,
                                              is_valid_basis_instance,
-                                             laguerre_pole_optimization)
+                                             laguerre_pole_optimization,
+                                             _ProjectionStream)
 from pyvi.volterra.combinatorial_basis import projected_volterra_basis
 from pyvi.identification.methods import order_method
 
@@ -115,6 +116,51 @@ class _OrthogonalBasisGlobalTest():
                                             proj_sig, rtol=self.rtol,
                                             atol=self.atol))
 
+    def test_shared_projection_streams(self):
+        signals = np.random.normal(size=(2, 300)) + \
+            1j * np.random.normal(size=(2, 300))
+        for ind, basis in enumerate(self.basis_list):
+            with self.subTest(i=ind):
+                streams = [_ProjectionStream(basis) for _ in range(2)]
+                chunks = [[], []]
+                for start, end in [(0, 70), (70, 71), (71, 300)]:
+                    for stream, signal, chunk in zip(streams, signals,
+                                                     chunks):
+                        chunk.append(stream.projection(signal[start:end]))
+                        stream.next_chunk()
+                for signal, chunk in zip(signals, chunks):
+                    self.assertTrue(np.allclose(
+                        np.concatenate(chunk, axis=1),
+                        basis.projection(signal), rtol=self.rtol,
+                        atol=self.atol))
+
+    def test_empty_chunks(self):
+        signal = np.random.normal(size=(300,))
+        for ind, basis in enumerate(self.basis_list):
+            with self.subTest(i=ind):
+                stream = _ProjectionStream(basis)
+                chunks = []
+                for start, end in [(0, 0), (0, 70), (70, 70), (70, 300),
+                                   (300, 300)]:
+                    chunks.append(stream.projection(signal[start:end]))
+                    stream.next_chunk()
+                self.assertEqual(chunks[0].shape, (basis.K, 0))
+                self.assertTrue(np.allclose(
+                    np.concatenate(chunks, axis=1), basis.projection(signal),
+                    rtol=self.rtol, atol=self.atol))
+
+    def test_type_change_error(self):
+        signal = np.random.normal(size=(100,))
+        for ind, basis in enumerate(self.basis_list):
+            with self.subTest(i=ind):
+                stream = _ProjectionStream(basis)
+                stream.projection(signal[:50])
+                stream.next_chunk()
+                stream.projection(signal[:0] + 0j)
+                stream.next_chunk()
+                self.assertRaises(ValueError, stream.projection,
+                                  signal[50:] + 0j)
+
 
 class LaguerreBasisTest(_OrthogonalBasisGlobalTest, unittest.TestCase):
     params_list = [(0.1, 2), (0.1, 5), (0.1, 10), (0.2, 5), (0.5, 5),
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/volterra/decomposition.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import unittest
+import numpy as np
+from pyvi.volterra.decomposition import cp_decomposition, cp2kernel
+from pyvi.volterra.simulation import compute_output, compute_cp_output
+from pyvi.volterra.tools import series_nb_coeff, vec2kernel
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class CPDecompositionTest(unittest.TestCase):
+
+    N = 4
+    M = 5
+    ranks = [1, 2, 4, 8]
+
+    def setUp(self):
+        list_nb_coeff = series_nb_coeff(self.N, self.M, form='vec',
+                                        out_by_order=True)
+        self.kernels = {n+1: np.random.uniform(low=-1., high=1.,
+                                               size=(nb_coeff,))
+                        for n, nb_coeff in enumerate(list_nb_coeff)}
+
+    def _error(self, cp_kernels, n):
+        kernel = vec2kernel(self.kernels[n], n, self.M, form='sym') if n > 1 \
+            else self.kernels[n]
+        weights, filters = cp_kernels[n]
+        return np.linalg.norm(kernel - cp2kernel(weights, filters, n)) / \
+            np.linalg.norm(kernel)
+
+    def test_shapes(self):
+        for rank in self.ranks:
+            cp_kernels = cp_decomposition(self.kernels, rank=rank)
+            for n, (weights, filters) in cp_kernels.items():
+                expected_rank = 1 if n == 1 else min(rank, self.M) if n == 2 \
+                    else rank
+                with self.subTest(i=(rank, n)):
+                    self.assertEqual(weights.shape, (expected_rank,))
+                    self.assertEqual(filters.shape, (expected_rank, self.M))
+
+    def test_returned_error(self):
+        for rank in self.ranks:
+            cp_kernels, errors = cp_decomposition(self.kernels, rank=rank,
+                                                  return_error=True)
+            for n in self.kernels:
+                with self.subTest(i=(rank, n)):
+                    self.assertAlmostEqual(errors[n],
+                                           self._error(cp_kernels, n))
+
+    def test_error_decreases_with_rank(self):
+        list_errors = [cp_decomposition(self.kernels, rank=rank,
+                                        return_error=True)[1]
+                       for rank in self.ranks]
+        for n in range(3, self.N+1):
+            for ind in range(1, len(self.ranks)):
+                with self.subTest(i=(n, self.ranks[ind])):
+                    self.assertLessEqual(list_errors[ind][n],
+                                         list_errors[ind-1][n] + 1e-12)
+
+    def test_tolerance(self):
+        for tol in [1e-1, 1e-3]:
+            _, errors = cp_decomposition(self.kernels, tol=tol,
+                                         return_error=True)
+            for n, error in errors.items():
+                with self.subTest(i=(tol, n)):
+                    self.assertLessEqual(error, tol)
+
+    def test_second_order_is_exact(self):
+        cp_kernels, errors = cp_decomposition({2: self.kernels[2]},
+                                              rank=self.M, return_error=True)
+        self.assertLess(errors[2], 1e-12)
+
+    def test_tensor_input(self):
+        kernels = {n: vec2kernel(h, n, self.M) for n, h in self.kernels.items()
+                   if n > 1}
+        _, errors_tensor = cp_decomposition(kernels, rank=2,
+                                            return_error=True)
+        _, errors_vec = cp_decomposition(self.kernels, rank=2,
+                                         return_error=True)
+        for n, error in errors_tensor.items():
+            with self.subTest(i=n):
+                self.assertAlmostEqual(error, errors_vec[n])
+
+    def test_complex_kernel_error(self):
+        kernels = {n: h + 1j*h for n, h in self.kernels.items()}
+        self.assertRaises(ValueError, cp_decomposition, kernels, rank=2)
+
+
+class CPDecompositionLowRankTest(unittest.TestCase):
+
+    n = 3
+    M = 6
+    rank = 3
+    tol = 1e-6
+
+    def test_orthogonal_branches(self):
+        filters = np.linalg.qr(np.random.normal(size=(self.M, self.M)))[0]
+        filters = filters[:, :self.rank].T
+        weights = np.array([3., -2., 1.])
+        kernel = cp2kernel(weights, filters, self.n)
+        cp_kernels, errors = cp_decomposition({self.n: kernel},
+                                              tol=self.tol, return_error=True)
+        self.assertEqual(len(cp_kernels[self.n][0]), self.rank)
+        self.assertLess(errors[self.n], self.tol)
+
+    def test_refinement_improves_greedy(self):
+        filters = np.random.normal(size=(self.rank, self.M))
+        weights = np.array([3., -2., 1.])
+        kernel = cp2kernel(weights, filters, self.n)
+        _, errors = cp_decomposition({self.n: kernel}, rank=self.rank,
+                                     return_error=True)
+        _, errors_greedy = cp_decomposition({self.n: kernel}, rank=self.rank,
+                                            max_iter=0, return_error=True)
+        self.assertLessEqual(errors[self.n], errors_greedy[self.n])
+
+
+class ComputeCPOutputTest(unittest.TestCase):
+
+    N = 3
+    M = 5
+    L = 500
+    rank = 4
+    rtol = 1e-10
+    seed = 32
+
+    def setUp(self):
+        rng = np.random.RandomState(self.seed)
+        list_nb_coeff = series_nb_coeff(self.N, self.M, form='vec',
+                                        out_by_order=True)
+        kernels = {n+1: rng.uniform(low=-1., high=1., size=(nb_coeff,))
+                   for n, nb_coeff in enumerate(list_nb_coeff)}
+        self.cp_kernels = cp_decomposition(kernels, rank=self.rank)
+        self.kernels_approx = {n: cp2kernel(weights, filters, n, form='vec')
+                               for n, (weights, filters)
+                               in self.cp_kernels.items()}
+        self.input_sig = rng.normal(size=(self.L,))
+
+    def test_same_as_compute_output(self):
+        for by_order in [False, True]:
+            output = compute_cp_output(self.input_sig, self.cp_kernels,
+                                       by_order=by_order)
+            output_ref = compute_output(self.input_sig, self.kernels_approx,
+                                        M=self.M, by_order=by_order)
+            with self.subTest(i=by_order):
+                self.assertTrue(np.allclose(
+                    output, output_ref, rtol=0,
+                    atol=self.rtol * np.max(np.abs(output_ref))))
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
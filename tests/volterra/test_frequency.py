@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/volterra/frequency.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import unittest
+import itertools as itr
+import numpy as np
+from pyvi.volterra.frequency import (compute_gfrf, compute_gfrf_diagonal,
+                                     compute_gfrf_intermodulation)
+from pyvi.volterra.tools import kernel_nb_coeff, vec2kernel
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class ComputeGfrfTest(unittest.TestCase):
+
+    n_list = [1, 2, 3, 4, 5]
+    M = 5
+    nfft = 8
+    atol = 1e-12
+
+    def setUp(self):
+        self.kernels = dict()
+        self.gfrf = dict()
+        for n in self.n_list:
+            vec = np.random.normal(size=(kernel_nb_coeff(n, self.M,
+                                                         form='vec'),))
+            self.kernels[n] = vec
+            self.gfrf[n] = self._reference(vec, n)
+
+    def _reference(self, vec, n):
+        folded = np.zeros((self.nfft,)*n)
+        sym_kernel = vec2kernel(vec, n, self.M, form='sym')
+        for index in itr.product(range(self.M), repeat=n):
+            folded[tuple(k % self.nfft for k in index)] += sym_kernel[index]
+        return np.fft.fftn(folded)
+
+    def test_full(self):
+        for n, vec in self.kernels.items():
+            with self.subTest(i=n):
+                gfrf = compute_gfrf(vec, n, nfft=self.nfft, out_form='full')
+                self.assertEqual(gfrf.shape, (self.nfft,)*n)
+                self.assertTrue(np.allclose(gfrf, self.gfrf[n], rtol=0,
+                                            atol=self.atol))
+
+    def test_sector(self):
+        for n, vec in self.kernels.items():
+            with self.subTest(i=n):
+                sector = compute_gfrf(vec, n, nfft=self.nfft)
+                index = tuple(np.array(list(
+                    itr.combinations_with_replacement(range(self.nfft),
+                                                      n))).T)
+                self.assertEqual(sector.shape,
+                                 (kernel_nb_coeff(n, self.nfft, form='vec'),))
+                self.assertTrue(np.allclose(sector, self.gfrf[n][index],
+                                            rtol=0, atol=self.atol))
+
+    def test_diagonal(self):
+        for n, vec in self.kernels.items():
+            with self.subTest(i=n):
+                diagonal = compute_gfrf_diagonal(vec, n, nfft=self.nfft)
+                index = (np.arange(self.nfft),)*n
+                self.assertTrue(np.allclose(diagonal, self.gfrf[n][index],
+                                            rtol=0, atol=self.atol))
+
+    def test_intermodulation(self):
+        k1, k2 = np.indices((self.nfft, self.nfft))
+        for n, vec in self.kernels.items():
+            for q in range(1, n):
+                with self.subTest(i=(n, q)):
+                    plane = compute_gfrf_intermodulation(vec, n, q,
+                                                         nfft=self.nfft)
+                    index = (k1,)*q + (k2,)*(n-q)
+                    self.assertTrue(np.allclose(plane, self.gfrf[n][index],
+                                                rtol=0, atol=self.atol))
+
+    def test_complex_kernel(self):
+        n = 3
+        vec = self.kernels[n] + 1j * np.random.normal(size=(
+            kernel_nb_coeff(n, self.M, form='vec'),))
+        gfrf = self._reference(np.real(vec), n) + \
+            1j * self._reference(np.imag(vec), n)
+        self.assertTrue(np.allclose(compute_gfrf(vec, n, nfft=self.nfft,
+                                                 out_form='full'),
+                                    gfrf, rtol=0, atol=self.atol))
+        self.assertTrue(np.allclose(
+            compute_gfrf_diagonal(vec, n, nfft=self.nfft),
+            gfrf[(np.arange(self.nfft),)*n], rtol=0, atol=self.atol))
+
+    def test_default_nfft(self):
+        for n, vec in self.kernels.items():
+            with self.subTest(i=n):
+                self.assertEqual(compute_gfrf(vec, n, out_form='full').shape,
+                                 (8,)*n)
+                self.assertEqual(compute_gfrf_diagonal(vec, n).shape, (8,))
+
+    def test_wrong_q(self):
+        for q in [0, 3]:
+            with self.subTest(i=q):
+                self.assertRaises(ValueError, compute_gfrf_intermodulation,
+                                  self.kernels[3], 3, q)
+
+    def test_wrong_out_form(self):
+        self.assertRaises(ValueError, compute_gfrf, self.kernels[2], 2,
+                          out_form='diag')
+
+
+class ComputeGfrfAliasingTest(ComputeGfrfTest):
+
+    M = 7
+    nfft = 4
+
+    def test_default_nfft(self):
+        pass
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/volterra/ground_truth.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import unittest
+import numpy as np
+from pyvi.volterra.ground_truth import compute_ground_truth
+from pyvi.volterra.simulation import compute_output
+from pyvi.volterra.combinatorial_basis import compute_combinatorial_basis
+from pyvi.volterra.tools import series_nb_coeff
+from pyvi.separation.methods import HPS, PS
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class ComputeGroundTruthTest(unittest.TestCase):
+
+    N = 3
+    M = 4
+    L = 300
+    K = 4
+    system_type = 'volterra'
+    atol = 1e-12
+
+    def _nb_coeff(self):
+        return series_nb_coeff(self.N, self.M, form='vec', out_by_order=True)
+
+    def setUp(self):
+        self.kernels = {n+1: np.random.uniform(-1., 1., size=(nb_coeff,))
+                        for n, nb_coeff in enumerate(self._nb_coeff())}
+        self.input_sig = np.random.normal(size=(self.L,))
+        self.output_by_order, self.output_by_term, self.homophase = \
+            compute_ground_truth(self.input_sig, self.kernels, M=self.M,
+                                 system_type=self.system_type)
+
+    def _compute_output(self, signal):
+        return compute_output(signal, self.kernels, M=self.M,
+                              system_type=self.system_type)
+
+    def test_output_by_order(self):
+        output_by_order = compute_output(self.input_sig, self.kernels,
+                                         M=self.M,
+                                         system_type=self.system_type,
+                                         by_order=True)
+        self.assertFalse(np.iscomplexobj(self.output_by_order))
+        self.assertTrue(np.allclose(self.output_by_order, output_by_order,
+                                    rtol=0, atol=self.atol))
+
+    def test_output_by_term(self):
+        method = PS(self.N)
+        input_coll = method.gen_inputs(self.input_sig)
+        _, output_by_term = method.process_outputs(
+            self._compute_output(input_coll), raw_mode=True)
+        self.assertEqual(set(self.output_by_term.keys()),
+                         set(output_by_term.keys()))
+        for key, term in output_by_term.items():
+            with self.subTest(i=key):
+                self.assertTrue(np.allclose(self.output_by_term[key], term,
+                                            rtol=0, atol=self.atol))
+
+    def test_combinatorial_basis(self):
+        _, signal_cplx = HPS(self.N).gen_inputs(self.input_sig,
+                                                return_cplx_sig=True)
+        phi = compute_combinatorial_basis(signal_cplx, self.N, M=self.M,
+                                          system_type=self.system_type,
+                                          sorted_by='term')
+        for (n, q), term in self.output_by_term.items():
+            with self.subTest(i=(n, q)):
+                self.assertTrue(np.allclose(
+                    term, 2**n * np.dot(phi[(n, q)], self.kernels[n]),
+                    rtol=0, atol=self.atol))
+
+    def test_homophase(self):
+        method = HPS(self.N)
+        input_coll = method.gen_inputs(self.input_sig)
+        homophase = method.process_outputs(self._compute_output(input_coll))
+        self.assertEqual(self.homophase.shape, (2*self.N+1, self.L))
+        self.assertTrue(np.allclose(self.homophase, homophase, rtol=0,
+                                    atol=self.atol))
+
+    def test_collection(self):
+        input_coll = np.random.normal(size=(self.K, self.L))
+        output_by_order, output_by_term, homophase = \
+            compute_ground_truth(input_coll, self.kernels, M=self.M,
+                                 system_type=self.system_type)
+        self.assertEqual(output_by_order.shape, (self.K, self.N, self.L))
+        self.assertEqual(homophase.shape, (self.K, 2*self.N+1, self.L))
+        for ind, signal in enumerate(input_coll):
+            results = compute_ground_truth(signal, self.kernels, M=self.M,
+                                           system_type=self.system_type)
+            with self.subTest(i=ind):
+                self.assertTrue(np.allclose(output_by_order[ind], results[0],
+                                            rtol=0, atol=self.atol))
+                for key, term in results[1].items():
+                    self.assertTrue(np.allclose(output_by_term[key][ind],
+                                                term, rtol=0,
+                                                atol=self.atol))
+                self.assertTrue(np.allclose(homophase[ind], results[2],
+                                            rtol=0, atol=self.atol))
+
+
+class ComputeGroundTruthHammersteinTest(ComputeGroundTruthTest):
+
+    system_type = 'hammerstein'
+
+    def _nb_coeff(self):
+        return [self.M]*self.N
+
+
+class ComputeOutputCollectionTest(unittest.TestCase):
+
+    def test_bit_exact(self):
+        kernels = {n+1: np.random.normal(size=(nb_coeff,))
+                   for n, nb_coeff in enumerate(series_nb_coeff(
+                       3, 5, form='vec', out_by_order=True))}
+        input_coll = np.random.normal(size=(4, 100))
+        output_coll = compute_output(input_coll, kernels, by_order=True)
+        self.assertEqual(output_coll.shape, (4, 3, 100))
+        for ind, signal in enumerate(input_coll):
+            with self.subTest(i=ind):
+                self.assertTrue(np.array_equal(
+                    output_coll[ind],
+                    compute_output(signal, kernels, by_order=True)))
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/volterra/simulation.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import unittest
+import numpy as np
+from pyvi.volterra.simulation import (compute_output, VolterraFilter,
+                                      compute_projected_output,
+                                      ProjectedVolterraFilter,
+                                      compute_hammerstein_output,
+                                      HammersteinFilter)
+from pyvi.volterra.combinatorial_basis import compute_combinatorial_basis
+from pyvi.volterra.tools import series_nb_coeff
+from pyvi.utilities.orthogonal_basis import (LaguerreBasis, KautzBasis,
+                                             GeneralizedBasis)
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class ComputeOutputTest(unittest.TestCase):
+
+    N = 3
+    L = 200
+    M_list = [4, [5, 3, 4], [2, 6, 3]]
+    system_type = 'volterra'
+    atol = 1e-12
+
+    def _nb_coeff(self, M):
+        return series_nb_coeff(self.N, M, form='vec', out_by_order=True)
+
+    def _input_signal(self):
+        return np.random.normal(size=(self.L,))
+
+    def setUp(self):
+        self.input_sig = self._input_signal()
+        self.kernels = dict()
+        self.output_ref = dict()
+        for ind, M in enumerate(self.M_list):
+            kernels = {n+1: np.random.normal(size=(nb_coeff,))
+                       for n, nb_coeff in enumerate(self._nb_coeff(M))}
+            phi = compute_combinatorial_basis(self.input_sig, self.N, M=M,
+                                              system_type=self.system_type)
+            self.kernels[ind] = kernels
+            self.output_ref[ind] = np.array([np.dot(phi[n], kernels[n])
+                                             for n in range(1, self.N+1)])
+
+    def test_by_order(self):
+        for ind, M in enumerate(self.M_list):
+            output = compute_output(self.input_sig, self.kernels[ind], M=M,
+                                    system_type=self.system_type,
+                                    by_order=True)
+            with self.subTest(i=ind):
+                self.assertEqual(output.shape, (self.N, self.L))
+                self.assertTrue(np.allclose(output, self.output_ref[ind],
+                                            rtol=0, atol=self.atol))
+
+    def test_output(self):
+        for ind, M in enumerate(self.M_list):
+            output = compute_output(self.input_sig, self.kernels[ind], M=M,
+                                    system_type=self.system_type)
+            with self.subTest(i=ind):
+                self.assertEqual(output.shape, (self.L,))
+                self.assertTrue(np.allclose(output,
+                                            self.output_ref[ind].sum(axis=0),
+                                            rtol=0, atol=self.atol))
+
+    def test_memory_length_deduced(self):
+        for ind in range(len(self.M_list)):
+            output = compute_output(self.input_sig, self.kernels[ind],
+                                    system_type=self.system_type,
+                                    by_order=True)
+            with self.subTest(i=ind):
+                self.assertTrue(np.allclose(output, self.output_ref[ind],
+                                            rtol=0, atol=self.atol))
+
+    def test_missing_order(self):
+        kernels = {n: h for n, h in self.kernels[0].items() if n != 2}
+        output = compute_output(self.input_sig, kernels, M=self.M_list[0],
+                                system_type=self.system_type, by_order=True)
+        self.assertTrue(np.all(output[1] == 0))
+        for n in [1, 3]:
+            with self.subTest(i=n):
+                self.assertTrue(np.allclose(output[n-1],
+                                            self.output_ref[0][n-1],
+                                            rtol=0, atol=self.atol))
+
+    def test_wrong_memory_length_error(self):
+        self.assertRaises(ValueError, compute_output, self.input_sig,
+                          self.kernels[0], M=self.M_list[0]+1,
+                          system_type=self.system_type)
+
+
+class ComputeOutputCplxTest(ComputeOutputTest):
+
+    def _input_signal(self):
+        return np.random.normal(size=(self.L,)) + \
+            1j * np.random.normal(size=(self.L,))
+
+
+class ComputeOutputHammersteinTest(ComputeOutputTest):
+
+    system_type = 'hammerstein'
+
+    def _nb_coeff(self, M):
+        return M if isinstance(M, list) else [M]*self.N
+
+
+class ComputeOutputWrongTypeTest(unittest.TestCase):
+
+    def test_error(self):
+        self.assertRaises(ValueError, compute_output, np.zeros((10,)),
+                          {1: np.zeros((3,))}, system_type='wiener')
+
+
+class VolterraFilterTest(unittest.TestCase):
+
+    N = 3
+    L = 2500
+    M_list = [1, 4, [5, 3, 6]]
+    system_type = 'volterra'
+    block_sizes = [1, 2, 3, 50, 7, 200, 1, 500, 1200, 236, 300]
+
+    def _input_signal(self):
+        return np.random.normal(size=(self.L,))
+
+    def _kernels(self, M):
+        if self.system_type == 'hammerstein':
+            list_nb_coeff = M if isinstance(M, list) else [M]*self.N
+        else:
+            list_nb_coeff = series_nb_coeff(self.N, M, form='vec',
+                                            out_by_order=True)
+        return {n+1: np.random.normal(size=(nb_coeff,))
+                for n, nb_coeff in enumerate(list_nb_coeff)}
+
+    def setUp(self):
+        self.input_sig = self._input_signal()
+
+    def _process(self, volterra_filter, signal, by_order=False):
+        list_out = []
+        start = 0
+        for block_size in self.block_sizes:
+            block = signal[start:start+block_size]
+            list_out.append(volterra_filter.process(block,
+                                                    by_order=by_order))
+            start += block_size
+        return np.concatenate(list_out, axis=-1)
+
+    def test_bit_exact(self):
+        for ind, M in enumerate(self.M_list):
+            kernels = self._kernels(M)
+            for by_order in [False, True]:
+                output_ref = compute_output(self.input_sig, kernels, M=M,
+                                            system_type=self.system_type,
+                                            by_order=by_order)
+                volterra_filter = VolterraFilter(kernels, M=M,
+                                                 system_type=self.system_type)
+                output = self._process(volterra_filter, self.input_sig,
+                                       by_order=by_order)
+                with self.subTest(i=(ind, by_order)):
+                    self.assertTrue(np.array_equal(output, output_ref))
+
+    def test_reset(self):
+        M = self.M_list[-1]
+        kernels = self._kernels(M)
+        volterra_filter = VolterraFilter(kernels, M=M,
+                                         system_type=self.system_type)
+        output_1 = self._process(volterra_filter, self.input_sig)
+        volterra_filter.reset()
+        output_2 = self._process(volterra_filter, self.input_sig)
+        self.assertTrue(np.array_equal(output_1, output_2))
+
+    def test_buffers_reused(self):
+        M = self.M_list[-1]
+        volterra_filter = VolterraFilter(self._kernels(M), M=M,
+                                         system_type=self.system_type)
+        volterra_filter.process(self.input_sig[:64])
+        buffer = volterra_filter._buffer
+        for start in range(64, self.L, 64):
+            volterra_filter.process(self.input_sig[start:start+64])
+        self.assertIs(volterra_filter._buffer, buffer)
+
+
+class VolterraFilterCplxTest(VolterraFilterTest):
+
+    def _input_signal(self):
+        return np.random.normal(size=(self.L,)) + \
+            1j * np.random.normal(size=(self.L,))
+
+
+class VolterraFilterHammersteinTest(VolterraFilterTest):
+
+    system_type = 'hammerstein'
+
+
+class VolterraFilterWrongTypeTest(unittest.TestCase):
+
+    def test_error(self):
+        self.assertRaises(ValueError, VolterraFilter, {1: np.zeros((3,))},
+                          system_type='wiener')
+
+
+class ComputeProjectedOutputTest(unittest.TestCase):
+
+    N = 3
+    L = 500
+    system_type = 'volterra'
+    atol = 1e-11
+
+    def _orthogonal_basis_list(self):
+        return [LaguerreBasis(0.1, 4),
+                [LaguerreBasis(0.1, 3), KautzBasis(0.2+0.3j, 4),
+                 GeneralizedBasis([0.5, 0.1+0.2j])]]
+
+    def _input_signal(self):
+        return np.random.normal(size=(self.L,))
+
+    def _kernels(self, orthogonal_basis):
+        if isinstance(orthogonal_basis, list):
+            K = [basis.K for basis in orthogonal_basis]
+        else:
+            K = orthogonal_basis.K
+        if self.system_type == 'hammerstein':
+            list_nb_coeff = K if isinstance(K, list) else [K]*self.N
+        else:
+            list_nb_coeff = series_nb_coeff(self.N, K, form='vec',
+                                            out_by_order=True)
+        return {n+1: np.random.normal(size=(nb_coeff,))
+                for n, nb_coeff in enumerate(list_nb_coeff)}
+
+    def setUp(self):
+        self.input_sig = self._input_signal()
+        self.orthogonal_basis_list = self._orthogonal_basis_list()
+        self.kernels = dict()
+        self.output_ref = dict()
+        for ind, basis in enumerate(self.orthogonal_basis_list):
+            kernels = self._kernels(basis)
+            phi = compute_combinatorial_basis(self.input_sig, self.N,
+                                              orthogonal_basis=basis,
+                                              system_type=self.system_type)
+            self.kernels[ind] = kernels
+            self.output_ref[ind] = np.array([np.dot(phi[n], kernels[n])
+                                             for n in range(1, self.N+1)])
+
+    def test_output(self):
+        for ind, basis in enumerate(self.orthogonal_basis_list):
+            output = compute_projected_output(self.input_sig,
+                                              self.kernels[ind], basis,
+                                              system_type=self.system_type,
+                                              by_order=True)
+            with self.subTest(i=ind):
+                self.assertEqual(output.shape, (self.N, self.L))
+                self.assertTrue(np.allclose(output, self.output_ref[ind],
+                                            rtol=0, atol=self.atol))
+
+    def test_missing_order(self):
+        kernels = {n: h for n, h in self.kernels[0].items() if n != 2}
+        output = compute_projected_output(self.input_sig, kernels,
+                                          self.orthogonal_basis_list[0],
+                                          system_type=self.system_type,
+                                          by_order=True)
+        self.assertTrue(np.all(output[1] == 0))
+        for n in [1, 3]:
+            with self.subTest(i=n):
+                self.assertTrue(np.allclose(output[n-1],
+                                            self.output_ref[0][n-1],
+                                            rtol=0, atol=self.atol))
+
+    def test_streaming(self):
+        block_sizes = [1, 2, 50, 7, 200, 1, 239]
+        for ind, basis in enumerate(self.orthogonal_basis_list):
+            projected_filter = ProjectedVolterraFilter(
+                self.kernels[ind], basis, system_type=self.system_type)
+            starts = np.cumsum([0] + block_sizes)
+            output = np.concatenate(
+                [projected_filter.process(self.input_sig[start:stop],
+                                          by_order=True)
+                 for start, stop in zip(starts[:-1], starts[1:])], axis=1)
+            with self.subTest(i=ind):
+                self.assertTrue(np.allclose(output, self.output_ref[ind],
+                                            rtol=0, atol=self.atol))
+
+    def test_reset(self):
+        basis = self.orthogonal_basis_list[-1]
+        projected_filter = ProjectedVolterraFilter(
+            self.kernels[1], basis, system_type=self.system_type)
+        output_1 = projected_filter.process(self.input_sig)
+        projected_filter.reset()
+        output_2 = projected_filter.process(self.input_sig)
+        self.assertTrue(np.array_equal(output_1, output_2))
+
+    def test_wrong_kernel_length_error(self):
+        kernels = {1: np.zeros((self.orthogonal_basis_list[0].K+1,))}
+        self.assertRaises(ValueError, compute_projected_output,
+                          self.input_sig, kernels,
+                          self.orthogonal_basis_list[0],
+                          system_type=self.system_type)
+
+
+class ComputeProjectedOutputCplxTest(ComputeProjectedOutputTest):
+
+    def _input_signal(self):
+        return np.random.normal(size=(self.L,)) + \
+            1j * np.random.normal(size=(self.L,))
+
+
+class ComputeProjectedOutputHammersteinTest(ComputeProjectedOutputTest):
+
+    system_type = 'hammerstein'
+
+
+class ProjectedVolterraFilterWrongBasisTest(unittest.TestCase):
+
+    def test_error(self):
+        self.assertRaises(TypeError, ProjectedVolterraFilter,
+                          {1: np.zeros((3,))}, 'laguerre')
+
+
+class ComputeHammersteinOutputTest(unittest.TestCase):
+
+    N = 3
+    L = 3000
+    M_list = [[1, 1, 1], [5, 3, 8], [600, 100, 900]]
+    block_size_list = [None, 1, 7, 300]
+    rtol = 1e-13
+
+    def _input_signal(self):
+        return np.random.normal(size=(self.L,))
+
+    def setUp(self):
+        self.input_sig = self._input_signal()
+        self.kernels = [{n+1: np.random.normal(size=(m,))
+                         for n, m in enumerate(M)} for M in self.M_list]
+        self.output_ref = [compute_output(self.input_sig, kernels,
+                                          system_type='hammerstein',
+                                          by_order=True)
+                           for kernels in self.kernels]
+
+    def _assert_close(self, output, output_ref):
+        atol = self.rtol * np.max(np.abs(output_ref))
+        self.assertTrue(np.allclose(output, output_ref, rtol=0, atol=atol))
+
+    def test_by_order(self):
+        for ind, kernels in enumerate(self.kernels):
+            for block_size in self.block_size_list:
+                output = compute_hammerstein_output(
+                    self.input_sig, kernels, block_size=block_size,
+                    by_order=True)
+                with self.subTest(i=(ind, block_size)):
+                    self.assertEqual(output.shape, (self.N, self.L))
+                    self._assert_close(output, self.output_ref[ind])
+
+    def test_output(self):
+        for ind, kernels in enumerate(self.kernels):
+            output = compute_hammerstein_output(self.input_sig, kernels)
+            with self.subTest(i=ind):
+                self.assertEqual(output.shape, (self.L,))
+                self._assert_close(output, self.output_ref[ind].sum(axis=0))
+
+    def test_missing_order(self):
+        kernels = {n: h for n, h in self.kernels[1].items() if n != 2}
+        output = compute_hammerstein_output(self.input_sig, kernels,
+                                            by_order=True)
+        self.assertTrue(np.all(output[1] == 0))
+        for n in [1, 3]:
+            with self.subTest(i=n):
+                self._assert_close(output[n-1], self.output_ref[1][n-1])
+
+    def test_streaming(self):
+        cuts = [0, 1, 2, 50, 57, 1000, 1001, 2500, self.L]
+        for ind, kernels in enumerate(self.kernels):
+            for block_size in self.block_size_list:
+                hammerstein_filter = HammersteinFilter(kernels,
+                                                       block_size=block_size)
+                output = np.concatenate(
+                    [hammerstein_filter.process(self.input_sig[start:stop],
+                                                by_order=True)
+                     for start, stop in zip(cuts[:-1], cuts[1:])], axis=1)
+                with self.subTest(i=(ind, block_size)):
+                    self._assert_close(output, self.output_ref[ind])
+
+    def test_reset(self):
+        hammerstein_filter = HammersteinFilter(self.kernels[-1])
+        output_1 = hammerstein_filter.process(self.input_sig)
+        hammerstein_filter.reset()
+        output_2 = hammerstein_filter.process(self.input_sig)
+        self.assertTrue(np.array_equal(output_1, output_2))
+
+    def test_wrong_block_size_error(self):
+        self.assertRaises(ValueError, compute_hammerstein_output,
+                          self.input_sig, self.kernels[0], block_size=0)
+
+
+class ComputeHammersteinOutputCplxTest(ComputeHammersteinOutputTest):
+
+    def _input_signal(self):
+        return np.random.normal(size=(self.L,)) + \
+            1j * np.random.normal(size=(self.L,))
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Test script for pyvi/volterra/sparse.py
+
+Notes
+-----
+Developed for Python 3.6
+@author: Damien Bouvier (Damien.Bouvier@ircam.fr)
+"""
+
+#==============================================================================
+# Importations
+#==============================================================================
+
+import unittest
+import itertools as itr
+import numpy as np
+from pyvi.volterra.sparse import (prune_kernels, compute_sparse_output,
+                                  evaluate_pruning)
+from pyvi.volterra.simulation import compute_output
+from pyvi.volterra.tools import series_nb_coeff
+
+
+#==============================================================================
+# Test Class
+#==============================================================================
+
+class PruneKernelsTest(unittest.TestCase):
+
+    N = 3
+    M = 6
+
+    def setUp(self):
+        self.kernels = {n+1: np.random.normal(size=(nb_coeff,))
+                        for n, nb_coeff in enumerate(series_nb_coeff(
+                            self.N, self.M, form='vec', out_by_order=True))}
+
+    def test_indexes(self):
+        sparse_kernels = prune_kernels(self.kernels, threshold=0)
+        for n, (indexes, values) in sparse_kernels.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.array_equal(indexes, np.array(list(
+                    itr.combinations_with_replacement(range(self.M), n)))))
+                self.assertTrue(np.array_equal(values, self.kernels[n]))
+
+    def test_threshold(self):
+        sparse_kernels = prune_kernels(self.kernels, threshold=1.)
+        for n, (indexes, values) in sparse_kernels.items():
+            with self.subTest(i=n):
+                self.assertEqual(len(indexes), len(values))
+                self.assertEqual(len(values),
+                                 np.sum(np.abs(self.kernels[n]) >= 1.))
+                self.assertTrue(np.all(np.abs(values) >= 1.))
+
+    def test_energy(self):
+        energy = 0.8
+        sparse_kernels = prune_kernels(self.kernels, energy=energy)
+        for n, (indexes, values) in sparse_kernels.items():
+            with self.subTest(i=n):
+                total = np.sum(self.kernels[n]**2)
+                largest = np.sort(self.kernels[n]**2)[::-1]
+                nb_kept = len(values)
+                self.assertGreaterEqual(np.sum(values**2), energy * total)
+                self.assertLess(np.sum(largest[:nb_kept-1]), energy * total)
+
+    def test_energy_by_order(self):
+        sparse_kernels = prune_kernels(self.kernels, energy=[1., 0., 1.])
+        self.assertEqual(len(sparse_kernels[1][1]), self.M)
+        self.assertEqual(len(sparse_kernels[2][1]), 1)
+
+    def test_hammerstein(self):
+        kernels = {n: np.random.normal(size=(self.M,))
+                   for n in range(1, self.N+1)}
+        sparse_kernels = prune_kernels(kernels, threshold=0,
+                                       system_type='hammerstein')
+        for n, (indexes, values) in sparse_kernels.items():
+            with self.subTest(i=n):
+                self.assertTrue(np.array_equal(
+                    indexes, np.repeat(np.arange(self.M)[:, np.newaxis], n,
+                                       axis=1)))
+
+    def test_wrong_parameters(self):
+        self.assertRaises(ValueError, prune_kernels, self.kernels)
+        self.assertRaises(ValueError, prune_kernels, self.kernels,
+                          threshold=1., energy=0.5)
+        self.assertRaises(ValueError, prune_kernels, self.kernels,
+                          energy=1.5)
+
+
+class ComputeSparseOutputTest(unittest.TestCase):
+
+    N = 3
+    M = 6
+    L = 200
+    atol = 1e-12
+
+    def setUp(self):
+        self.kernels = {n+1: np.random.normal(size=(nb_coeff,))
+                        for n, nb_coeff in enumerate(series_nb_coeff(
+                            self.N, self.M, form='vec', out_by_order=True))}
+        self.input_sig = np.random.normal(size=(self.L,))
+
+    def test_bit_exact(self):
+        sparse_kernels = prune_kernels(self.kernels, threshold=0)
+        self.assertTrue(np.array_equal(
+            compute_sparse_output(self.input_sig, sparse_kernels,
+                                  by_order=True),
+            compute_output(self.input_sig, self.kernels, by_order=True)))
+
+    def test_pruned(self):
+        sparse_kernels = prune_kernels(self.kernels, threshold=0.5)
+        pruned_kernels = {n: np.where(np.abs(h) >= 0.5, h, 0)
+                          for n, h in self.kernels.items()}
+        self.assertTrue(np.allclose(
+            compute_sparse_output(self.input_sig, sparse_kernels),
+            compute_output(self.input_sig, pruned_kernels), rtol=0,
+            atol=self.atol))
+
+    def test_unsorted_indexes(self):
+        indexes = np.array([[2, 0, 1], [1, 2, 0], [3, 3, 0]])
+        values = np.array([1., 0.5, -2.])
+        output = compute_sparse_output(self.input_sig,
+                                       {3: (indexes, values)})
+        delayed = [np.concatenate((np.zeros((k,)), self.input_sig[:-k]))
+                   if k else self.input_sig for k in range(4)]
+        expected = 1.5 * delayed[0] * delayed[1] * delayed[2] - \
+            2 * delayed[0] * delayed[3]**2
+        self.assertTrue(np.allclose(output, expected, rtol=0,
+                                    atol=self.atol))
+
+    def test_hammerstein(self):
+        kernels = {n: np.random.normal(size=(self.M,))
+                   for n in range(1, self.N+1)}
+        sparse_kernels = prune_kernels(kernels, threshold=0,
+                                       system_type='hammerstein')
+        self.assertTrue(np.allclose(
+            compute_sparse_output(self.input_sig, sparse_kernels),
+            compute_output(self.input_sig, kernels,
+                           system_type='hammerstein'),
+            rtol=0, atol=self.atol))
+
+    def test_collection(self):
+        sparse_kernels = prune_kernels(self.kernels, energy=0.9)
+        input_coll = np.random.normal(size=(4, self.L))
+        output_coll = compute_sparse_output(input_coll, sparse_kernels)
+        self.assertEqual(output_coll.shape, (4, self.L))
+        for ind, signal in enumerate(input_coll):
+            with self.subTest(i=ind):
+                self.assertTrue(np.array_equal(
+                    output_coll[ind],
+                    compute_sparse_output(signal, sparse_kernels)))
+
+
+class EvaluatePruningTest(unittest.TestCase):
+
+    def test_output(self):
+        kernels = {n+1: np.random.normal(size=(nb_coeff,))
+                   for n, nb_coeff in enumerate(series_nb_coeff(
+                       2, 5, form='vec', out_by_order=True))}
+        input_sig = np.random.normal(size=(100,))
+        sparse_kernels = prune_kernels(kernels, energy=0.9)
+        results = evaluate_pruning(input_sig, kernels, sparse_kernels,
+                                   nb_runs=1, db=False)
+        self.assertEqual(results['nb_coeff'], 20)
+        self.assertEqual(results['nb_kept'],
+                         sum(len(model[1])
+                             for model in sparse_kernels.values()))
+        self.assertGreater(results['speedup'], 0)
+        self.assertGreater(results['error'], 0)
+        self.assertLess(results['error'], 1)
+
+
+#==============================================================================
+# Main script
+#==============================================================================
+
+if __name__ == '__main__':
+    """
+    Main script for testing.
+    """
+
+    unittest.main()